@@ -0,0 +1,65 @@
+"""
+ACTIONS - responses for the create/delete POSTs on the page routes.
+
+A POST no longer re-renders the whole page. Requests from the page's own
+script (``Accept: application/json``) get a small JSON result - the
+message, the created row or removed id, and any stat values that changed -
+and the page patches itself in place. Plain form posts (no JavaScript) get
+a 303 redirect back to the page's GET with the message carried in a
+one-shot flash cookie (Post/Redirect/Get), so a refresh re-runs the
+cacheable GET instead of re-submitting the form.
+"""
+
+import html
+import json
+from urllib.parse import quote, unquote
+
+from flask import after_this_request, make_response, redirect, request
+
+FLASH_COOKIE = "flash"
+MESSAGE_TYPES = ("success", "error")
+# For a write that still found the database locked after db.write()'s retries
+BUSY_MESSAGE = "Error: the database is busy, please try again"
+
+
+def wants_json():
+    return request.accept_mimetypes.best_match(["text/html", "application/json"]) == "application/json"
+
+
+def action_response(message, message_type, **result):
+    """Answer a create/delete POST with JSON or a redirect carrying a flash message."""
+    if wants_json():
+        body = {"ok": message_type == "success", "message": message, "message_type": message_type}
+        body.update(result)
+        return body, 200 if body["ok"] else 400
+    location = request.path
+    if request.query_string:
+        location += "?" + request.query_string.decode("latin-1")
+    response = make_response(redirect(location, code=303))
+    response.set_cookie(FLASH_COOKIE, quote(json.dumps([message_type, message])),
+                        path=request.path, httponly=True, samesite="Lax")
+    return response
+
+
+def pop_flash():
+    """Return the pending (message, message_type) for this page and clear it.
+
+    The message is HTML-escaped since the cookie comes back from the client.
+    """
+    raw = request.cookies.get(FLASH_COOKIE)
+    if not raw:
+        return "", ""
+    path = request.path
+
+    @after_this_request
+    def clear_flash(response):
+        response.delete_cookie(FLASH_COOKIE, path=path)
+        return response
+
+    try:
+        message_type, message = json.loads(unquote(raw))
+    except (ValueError, TypeError):
+        return "", ""
+    if message_type not in MESSAGE_TYPES:
+        return "", ""
+    return html.escape(str(message)), message_type
@@ -0,0 +1,108 @@
+"""
+ADMISSION - per-route concurrency limits and load shedding.
+
+Under a traffic spike every request used to be let in, so ``/grades``
+listings piled up behind the database and everything slowed down together.
+Now each endpoint belongs to a pool with a concurrency limit and a bounded
+wait queue:
+
+    heavy     the listing pages, analytics, transcripts and batch deletes
+              (ADMIT_HEAVY_LIMIT at once, ADMIT_HEAVY_QUEUE waiting)
+    default   every other endpoint that does work (ADMIT_LIMIT, ADMIT_QUEUE)
+
+A request finding its pool full waits in the queue for up to
+``ADMIT_QUEUE_TIMEOUT`` seconds. A full queue or an expired wait gets an
+immediate 503 with ``Retry-After`` instead. Cheap endpoints (``/``, the
+health checks, ``/metrics``, the event stream) are always admitted, and
+because heavy requests have the smaller pool of their own, a burst of
+listings sheds before it can take every thread from the rest. Limits are
+per process; a limit of 0 turns its pool's gate off. Under serve.py, keep
+the heavy limit plus its queue below ``--threads``, since queued requests
+hold a thread while they wait.
+"""
+
+import os
+import threading
+import time
+
+import metrics
+
+ADMIT_HEAVY_LIMIT = int(os.environ.get("ADMIT_HEAVY_LIMIT", "4"))
+ADMIT_HEAVY_QUEUE = int(os.environ.get("ADMIT_HEAVY_QUEUE", "2"))
+ADMIT_LIMIT = int(os.environ.get("ADMIT_LIMIT", "32"))
+ADMIT_QUEUE = int(os.environ.get("ADMIT_QUEUE", "64"))
+ADMIT_QUEUE_TIMEOUT = float(os.environ.get("ADMIT_QUEUE_TIMEOUT", "2"))
+RETRY_AFTER = "1"
+
+# Always admitted: cheap, and needed to tell that the server is up
+PRIORITY_ENDPOINTS = {'index', 'healthz', 'readyz', 'metrics_endpoint', 'event_stream', 'static'}
+HEAVY_ENDPOINTS = {'students', 'grades', 'delete_students_batch', 'grade_analytics', 'student_transcript'}
+
+ADMISSION_QUEUED = metrics.Counter("http_admission_queued_total",
+                                   "Requests that waited for an admission slot.", ("pool",))
+ADMISSION_REJECTED = metrics.Counter("http_admission_rejected_total",
+                                     "Requests shed with a 503 by admission control.", ("pool", "reason"))
+ADMISSION_WAIT = metrics.Histogram("http_admission_wait_seconds",
+                                   "Time queued requests waited for an admission slot.", ("pool",))
+ADMISSION_WAITING = metrics.Gauge("http_admission_waiting", "Requests currently queued for a slot.",
+                                  ("pool",))
+
+
+class Gate:
+    """Lets ``limit`` requests in at once; up to ``queue`` more wait for a slot."""
+
+    def __init__(self, name, limit, queue, timeout=ADMIT_QUEUE_TIMEOUT):
+        self.name = name
+        self.limit = limit
+        self.queue = queue
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    def enter(self):
+        """Take a slot, waiting if need be; returns None, or why the request was shed."""
+        with self._cond:
+            if self.active < self.limit:
+                self.active += 1
+                return None
+            if self.waiting >= self.queue:
+                ADMISSION_REJECTED.inc((self.name, "queue_full"))
+                return "queue_full"
+            self.waiting += 1
+            ADMISSION_QUEUED.inc((self.name,))
+            ADMISSION_WAITING.inc((self.name,))
+            start = time.monotonic()
+            deadline = start + self.timeout
+            try:
+                while self.active >= self.limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        ADMISSION_REJECTED.inc((self.name, "timeout"))
+                        return "timeout"
+                    self._cond.wait(remaining)
+                self.active += 1
+                return None
+            finally:
+                self.waiting -= 1
+                ADMISSION_WAITING.dec((self.name,))
+                ADMISSION_WAIT.observe(time.monotonic() - start, (self.name,))
+
+    def leave(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+
+GATES = {
+    'heavy': Gate('heavy', ADMIT_HEAVY_LIMIT, ADMIT_HEAVY_QUEUE),
+    'default': Gate('default', ADMIT_LIMIT, ADMIT_QUEUE),
+}
+
+
+def gate_for(endpoint):
+    """The gate a request to ``endpoint`` must pass, or None if it is always admitted."""
+    if endpoint in PRIORITY_ENDPOINTS:
+        return None
+    gate = GATES['heavy' if endpoint in HEAVY_ENDPOINTS else 'default']
+    return gate if gate.limit > 0 else None
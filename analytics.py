@@ -0,0 +1,324 @@
+"""
+ANALYTICS - in-memory columnar copy of the grades table for group-by queries.
+
+Questions like "grade distribution by course and semester" or "average
+credits by major" used to need ad hoc SQL over unindexed text columns and a
+join with ``students``. ``GradeColumns`` keeps every grade as one entry in a
+set of typed ``array`` columns: course, grade, semester and the students'
+majors are dictionary-encoded to small integer codes, credits are doubles.
+A query filters and groups on those codes (vectorised with NumPy when it is
+installed, over zero-copy views of the arrays):
+
+    GET /analytics?group=course,semester,grade
+    GET /analytics?group=major&semester=Fall%202024
+
+Each group reports ``count``, total ``credits``, ``avg_credits`` and the
+credit-weighted ``gpa`` of its graded rows.
+
+The store is loaded on first use and then kept current from the change log,
+like the typeahead index: each query first applies the grade and student
+changes logged since the version it last saw, so writes from any worker
+process are included. A student's major is looked up through a per-student
+code column at query time, so changing a major touches one entry.
+"""
+
+import argparse
+import array
+import json
+import threading
+
+import changes
+import db
+import gpa_engine
+import models
+
+try:
+    import numpy as np
+except ImportError:  # optional, queries fall back to plain Python loops
+    np = None
+
+DIMENSIONS = ('course', 'grade', 'semester', 'major')
+
+# Deleted rows are only marked dead; past this share of the store it is compacted
+COMPACT_RATIO = 0.5
+
+
+class BadQuery(ValueError):
+    """The query names an unknown dimension."""
+
+
+class Dictionary:
+    """Dictionary encoding: each distinct value gets the next integer code."""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def encode(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def code(self, value):
+        """The code of ``value``, or None when no row ever had it."""
+        return self._codes.get(value)
+
+    def __len__(self):
+        return len(self.values)
+
+
+def _sort_key(value):
+    return (value is None, value)
+
+
+class GradeColumns:
+    """Grades as typed columns, with dictionary-encoded text columns."""
+
+    def __init__(self):
+        self.dictionaries = {dimension: Dictionary() for dimension in DIMENSIONS}
+        self.version = None
+        self._clear()
+
+    def _clear(self):
+        self.ids = array.array('q')
+        self.student_ids = array.array('q')
+        self.courses = array.array('i')
+        self.grades = array.array('i')
+        self.semesters = array.array('i')
+        self.credits = array.array('d')
+        self.live = array.array('b')
+        self.positions = {}     # grade id -> row
+        self.dead = 0
+        # Indexed by student id; -1 where there is no such student
+        self.student_majors = array.array('i')
+
+    def __len__(self):
+        return len(self.positions)
+
+    # -- loading and incremental refresh -------------------------------------
+
+    def load(self, conn):
+        self._clear()
+        self.version = changes.current_version(conn)
+        for student_id, major in conn.execute("SELECT id, major FROM students"):
+            self._set_major(student_id, major)
+        cursor = conn.execute("SELECT id, student_id, course, grade, semester, credits FROM grades")
+        for row in models.iter_rows(cursor):
+            self._append(*row)
+
+    def sync(self, conn):
+        """Load on first use, then apply the changes logged since the last sync."""
+        if self.version is None:
+            self.load(conn)
+            return
+        if changes.current_version(conn) == self.version:
+            return
+        while True:
+            delta = changes.changes_since(conn, self.version, tables=('students', 'grades'))
+            if delta['reset']:
+                self.load(conn)
+                return
+            for student in delta['students']['inserted']:
+                self._set_major(student['id'], student['major'])
+            for student_id in delta['students']['deleted']:
+                self._set_major(student_id, None)
+            for grade_id in delta['grades']['deleted']:
+                self._delete(grade_id)
+            for grade in delta['grades']['inserted']:
+                self._delete(grade['id'])
+                self._append(grade['id'], grade['student_id'], grade['course'], grade['grade'],
+                             grade['semester'], grade['credits'])
+            self.version = delta['version']
+            if not delta['more']:
+                break
+        if self.dead > COMPACT_RATIO * len(self.live):
+            self._compact()
+
+    def _set_major(self, student_id, major):
+        code = self.dictionaries['major'].encode(major)
+        majors = self.student_majors
+        if student_id >= len(majors):
+            majors.extend([-1] * (student_id + 1 - len(majors)))
+        majors[student_id] = code
+
+    def _append(self, grade_id, student_id, course, grade, semester, credits):
+        self.positions[grade_id] = len(self.ids)
+        self.ids.append(grade_id)
+        self.student_ids.append(student_id if student_id is not None else -1)
+        self.courses.append(self.dictionaries['course'].encode(course))
+        self.grades.append(self.dictionaries['grade'].encode(grade))
+        self.semesters.append(self.dictionaries['semester'].encode(semester))
+        self.credits.append(credits or 0)
+        self.live.append(1)
+
+    def _delete(self, grade_id):
+        row = self.positions.pop(grade_id, None)
+        if row is not None:
+            self.live[row] = 0
+            self.dead += 1
+
+    def _compact(self):
+        old = (self.ids, self.student_ids, self.courses, self.grades, self.semesters, self.credits,
+               self.live)
+        majors = self.student_majors
+        self._clear()
+        self.student_majors = majors
+        for grade_id, student_id, course, grade, semester, credits, live in zip(*old):
+            if live:
+                self.positions[grade_id] = len(self.ids)
+                self.ids.append(grade_id)
+                self.student_ids.append(student_id)
+                self.courses.append(course)
+                self.grades.append(grade)
+                self.semesters.append(semester)
+                self.credits.append(credits)
+                self.live.append(1)
+
+    # -- queries ----------------------------------------------------------------
+
+    def query(self, group=(), filters=None):
+        """Aggregate the live rows matching ``filters`` ({dimension: value}) per ``group``.
+
+        Returns one dict per group with the group's dimension values and its
+        ``count``, ``credits``, ``avg_credits`` and credit-weighted ``gpa``
+        (None when it has no graded credits).
+        """
+        group = tuple(group)
+        filters = dict(filters or {})
+        unknown = [d for d in group + tuple(filters) if d not in DIMENSIONS]
+        if unknown:
+            raise BadQuery(f"unknown dimension {unknown[0]!r}; use one of {', '.join(DIMENSIONS)}")
+        codes = {}
+        for dimension, value in filters.items():
+            code = self.dictionaries[dimension].code(value)
+            if code is None:
+                return []
+            codes[dimension] = code
+        aggregate = self._aggregate_numpy if np is not None else self._aggregate_python
+        totals = aggregate(group, codes)
+
+        # Group values per code (code -1: a grade whose student was never
+        # seen) and each code's position in value order, for sorting
+        values = [self.dictionaries[dimension].values + [None] for dimension in group]
+        ranks = []
+        for dimension_values in values:
+            order = sorted(range(len(dimension_values)), key=lambda code: _sort_key(dimension_values[code]))
+            rank = [0] * len(order)
+            for position, code in enumerate(order):
+                rank[code] = position
+            ranks.append(rank)
+        keys = sorted(totals, key=lambda key: [rank[code] for rank, code in zip(ranks, key)])
+
+        result = []
+        for key in keys:
+            count, credits, quality_points, graded_credits = totals[key]
+            entry = {dimension: dimension_values[code]
+                     for dimension, dimension_values, code in zip(group, values, key)}
+            entry['count'] = int(count)
+            entry['credits'] = credits
+            entry['avg_credits'] = round(credits / count, 2)
+            entry['gpa'] = round(quality_points / graded_credits, 2) if graded_credits else None
+            result.append(entry)
+        return result
+
+    def _points_table(self):
+        # Grade points per grade code; -1 for values that are not letter grades
+        return [gpa_engine.GRADE_POINTS.get(grade, -1.0) for grade in self.dictionaries['grade'].values]
+
+    def _aggregate_python(self, group, codes):
+        points = self._points_table()
+        majors = self.student_majors
+        columns = {'course': self.courses, 'grade': self.grades, 'semester': self.semesters}
+        totals = {}
+        for row in self.positions.values():
+            student_id = self.student_ids[row]
+            values = {dimension: column[row] for dimension, column in columns.items()}
+            values['major'] = majors[student_id] if 0 <= student_id < len(majors) else -1
+            if any(values[dimension] != code for dimension, code in codes.items()):
+                continue
+            key = tuple(values[dimension] for dimension in group)
+            entry = totals.get(key)
+            if entry is None:
+                entry = totals[key] = [0, 0.0, 0.0, 0.0]
+            credits = self.credits[row]
+            entry[0] += 1
+            entry[1] += credits
+            grade_points = points[values['grade']]
+            if grade_points >= 0 and credits > 0:
+                entry[2] += grade_points * credits
+                entry[3] += credits
+        return totals
+
+    def _aggregate_numpy(self, group, codes):
+        if not self.positions:
+            return {}
+        mask = np.frombuffer(self.live, dtype=np.int8) == 1
+        student_ids = np.frombuffer(self.student_ids, dtype=np.int64)
+        columns = {
+            'course': np.frombuffer(self.courses, dtype=np.int32),
+            'grade': np.frombuffer(self.grades, dtype=np.int32),
+            'semester': np.frombuffer(self.semesters, dtype=np.int32),
+        }
+        if 'major' in group or 'major' in codes:
+            majors = np.frombuffer(self.student_majors, dtype=np.int32)
+            known = (student_ids >= 0) & (student_ids < len(majors))
+            columns['major'] = np.where(known, majors[np.where(known, student_ids, 0)], -1)
+        for dimension, code in codes.items():
+            mask &= columns[dimension] == code
+        credits = np.frombuffer(self.credits, dtype=np.float64)[mask]
+        grade_points = np.array(self._points_table())[columns['grade'][mask]]
+        graded = (grade_points >= 0) & (credits > 0)
+
+        # One integer key per row: the group's codes in mixed radix
+        key = np.zeros(len(credits), dtype=np.int64)
+        for dimension in group:
+            # +1 leaves room for the -1 "no major" code
+            key = key * (len(self.dictionaries[dimension]) + 1) + columns[dimension][mask] + 1
+        keys, inverse = np.unique(key, return_inverse=True)
+        count = np.bincount(inverse, minlength=len(keys))
+        total_credits = np.bincount(inverse, weights=credits, minlength=len(keys))
+        quality_points = np.bincount(inverse, weights=np.where(graded, grade_points * credits, 0),
+                                     minlength=len(keys))
+        graded_credits = np.bincount(inverse, weights=np.where(graded, credits, 0), minlength=len(keys))
+
+        decoded = []
+        remaining = keys
+        for dimension in reversed(group):
+            radix = len(self.dictionaries[dimension]) + 1
+            decoded.append(remaining % radix - 1)
+            remaining = remaining // radix
+        decoded.reverse()
+        group_keys = zip(*(column.tolist() for column in decoded)) if group else [()] * len(keys)
+        return dict(zip(group_keys, zip(count.tolist(), total_credits.tolist(), quality_points.tolist(),
+                                        graded_credits.tolist())))
+
+_store = GradeColumns()
+_lock = threading.Lock()
+
+
+def query(group=(), filters=None):
+    """Run a query against the shared store, bringing it up to date first."""
+    conn = db.connect()
+    try:
+        with _lock:
+            _store.sync(conn)
+            return {'version': _store.version, 'rows': len(_store), 'groups': _store.query(group, filters)}
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Group and aggregate the grades table.")
+    parser.add_argument("--group", default="", help="comma-separated dimensions: " + ", ".join(DIMENSIONS))
+    for dimension in DIMENSIONS:
+        parser.add_argument(f"--{dimension}", help=f"only rows with this {dimension}")
+    options = parser.parse_args(argv)
+    group = [part for part in options.group.split(",") if part]
+    filters = {d: getattr(options, d) for d in DIMENSIONS if getattr(options, d) is not None}
+    print(json.dumps(query(group, filters), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+ASYNC_APP - ASGI entry point with non-blocking /students and /grades listings.
+
+GET requests to /students and /grades run their SQLite work and rendering on
+a bounded thread pool and ``await`` it, so one event loop keeps serving other requests
+while slow filtered queries run. Rendering reuses the same functions as the
+Flask handlers, so both paths produce identical pages. Every other request
+(POST actions, /metrics, a listing showing a flash message or being
+profiled, ...) is passed to the Flask app through a small WSGI bridge on
+the same pool. ``/events`` is served natively on the event
+loop, so thousands of idle SSE clients cost a queue each rather than a thread.
+
+    uvicorn async_app:app --port 5000
+
+``DB_THREADS`` bounds how many queries run at once; ``DB_QUEUE`` bounds how
+many more may wait for a thread before new requests get a 503.
+"""
+
+import asyncio
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import CookieError, SimpleCookie
+from urllib.parse import parse_qs
+
+import actions
+import events
+import metrics
+import profiling
+import terrible_server
+from terrible_server import app as flask_app
+from student_page import render_student_listing
+from grades_page import render_grades_listing
+
+DB_THREADS = int(os.environ.get("DB_THREADS", "8"))
+DB_QUEUE = int(os.environ.get("DB_QUEUE", "256"))
+
+executor = ThreadPoolExecutor(max_workers=DB_THREADS, thread_name_prefix="db")
+_slots = None
+
+
+async def run_blocking(fn, *args):
+    """Run ``fn`` on the bounded pool; raise ``OverflowError`` when the queue is full."""
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(DB_THREADS + DB_QUEUE)
+    if _slots.locked():
+        raise OverflowError("too many pending database calls")
+    async with _slots:
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+
+def _query_args(scope):
+    parsed = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    return {key: values[0] for key, values in parsed.items()}
+
+
+def _has_flash(scope):
+    """Whether the request carries a flash message for the page to show (and clear)."""
+    for name, value in scope.get("headers", []):
+        if name == b"cookie":
+            try:
+                cookie = SimpleCookie(value.decode("latin-1")).get(actions.FLASH_COOKIE)
+            except CookieError:
+                continue
+            if cookie is not None and cookie.value:
+                return True
+    return False
+
+
+async def students_page(args):
+    search = args.get('search', '')
+    filter_major = args.get('major', '')
+    return await run_blocking(render_student_listing, search, filter_major)
+
+
+async def grades_page(args):
+    student_filter = args.get('student', '')
+    course_filter = args.get('course', '')
+    semester_filter = args.get('semester', '')
+    return await run_blocking(render_grades_listing, student_filter, course_filter, semester_filter)
+
+
+ASYNC_ROUTES = {
+    '/students': students_page,
+    '/grades': grades_page,
+}
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        event = await receive()
+        chunks.append(event.get("body", b""))
+        if not event.get("more_body"):
+            return b"".join(chunks)
+
+
+def _call_wsgi(environ):
+    captured = {}
+
+    def start_response(status, headers, exc_info=None):
+        captured["status"] = int(status.split(" ", 1)[0])
+        captured["headers"] = headers
+
+    result = flask_app(environ, start_response)
+    try:
+        body = b"".join(result)
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    return captured["status"], captured["headers"], body
+
+
+def _wsgi_environ(scope, body):
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        "PATH_INFO": scope["path"],
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": "HTTP/" + scope.get("http_version", "1.1"),
+        "REMOTE_ADDR": (scope.get("client") or ("", 0))[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+        "CONTENT_LENGTH": str(len(body)),
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        elif name != "CONTENT_LENGTH":
+            key = "HTTP_" + name
+            environ[key] = environ[key] + "," + value if key in environ else value
+    return environ
+
+
+async def _send_response(send, status, headers, body):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def event_stream(send, receive):
+    try:
+        subscription = events.subscribe(events.AsyncSubscription(asyncio.get_running_loop()))
+    except events.TooManySubscribers:
+        await _send_response(send, 503, [("Content-Type", "text/plain"), ("Retry-After", "5")],
+                             b"Too many open event streams\n")
+        return
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no")],
+    })
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+    chunks = events.stream_async(subscription)
+    try:
+        async for chunk in chunks:
+            if disconnected.done():
+                break
+            await send({"type": "http.response.body", "body": chunk.encode("utf-8"), "more_body": True})
+    except OSError:
+        pass
+    finally:
+        disconnected.cancel()
+        await chunks.aclose()
+
+
+async def _lifespan(receive, send):
+    while True:
+        event = await receive()
+        if event["type"] == "lifespan.startup":
+            terrible_server.start_warmup()
+            await send({"type": "lifespan.startup.complete"})
+        elif event["type"] == "lifespan.shutdown":
+            executor.shutdown(wait=True)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await _lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+
+    if scope["path"] == "/events" and scope["method"] == "GET":
+        return await event_stream(send, receive)
+
+    handler = ASYNC_ROUTES.get(scope["path"]) if scope["method"] == "GET" else None
+    if handler is not None and (_has_flash(scope) or profiling.PROFILE_PARAM in _query_args(scope)):
+        # The Flask handler pops the flash into the page, or profiles an uncached render
+        handler = None
+    try:
+        if handler is not None:
+            if not await run_blocking(terrible_server.wait_until_ready):
+                await _send_response(send, 503, [("Content-Type", "text/plain"), ("Retry-After", "1")],
+                                     b"Service is starting, try again shortly\n")
+                return
+            start = time.perf_counter()
+            metrics.IN_FLIGHT.inc()
+            try:
+                body = await handler(_query_args(scope))
+            finally:
+                metrics.IN_FLIGHT.dec()
+            metrics.REQUESTS.inc(("GET", scope["path"], "200"))
+            metrics.REQUEST_LATENCY.observe(time.perf_counter() - start, ("GET", scope["path"]))
+            metrics.RESPONSE_SIZE.observe(len(body), ("GET", scope["path"]))
+            await _send_response(send, 200, [("Content-Type", "text/html; charset=utf-8"),
+                                             ("Content-Length", str(len(body)))], body)
+        else:
+            environ = _wsgi_environ(scope, await _read_body(receive))
+            status, headers, body = await run_blocking(_call_wsgi, environ)
+            await _send_response(send, status, headers, body)
+    except OverflowError:
+        await _send_response(send, 503, [("Content-Type", "text/plain"), ("Retry-After", "1")],
+                             b"Server busy, try again shortly\n")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Overload: cheap-route latency with and without admission control.
+
+Builds a synthetic students.db, starts serve.py on it with admission
+control off (every limit 0) and then on (the defaults), and floods
+``--path`` (a heavy listing) from ``--clients`` threads for ``--seconds``.
+Meanwhile one probe client requests ``/healthz`` and one requests a
+default-pool endpoint back to back. Reports the heavy requests served and
+shed, and the probes' median and p99 latency:
+
+    python3 benchmarks/bench_admission.py --students 20000 --clients 32
+"""
+
+import argparse
+import http.client
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import build_db  # noqa: E402
+
+OFF = {"ADMIT_HEAVY_LIMIT": "0", "ADMIT_LIMIT": "0"}
+
+
+def fetch(port, path):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    start = time.perf_counter()
+    conn.request("GET", path)
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    return response.status, time.perf_counter() - start
+
+
+def wait_until_ready(port, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if fetch(port, "/readyz")[0] == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)] * 1000 if values else float("nan")
+
+
+def run(env, options, cwd):
+    port = options.port
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "serve.py"), "--workers", "1", "--threads", str(options.threads),
+         "--port", str(port), "--max-requests", "0"],
+        cwd=cwd, env=dict(os.environ, PYTHONPATH=ROOT, **env),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_ready(port)
+        stop = time.monotonic() + options.seconds
+        statuses = []
+        probes = {"/healthz": [], options.probe: []}
+
+        def flood():
+            while time.monotonic() < stop:
+                statuses.append(fetch(port, options.path)[0])
+
+        def probe(path):
+            while time.monotonic() < stop:
+                probes[path].append(fetch(port, path)[1])
+                time.sleep(0.05)
+
+        threads = [threading.Thread(target=flood) for _ in range(options.clients)]
+        threads += [threading.Thread(target=probe, args=(path,)) for path in probes]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return statuses, probes
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--grades-per-student", type=int, default=8)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--path", default="/grades?course=alg")
+    parser.add_argument("--probe", default="/rankings/top?limit=10")
+    parser.add_argument("--port", type=int, default=5098)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cwd:
+        build_db(os.path.join(cwd, "students.db"), options.students, options.grades_per_student)
+        print(f"{options.clients} clients on {options.path}, {options.threads} server threads")
+        print(f"{'admission':>10} {'served':>7} {'shed':>6} {'/healthz p50/p99 ms':>21}"
+              f" {'probe p50/p99 ms':>18}")
+        for label, env in (("off", OFF), ("on", {})):
+            statuses, probes = run(env, options, cwd)
+            served = statuses.count(200)
+            shed = statuses.count(503)
+            health, other = probes["/healthz"], probes[options.probe]
+            print(f"{label:>10} {served:>7} {shed:>6}"
+                  f" {percentile(health, 0.5):>10.1f}/{percentile(health, 0.99):<10.1f}"
+                  f" {percentile(other, 0.5):>8.1f}/{percentile(other, 0.99):<9.1f}")
+
+
+if __name__ == "__main__":
+    main()
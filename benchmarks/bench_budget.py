@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Query time budgets: how fast a slow listing is cut off, and what checking costs.
+
+Builds a synthetic database and runs grades listing queries through
+``db.fetch_within()`` with no budget and with ``--budget``, reporting the
+time taken and the rows returned. A student-name filter that matches
+nothing has to scan every grade before it can answer; the unfiltered
+listing is simply big. A budget longer than every query shows what the
+progress handler's checks cost:
+
+    python3 benchmarks/bench_budget.py --students 100000 --budget 0.1
+    python3 benchmarks/bench_budget.py --students 100000 --budget 10
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import build_db  # noqa: E402
+import db  # noqa: E402
+import models  # noqa: E402
+import queries  # noqa: E402
+
+FILTERS = (
+    ("no filter", "", "", ""),
+    ("name, no match", "zzz", "", ""),
+    ("name + course", "a", "alg", ""),
+)
+
+
+def best(work, repeat=3):
+    fastest = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = work()
+        fastest = min(fastest, time.perf_counter() - start)
+    return result, fastest * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=100000)
+    parser.add_argument("--grades-per-student", type=int, default=8)
+    parser.add_argument("--budget", type=float, default=0.1, help="seconds")
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_db(path, options.students, options.grades_per_student)
+        conn = sqlite3.connect(path)
+        cursor = conn.cursor()
+        cursor.row_factory = models.grade_row
+
+        print(f"{'filter':>16} {'budget':>7} {'ms':>8} {'rows':>8} {'truncated':>10}")
+        for label, student, course, semester in FILTERS:
+            sql, params = queries.grades(student, course, semester)
+            for budget in (0, options.budget):
+                rows, elapsed = best(lambda: db.fetch_within(cursor, sql, params, budget, "bench"))
+                truncated = isinstance(rows, db.TruncatedRows)
+                print(f"{label:>16} {budget or '-':>7} {elapsed:>8.1f} {len(rows):>8} {str(truncated):>10}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Student delete cost as the grades table grows.
+
+Compares the old delete path (unindexed ``DELETE FROM grades WHERE
+student_id = ?`` then the student, one commit per student) with the
+cascading foreign key plus index, one student per transaction and a whole
+batch in one transaction. Cascade cost per student should stay flat while
+the unindexed scan grows with the table.
+
+    python3 benchmarks/bench_cascade.py --students 10000 --deletes 200
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import build_db  # noqa: E402
+from terrible_server import migrate_grades_table  # noqa: E402
+
+
+def legacy(path, ids):
+    conn = sqlite3.connect(path)
+    for student_id in ids:
+        conn.execute("DELETE FROM grades WHERE student_id = ?", (student_id,))
+        conn.execute("DELETE FROM students WHERE id = ?", (student_id,))
+        conn.commit()
+    conn.close()
+
+
+def cascade(path, ids):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA foreign_keys = ON")
+    for student_id in ids:
+        conn.execute("DELETE FROM students WHERE id = ?", (student_id,))
+        conn.commit()
+    conn.close()
+
+
+def cascade_batch(path, ids):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA foreign_keys = ON")
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        conn.execute(f"DELETE FROM students WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+    conn.commit()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--grades-per-student", type=int, nargs="+", default=[2, 8, 32])
+    parser.add_argument("--deletes", type=int, default=200)
+    options = parser.parse_args()
+
+    ids = random.Random(7).sample(range(1, options.students + 1), options.deletes)
+    print(f"{'grades':>10} {'legacy ms/student':>18} {'cascade ms/student':>19} {'batch ms/student':>17}")
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, "base.db")
+        migrated = os.path.join(tmp, "migrated.db")
+        work = os.path.join(tmp, "work.db")
+        for per_student in options.grades_per_student:
+            build_db(base, options.students, per_student)
+            shutil.copy(base, migrated)
+            conn = sqlite3.connect(migrated)
+            migrate_grades_table(conn)
+            conn.close()
+            timings = []
+            for fn, source in ((legacy, base), (cascade, migrated), (cascade_batch, migrated)):
+                shutil.copy(source, work)
+                start = time.perf_counter()
+                fn(work, ids)
+                timings.append((time.perf_counter() - start) * 1000 / len(ids))
+            print(f"{options.students * per_student:>10} {timings[0]:>18.3f} {timings[1]:>19.3f} {timings[2]:>17.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Concurrent writers: deferred transactions against ``db.write()``.
+
+Builds a synthetic database and runs ``--writers`` threads, each on its own
+connection, doing ``--transactions`` read-then-write transactions shaped
+like the grade POST (look the student up, insert a grade, update the
+student). First as plain deferred transactions - the read takes a shared
+lock, so two writers can each wait on the other to upgrade and SQLite fails
+one straight away with "database is locked" - then through ``db.write()``
+with ``BEGIN IMMEDIATE`` and its retries. Reports commits, failures,
+retries and throughput; a short ``--timeout`` shows the retries at work:
+
+    python3 benchmarks/bench_contention.py --writers 8 --timeout 0.05
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import COURSES, SEMESTERS, build_db  # noqa: E402
+import db  # noqa: E402
+import metrics  # noqa: E402
+
+
+def transaction(conn, rng, students):
+    student_id = rng.randint(1, students)
+    conn.execute("SELECT name, gpa FROM students WHERE id = ?", (student_id,)).fetchone()
+    conn.execute("INSERT INTO grades (student_id, course, grade, semester, credits) VALUES (?, ?, 'B', ?, 3)",
+                 (student_id, rng.choice(COURSES), rng.choice(SEMESTERS)))
+    conn.execute("UPDATE students SET gpa = ? WHERE id = ?", (round(rng.uniform(1.5, 4.0), 2), student_id))
+
+
+def deferred(conn, rng, students):
+    conn.execute("BEGIN")
+    transaction(conn, rng, students)
+    conn.commit()
+
+
+def immediate(conn, rng, students):
+    db.write(lambda conn: transaction(conn, rng, students), conn)
+
+
+def run(path, mode, options):
+    committed = [0] * options.writers
+    failed = [0] * options.writers
+    retries = metrics.DB_WRITE_RETRIES.value()
+    gave_up = metrics.DB_WRITE_FAILURES.value()
+
+    def writer(index):
+        rng = random.Random(index)
+        conn = db.connect(path)
+        for _ in range(options.transactions):
+            try:
+                mode(conn, rng, options.students)
+                committed[index] += 1
+            except sqlite3.OperationalError as e:
+                if not db.is_locked(e):
+                    raise
+                if conn.in_transaction:
+                    conn.rollback()
+                failed[index] += 1
+        conn.close()
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(options.writers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return (sum(committed), sum(failed), metrics.DB_WRITE_RETRIES.value() - retries,
+            metrics.DB_WRITE_FAILURES.value() - gave_up, sum(committed) / elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--transactions", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=db.BUSY_TIMEOUT, help="busy timeout in seconds")
+    parser.add_argument("--retries", type=int, default=db.WRITE_RETRIES)
+    options = parser.parse_args()
+    db.BUSY_TIMEOUT = options.timeout
+    db.WRITE_RETRIES = options.retries
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_db(path, options.students, grades_per_student=2)
+        total = options.writers * options.transactions
+        print(f"{options.writers} writers x {options.transactions} transactions,"
+              f" busy timeout {options.timeout:g} s, {options.retries} retries")
+        print(f"{'mode':>10} {'committed':>10} {'failed':>7} {'retries':>8} {'gave up':>8} {'tx/s':>8}")
+        for label, mode in (("deferred", deferred), ("db.write", immediate)):
+            done, failed, retried, gave_up, rate = run(path, mode, options)
+            assert done + failed == total
+            print(f"{label:>10} {done:>10} {failed:>7} {retried:>8} {gave_up:>8} {rate:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
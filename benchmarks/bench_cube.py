@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Grade chart lookups from the distribution cube against counting the rows.
+
+Builds a synthetic database with ``grade_cube`` and times
+``grade_cube.distribution()`` for the grades page filter combinations
+against the GROUP BY over the joined grades it replaces, then the cost
+the cube's triggers add to inserting grades:
+
+    python3 benchmarks/bench_cube.py --students 100000
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import COURSES, SEMESTERS, build_db  # noqa: E402
+import grade_cube  # noqa: E402
+import queries  # noqa: E402
+
+FILTERS = (
+    ("no filter", "", ""),
+    ("semester", "", SEMESTERS[-1]),
+    ("course contains", COURSES[0].split()[0].lower(), ""),
+    ("course + semester", COURSES[0].split()[0].lower(), SEMESTERS[-1]),
+)
+
+
+def scan(conn, course, semester):
+    sql, params = queries.grades("", course, semester)
+    sql = sql.replace("SELECT g.id, g.student_id, s.name, g.course, g.grade, g.semester, g.credits",
+                      "SELECT g.grade, COUNT(*), SUM(g.credits)")
+    return {grade: (count, credits) for grade, count, credits in
+            conn.execute(sql + " GROUP BY g.grade", params)}
+
+
+def best(work, repeat=5):
+    fastest = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = work()
+        fastest = min(fastest, time.perf_counter() - start)
+    return result, fastest * 1000
+
+
+def insert_time(conn, count):
+    start = time.perf_counter()
+    conn.executemany(
+        "INSERT INTO grades (student_id, course, grade, semester, credits) VALUES (?, ?, 'B', ?, 3)",
+        ((i + 1, COURSES[i % len(COURSES)], SEMESTERS[i % len(SEMESTERS)]) for i in range(count)))
+    conn.commit()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=100000)
+    parser.add_argument("--grades-per-student", type=int, default=8)
+    parser.add_argument("--inserts", type=int, default=10000)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_db(path, options.students, options.grades_per_student)
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE INDEX idx_grades_student ON grades (student_id)")
+        plain = insert_time(conn, options.inserts)
+        start = time.perf_counter()
+        cells = grade_cube.rebuild(conn)
+        conn.commit()
+        print(f"cube rebuilt: {cells} cells in {time.perf_counter() - start:.2f} s")
+
+        print(f"{'filter':>18} {'cube ms':>8} {'scan ms':>8}")
+        for label, course, semester in FILTERS:
+            cube, cube_ms = best(lambda: grade_cube.distribution(conn, course, semester))
+            rows, scan_ms = best(lambda: scan(conn, course, semester))
+            assert cube == rows, label
+            print(f"{label:>18} {cube_ms:>8.2f} {scan_ms:>8.1f}")
+
+        with_cube = insert_time(conn, options.inserts)
+        conn.close()
+    print(f"insert: {plain:.1f} us/grade without the cube, {with_cube:.1f} us/grade with it")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Page assembly time with the rendered row cache cold and warm.
+
+Renders the students and grades listing pages from already-fetched rows
+(no I/O), first with the fragment caches emptied before every render and
+then with them warm, so only cache lookups and the final join remain.
+A page whose rows do not all fit in ``FRAGMENT_CACHE_BYTES`` keeps
+evicting its own oldest rows, so warm stays close to cold:
+
+    python3 benchmarks/bench_fragments.py --students 10000
+    FRAGMENT_CACHE_BYTES=100000000 python3 benchmarks/bench_fragments.py
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import build_db  # noqa: E402
+import grade_cube  # noqa: E402
+import grades_page  # noqa: E402
+import models  # noqa: E402
+import queries  # noqa: E402
+import student_page  # noqa: E402
+
+
+def fetch(path, sql, factory):
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    cursor.row_factory = factory
+    rows = cursor.execute(sql).fetchall()
+    conn.close()
+    return rows
+
+
+def timed(render, cache, cold, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        if cold:
+            cache.invalidate()
+        start = time.perf_counter()
+        render()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--grades-per-student", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_db(path, options.students, options.grades_per_student)
+        students = fetch(path, queries.STUDENT_COLUMNS, models.student_row)
+        grades = fetch(path, queries.GRADE_COLUMNS, models.grade_row)
+    distribution = grade_cube.tally(grades)
+
+    pages = (
+        ("students", len(students), student_page.STUDENT_ROWS,
+         lambda: student_page.build_student_page_html(students, [], "", "")),
+        ("grades", len(grades), grades_page.GRADE_ROWS,
+         lambda: grades_page.build_grades_page_html(grades, distribution, 0, [], "", "", "")),
+    )
+    print(f"{'page':>9} {'rows':>8} {'cold ms':>9} {'warm ms':>9} {'cache MB':>9}")
+    for name, count, cache, render in pages:
+        cold = timed(render, cache, True, options.repeat)
+        warm = timed(render, cache, False, options.repeat)
+        print(f"{name:>9} {count:>8} {cold:>9.1f} {warm:>9.1f} {cache.size / 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Statement preparation cost of the page listing queries.
+
+Runs the same stream of distinct filter values three ways: values pasted
+into the SQL text (every query is a new statement to parse and plan),
+parameterized with the statement cache disabled, and parameterized with
+``db.STATEMENT_CACHE_SIZE``. The gap between the last two is the prepare
+cost the fixed query shapes remove. The default table is small so that
+preparation, not the scan, dominates; raise ``--students`` to see how
+much of a real page query it is.
+
+    python3 benchmarks/bench_queries.py --students 200 --queries 20000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import build_db, COURSES, FIRST, MAJORS, SEMESTERS  # noqa: E402
+import db  # noqa: E402
+import queries  # noqa: E402
+
+
+def concatenated(kind, values):
+    # The old page code
+    if kind == "students":
+        search, major = values
+        return (f"SELECT id, name, email, age, major, gpa FROM students"
+                f" WHERE name LIKE '%{search}%' AND major = '{major}'")
+    student, course, semester = values
+    return (f"{queries.GRADE_COLUMNS} WHERE s.name LIKE '%{student}%'"
+            f" AND g.course LIKE '%{course}%' AND g.semester = '{semester}'")
+
+
+def filter_values(rng, kind, count):
+    values = []
+    for i in range(count):
+        # A distinct search term per query, as real typed searches are
+        term = f"{rng.choice(FIRST)[:rng.randint(2, 5)]} {i}"
+        if kind == "students":
+            values.append((term, rng.choice(MAJORS)))
+        else:
+            values.append((term, rng.choice(COURSES)[:6], rng.choice(SEMESTERS)))
+    return values
+
+
+def run(path, kind, values, mode):
+    cache = 0 if mode == "param, no cache" else db.STATEMENT_CACHE_SIZE
+    conn = sqlite3.connect(path, cached_statements=cache)
+    build = queries.students if kind == "students" else queries.grades
+    start = time.perf_counter()
+    for value in values:
+        if mode == "concatenated":
+            conn.execute(concatenated(kind, value)).fetchall()
+        else:
+            sql, params = build(*value)
+            conn.execute(sql, params).fetchall()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed * 1e6 / len(values)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--grades-per-student", type=int, default=2)
+    parser.add_argument("--queries", type=int, default=20000)
+    options = parser.parse_args()
+
+    rng = random.Random(3)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_db(path, options.students, options.grades_per_student)
+        print(f"{'query':>9} {'mode':>16} {'us/query':>9}")
+        for kind in ("students", "grades"):
+            values = filter_values(rng, kind, options.queries)
+            for mode in ("concatenated", "param, no cache", "param, cached"):
+                print(f"{kind:>9} {mode:>16} {run(path, kind, values, mode):>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Ranking lookups: the (major, gpa) index and Fenwick trees against sorting.
+
+Builds a synthetic database and times, per request, a top-50 in one major
+and across all majors through ``rankings.TOP_QUERY`` against fetching the
+students and sorting them in Python (what the browser used to do), and a
+student's percentile from ``rankings.GpaRanks`` against counting with SQL.
+Then updates GPAs and times the incremental tree refresh:
+
+    python3 benchmarks/bench_rankings.py --students 100000
+"""
+
+import argparse
+import heapq
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import MAJORS, build_db  # noqa: E402
+import changes  # noqa: E402
+import rankings  # noqa: E402
+
+
+def per_call(work, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        work(i)
+    return (time.perf_counter() - start) / calls * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=100000)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--updates", type=int, default=1000)
+    options = parser.parse_args()
+    rng = random.Random(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_db(path, options.students, grades_per_student=0)
+        conn = sqlite3.connect(path)
+        rankings.ensure_schema(conn)
+        changes.ensure_schema(conn)
+        conn.commit()
+        ranks = rankings.GpaRanks()
+        start = time.perf_counter()
+        ranks.sync(conn)
+        print(f"trees loaded for {len(ranks.students)} students in {time.perf_counter() - start:.2f} s")
+
+        def top_major_index(i):
+            conn.execute(rankings.TOP_QUERY, (MAJORS[i % len(MAJORS)], 50)).fetchall()
+
+        def top_major_sort(i):
+            rows = conn.execute("SELECT id, name, major, gpa FROM students WHERE major = ?",
+                                (MAJORS[i % len(MAJORS)],)).fetchall()
+            sorted((row for row in rows if row[3] is not None), key=lambda row: -row[3])[:50]
+
+        def top_all_index(i):
+            per_major = [conn.execute(rankings.TOP_QUERY, (major, 50)).fetchall() for major in MAJORS]
+            list(heapq.merge(*per_major, key=lambda row: -row[3]))[:50]
+
+        def top_all_sort(i):
+            rows = conn.execute("SELECT id, name, major, gpa FROM students").fetchall()
+            sorted((row for row in rows if row[3] is not None), key=lambda row: -row[3])[:50]
+
+        ids = [rng.randint(1, options.students) for _ in range(options.calls)]
+
+        def percentile_tree(i):
+            ranks.position(ids[i])
+
+        def percentile_sql(i):
+            major, gpa = conn.execute("SELECT major, gpa FROM students WHERE id = ?", (ids[i],)).fetchone()
+            conn.execute("SELECT COUNT(*), SUM(gpa < ?), SUM(gpa = ?) FROM students"
+                         " WHERE major = ? AND gpa IS NOT NULL", (gpa, gpa, major)).fetchone()
+
+        print(f"{'lookup':>22} {'ms/call':>9}")
+        for label, work in (("top 50 major: index", top_major_index), ("top 50 major: sort", top_major_sort),
+                            ("top 50 all: index", top_all_index), ("top 50 all: sort", top_all_sort),
+                            ("percentile: tree", percentile_tree), ("percentile: SQL", percentile_sql)):
+            calls = options.calls if "sort" not in label else max(options.calls // 10, 1)
+            print(f"{label:>22} {per_call(work, calls):>9.3f}")
+
+        # Trees loaded at change version 0 reload on their first refresh
+        # (changes_since() answers since=0 with a snapshot); get that out of the way
+        conn.execute("UPDATE students SET gpa = 4.0 WHERE id = 1")
+        conn.commit()
+        ranks.sync(conn)
+
+        conn.executemany("UPDATE students SET gpa = ? WHERE id = ?",
+                         ((round(rng.uniform(1.5, 4.0), 2), rng.randint(1, options.students))
+                          for _ in range(options.updates)))
+        conn.commit()
+        start = time.perf_counter()
+        ranks.sync(conn)
+        print(f"refresh after {options.updates} GPA updates: {(time.perf_counter() - start) * 1000:.1f} ms")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
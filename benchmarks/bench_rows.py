@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Peak memory of the grades listing per 100k rows by row representation.
+
+Fetches the grades page query (``queries.GRADE_COLUMNS``) as plain tuples,
+sqlite3.Row, dicts and ``models.Grade`` with ``fetchall()``, and once more
+streamed through ``models.iter_rows()``. Peak is measured with tracemalloc
+and scaled to 100k rows.
+
+    python3 benchmarks/bench_rows.py --rows 100000
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import build_db  # noqa: E402
+import models  # noqa: E402
+import queries  # noqa: E402
+
+
+def dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+VARIANTS = (
+    ("tuple", None, False),
+    ("sqlite3.Row", sqlite3.Row, False),
+    ("dict", dict_row, False),
+    ("models.Grade", models.grade_row, False),
+    ("Grade, iter_rows", models.grade_row, True),
+)
+
+
+def measure(path, factory, streamed):
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    cursor.row_factory = factory
+    tracemalloc.start()
+    start = time.perf_counter()
+    cursor.execute(queries.GRADE_COLUMNS)
+    if streamed:
+        count = 0
+        credits = 0
+        for grade in models.iter_rows(cursor):
+            count += 1
+            credits += grade.credits
+    else:
+        rows = cursor.fetchall()
+        count = len(rows)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    conn.close()
+    return count, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_db(path, students=options.rows // 8, grades_per_student=8)
+        print(f"{'rows as':>18} {'peak MB/100k':>13} {'seconds':>8}")
+        for label, factory, streamed in VARIANTS:
+            count, peak, elapsed = measure(path, factory, streamed)
+            print(f"{label:>18} {peak / 1e6 * 100000 / count:>13.1f} {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Throughput of serve.py as the number of worker processes grows.
+
+Starts serve.py with 1, 2, 4 ... up to the core count, drives it with
+concurrent keep-alive-free HTTP clients and prints requests/second.
+
+    python3 benchmarks/bench_serving.py --requests 2000 --clients 32 --path /grades
+"""
+
+import argparse
+import http.client
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_until_up(port, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/")
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+def fetch(port, path):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.request("GET", path)
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    return response.status
+
+
+def run(workers, options, cwd):
+    port = options.port
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "serve.py"), "--workers", str(workers),
+         "--threads", str(options.threads), "--port", str(port), "--max-requests", "0"],
+        cwd=cwd, env=dict(os.environ, PYTHONPATH=ROOT),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up(port)
+        with ThreadPoolExecutor(options.clients) as pool:
+            list(pool.map(lambda _: fetch(port, options.path), range(options.clients)))  # warm up
+            start = time.perf_counter()
+            statuses = list(pool.map(lambda _: fetch(port, options.path), range(options.requests)))
+            elapsed = time.perf_counter() - start
+        errors = sum(1 for s in statuses if s != 200)
+        return options.requests / elapsed, errors
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--path", default="/grades")
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    options = parser.parse_args()
+
+    counts = []
+    n = 1
+    while n <= options.max_workers:
+        counts.append(n)
+        n *= 2
+    if counts[-1] != options.max_workers:
+        counts.append(options.max_workers)
+
+    with tempfile.TemporaryDirectory() as cwd:
+        print(f"{'workers':>8} {'req/s':>10} {'speedup':>8} {'errors':>7}")
+        baseline = None
+        for workers in counts:
+            rate, errors = run(workers, options, cwd)
+            baseline = baseline or rate
+            print(f"{workers:>8} {rate:>10.1f} {rate / baseline:>7.2f}x {errors:>7}")
+
+
+if __name__ == "__main__":
+    main()
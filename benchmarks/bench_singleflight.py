@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Bursts of identical /grades requests with and without single-flight.
+
+Builds a synthetic students.db, brings it up to the app's schema, then
+fires ``--burst`` threads at once, all asking for the same filtered grades
+page, and waits for them all: first each running ``fetch_grades_page_data``
+and ``build_grades_page_html`` itself (what every request used to do),
+then through ``render_grades_listing``, where one request renders and the
+rest share its page. Reports the wall time of a burst and how many
+renders it cost:
+
+    python3 benchmarks/bench_singleflight.py --students 20000 --burst 16
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import SEMESTERS, build_db  # noqa: E402
+
+FILTERS = ("", "alg", SEMESTERS[-1])
+
+
+def burst(render, size):
+    barrier = threading.Barrier(size)
+    pages = [None] * size
+
+    def request(index):
+        barrier.wait()
+        pages[index] = render()
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(size)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    assert len(set(pages)) == 1
+    return elapsed * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--grades-per-student", type=int, default=8)
+    parser.add_argument("--burst", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=5)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        build_db("students.db", options.students, options.grades_per_student)
+        import terrible_server
+        import grades_page
+        terrible_server.check_schema()
+        grades_page.GRADE_PAGES.max_bytes = 0     # measure rendering, not the page cache
+        leaders = grades_page.singleflight.SINGLEFLIGHT_REQUESTS
+
+        def each():
+            data = grades_page.fetch_grades_page_data(*FILTERS)
+            return grades_page.build_grades_page_html(*data, *FILTERS)
+
+        def shared():
+            return grades_page.render_grades_listing(*FILTERS)
+
+        print(f"bursts of {options.burst} identical requests, {options.rounds} rounds")
+        print(f"{'mode':>14} {'ms/burst':>9} {'renders/burst':>14}")
+        for label, render in (("each request", each), ("single-flight", shared)):
+            before = leaders.value(("grades", "leader"))
+            render()    # warm the row cache
+            elapsed = min(burst(render, options.burst) for _ in range(options.rounds))
+            renders = (options.burst if render is each
+                       else (leaders.value(("grades", "leader")) - before - 1) / options.rounds)
+            print(f"{label:>14} {elapsed:>9.1f} {renders:>14.1f}")
+        os.chdir(ROOT)
+
+
+if __name__ == "__main__":
+    main()
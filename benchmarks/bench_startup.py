@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Cold-start time of the app: how long ``import terrible_server`` takes and
+how long until /readyz reports ready, with and without an existing database.
+
+    python3 benchmarks/bench_startup.py --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+import terrible_server
+t1 = time.perf_counter()
+client = terrible_server.app.test_client()
+while client.get('/readyz').status_code != 200:
+    time.sleep(0.001)
+t2 = time.perf_counter()
+client.get('/grades')
+t3 = time.perf_counter()
+print(json.dumps({'import': t1 - t0, 'ready': t2 - t0, 'first_grades': t3 - t2}))
+"""
+
+
+def probe(cwd):
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=cwd, capture_output=True, text=True,
+                         env=dict(os.environ, PYTHONPATH=ROOT), check=True).stdout
+    return json.loads(out)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    options = parser.parse_args()
+
+    print(f"{'scenario':<12} {'import ms':>10} {'ready ms':>10} {'1st /grades ms':>15}")
+    for scenario in ("fresh-db", "existing-db"):
+        samples = []
+        with tempfile.TemporaryDirectory() as cwd:
+            for _ in range(options.runs):
+                if scenario == "fresh-db" and os.path.exists(os.path.join(cwd, "students.db")):
+                    os.remove(os.path.join(cwd, "students.db"))
+                samples.append(probe(cwd))
+        med = {key: statistics.median(s[key] for s in samples) * 1000 for key in samples[0]}
+        print(f"{scenario:<12} {med['import']:>10.1f} {med['ready']:>10.1f} {med['first_grades']:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
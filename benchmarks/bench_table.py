@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Listing table rendering cost with and without the virtual table.
+
+Server side: builds the grades page from synthetic rows with every row
+rendered as a ``<tr>`` and in virtual mode (rows left to the script), and
+reports page size, ``<tr>`` count and build time.
+
+Client side, without a browser: runs the page's own ``VirtualTable``,
+``gradeRowHtml`` and ``escapeHtml`` under node against a stub table body,
+and times the initial render, a sort, and scrolling through the table one
+screen at a time, against rendering every row - the least a full table
+costs before the browser even lays it out. Skipped when ``node`` is not on
+PATH.
+
+    python3 benchmarks/bench_table.py --students 5000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import build_db  # noqa: E402
+import grades_page  # noqa: E402
+import models  # noqa: E402
+import queries  # noqa: E402
+import virtual_table  # noqa: E402
+
+HARNESS = """
+var window = {
+    innerHeight: 900,
+    addEventListener: function() {},
+    requestAnimationFrame: function(callback) { callback(); }
+};
+var scrollTop = 0;
+var domRows = 0;
+var tbody = {
+    parentNode: {querySelectorAll: function() { return {length: 8}; }},
+    rows: [],
+    getBoundingClientRect: function() { return {top: 400 - scrollTop}; },
+    set innerHTML(html) { domRows = html.split('<tr').length - 1; }
+};
+var selectedGrades = new Set();
+%(functions)s
+var records = %(records)s;
+var columns = [{key: 'id', numeric: true}, {key: 'studentName'}, {key: 'course'}, {key: 'grade'},
+               {key: 'semester'}, {key: 'credits', numeric: true}];
+
+function timed(work) {
+    var start = process.hrtime.bigint();
+    work();
+    return Number(process.hrtime.bigint() - start) / 1e6;
+}
+
+var table = new VirtualTable(tbody, columns, gradeRowHtml, '');
+var result = {};
+result.initial = timed(function() { table.setData(records); });
+result.windowRows = domRows;
+result.sortNumeric = timed(function() { table.sortBy(5); });
+result.sortText = timed(function() { table.sortBy(1); });
+var steps = 0;
+result.scroll = timed(function() {
+    for (scrollTop = 0; scrollTop < records.length * table.rowHeight; scrollTop += window.innerHeight) {
+        table.render(false);
+        steps++;
+    }
+}) / steps;
+result.full = timed(function() {
+    var html = [];
+    for (var i = 0; i < records.length; i++) {
+        html.push(gradeRowHtml(records[i]));
+    }
+    tbody.innerHTML = html.join('');
+});
+result.fullRows = domRows;
+console.log(JSON.stringify(result));
+"""
+
+
+def page_functions(html):
+    """The row template and escaping helper exactly as the page ships them."""
+    def cut(start, end):
+        return html[html.index(start):html.index(end, html.index(start))]
+    return (virtual_table.SCRIPT
+            + cut("function gradeRowHtml", "var gradesTable")
+            + cut("function escapeHtml", "function matchesFilters"))
+
+
+def build(grades, virtual_rows):
+    virtual_table.VIRTUAL_ROWS = virtual_rows
+    grades_page.GRADE_ROWS.invalidate()
+    grades_page.build_grades_page_html(grades, {}, 0, [], "", "", "")   # warm the row cache
+    start = time.perf_counter()
+    html = grades_page.build_grades_page_html(grades, {}, 0, [], "", "", "")
+    return html, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--grades-per-student", type=int, default=4)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_db(path, options.students, options.grades_per_student)
+        conn = sqlite3.connect(path)
+        cursor = conn.cursor()
+        cursor.row_factory = models.grade_row
+        grades = cursor.execute(queries.GRADE_COLUMNS).fetchall()
+        conn.close()
+
+    print(f"{len(grades)} grades")
+    print(f"{'server page':>14} {'KB':>8} {'<tr>':>7} {'build ms':>9}")
+    for label, limit in (("all rows", len(grades)), ("virtual", 0)):
+        html, elapsed = build(grades, limit)
+        print(f"{label:>14} {len(html.encode()) / 1024:>8.0f} {html.count('<tr'):>7} {elapsed:>9.1f}")
+
+    node = shutil.which("node")
+    if not node:
+        print("node not found; skipping the client-side timings")
+        return
+    records = [{"id": g.id, "studentId": g.student_id, "studentName": g.student_name,
+                "course": g.course, "grade": g.grade, "semester": g.semester,
+                "credits": g.credits} for g in grades]
+    script = HARNESS % {"functions": page_functions(html), "records": json.dumps(records)}
+    with tempfile.NamedTemporaryFile("w", suffix=".js", delete=False) as handle:
+        handle.write(script)
+    try:
+        output = subprocess.run([node, handle.name], capture_output=True, text=True, check=True).stdout
+    finally:
+        os.unlink(handle.name)
+    result = json.loads(output)
+    print(f"{'client':>14} {'ms':>8} {'rows in DOM':>12}")
+    print(f"{'full table':>14} {result['full']:>8.1f} {result['fullRows']:>12}")
+    print(f"{'virtual load':>14} {result['initial']:>8.1f} {result['windowRows']:>12}")
+    print(f"{'sort credits':>14} {result['sortNumeric']:>8.1f}")
+    print(f"{'sort name':>14} {result['sortText']:>8.1f}")
+    print(f"{'scroll/screen':>14} {result['scroll']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Transcript generation throughput: 100k students rendered into a zip with
+1 worker process and with every core.
+
+    python3 benchmarks/bench_transcripts.py --students 100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import build_db  # noqa: E402
+import transcripts  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=100000)
+    parser.add_argument("--grades-per-student", type=int, default=8)
+    parser.add_argument("--chunk-size", type=int, default=transcripts.CHUNK_SIZE)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        build_db(db_path, options.students, options.grades_per_student)
+        print(f"{'workers':>8} {'seconds':>9} {'transcripts/s':>14} {'zip MB':>8}")
+        for workers in sorted({1, os.cpu_count() or 1}):
+            out = os.path.join(tmp, f"transcripts-{workers}.zip")
+            start = time.perf_counter()
+            count = transcripts.generate_transcripts(out, "all", db_path=db_path, workers=workers,
+                                                     chunk_size=options.chunk_size)
+            elapsed = time.perf_counter() - start
+            print(f"{workers:>8} {elapsed:>9.2f} {count / elapsed:>14.0f} {os.path.getsize(out) / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
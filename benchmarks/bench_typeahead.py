@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Student typeahead latency: the in-memory prefix index against a LIKE scan.
+
+Builds a synthetic database, loads its students into a
+``typeahead.PrefixIndex`` and times the same lookups through the index and
+through ``name LIKE '%q%' LIMIT n``, the query the picker would otherwise
+need:
+
+    python3 benchmarks/bench_typeahead.py --students 100000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import FIRST, LAST, build_db  # noqa: E402
+import typeahead  # noqa: E402
+
+
+def queries(count, seed=7):
+    rng = random.Random(seed)
+    words = FIRST + LAST
+    return [rng.choice(words)[:rng.randint(1, 4)] for _ in range(count)]
+
+
+def per_lookup(lookup, terms):
+    start = time.perf_counter()
+    for term in terms:
+        lookup(term)
+    return (time.perf_counter() - start) / len(terms) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=typeahead.TYPEAHEAD_LIMIT)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_db(path, options.students, grades_per_student=0)
+        conn = sqlite3.connect(path)
+        rows = conn.execute("SELECT id, name FROM students").fetchall()
+        names = dict(rows)
+
+        start = time.perf_counter()
+        index = typeahead.PrefixIndex(rows)
+        build = time.perf_counter() - start
+
+        terms = queries(options.lookups)
+        indexed = per_lookup(
+            lambda term: typeahead._top(index, term, names.get, options.limit), terms)
+        scanned = per_lookup(
+            lambda term: conn.execute("SELECT id, name FROM students WHERE name LIKE ? LIMIT ?",
+                                      (f"%{term}%", options.limit)).fetchall(), terms)
+        conn.close()
+
+    print(f"index build: {build * 1000:.0f} ms for {len(rows)} students")
+    print(f"{'lookup':>8} {'us/lookup':>10}")
+    print(f"{'index':>8} {indexed:>10.1f}")
+    print(f"{'LIKE':>8} {scanned:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
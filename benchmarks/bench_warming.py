@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+First-request latency after a write, with and without cache warming.
+
+Builds a synthetic students.db and brings it up to the app's schema, then
+plays some traffic so ``warming`` learns which grade filters are popular.
+Each round inserts a grade, which moves the change version on and so
+retires every cached page, and times the first request for the unfiltered
+pages and for the most popular filter: cold, then after ``warming.warm()``
+has run (as it does in the background ``WARM_DELAY`` after a write):
+
+    python3 benchmarks/bench_warming.py --students 20000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import COURSES, SEMESTERS, build_db  # noqa: E402
+
+POPULAR = ("", "alg", SEMESTERS[-1])
+
+
+def timed(work):
+    start = time.perf_counter()
+    work()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--grades-per-student", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=3)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        build_db("students.db", options.students, options.grades_per_student)
+        import db
+        import grades_page
+        import student_page
+        import terrible_server
+        import warming
+        terrible_server.check_schema()
+        warming.WARM_DELAY = -1     # warm explicitly below
+
+        # Traffic: one filter is far more popular than the rest
+        for _ in range(20):
+            grades_page.render_grades_listing(*POPULAR)
+        for course in COURSES[:10]:
+            grades_page.render_grades_listing("", course, "")
+
+        def write():
+            db.write(lambda conn: conn.execute(
+                "INSERT INTO grades (student_id, course, grade, semester, credits) VALUES (1, ?, 'A', ?, 3)",
+                (COURSES[0], SEMESTERS[-1])))
+
+        requests = (
+            ("/students", lambda: student_page.render_student_listing("", "")),
+            ("/grades", lambda: grades_page.render_grades_listing("", "", "")),
+            ("/grades popular", lambda: grades_page.render_grades_listing(*POPULAR)),
+        )
+        cold = {label: [] for label, _ in requests}
+        warm = {label: [] for label, _ in requests}
+        runs = []
+        for _ in range(options.rounds):
+            write()
+            for label, request in requests:
+                cold[label].append(timed(request))
+            write()
+            runs.append(timed(warming.warm))
+            for label, request in requests:
+                warm[label].append(timed(request))
+
+        print(f"first request after a write, best of {options.rounds}")
+        print(f"{'request':>16} {'cold ms':>8} {'warmed ms':>10}")
+        for label, _ in requests:
+            print(f"{label:>16} {min(cold[label]):>8.1f} {min(warm[label]):>10.2f}")
+        print(f"warming run: {min(runs):.0f} ms in the background")
+        os.chdir(ROOT)
+
+
+if __name__ == "__main__":
+    main()
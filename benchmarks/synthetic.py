@@ -0,0 +1,42 @@
+"""
+Synthetic students.db builder shared by the benchmarks.
+
+    from synthetic import build_db
+    build_db("/tmp/bench.db", students=100_000, grades_per_student=8)
+"""
+
+import random
+import sqlite3
+
+MAJORS = ["Computer Science", "Mathematics", "Physics", "Engineering", "Biology",
+          "Film Studies", "Music", "Theater", "Chemistry", "History", "Economics", "Philosophy"]
+GRADES = ['A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'C-', 'D', 'F']
+SEMESTERS = [f"{term} {year}" for year in range(2018, 2026) for term in ("Spring", "Fall")]
+COURSES = [f"{subject} {level}" for subject in
+           ("Algorithms", "Calculus", "Mechanics", "Circuits", "Genetics", "Cinema", "Harmony",
+            "Drama", "Organic Chemistry", "World History", "Microeconomics", "Ethics")
+           for level in range(101, 131)]
+FIRST = ["Alice", "Bob", "Charlie", "Diana", "Edward", "Fiona", "George", "Hannah", "Ian", "Julia"]
+LAST = ["Johnson", "Smith", "Brown", "Prince", "Norton", "Apple", "Lucas", "Montana", "McKellen", "Roberts"]
+
+
+def build_db(path, students=10000, grades_per_student=8, seed=42):
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute("DROP TABLE IF EXISTS students")
+    conn.execute("DROP TABLE IF EXISTS grades")
+    conn.execute("CREATE TABLE students (id INTEGER PRIMARY KEY, name TEXT, email TEXT,"
+                 " age INTEGER, major TEXT, gpa REAL)")
+    conn.execute("CREATE TABLE grades (id INTEGER PRIMARY KEY, student_id INTEGER, course TEXT,"
+                 " grade TEXT, semester TEXT, credits INTEGER)")
+    conn.executemany(
+        "INSERT INTO students VALUES (?, ?, ?, ?, ?, ?)",
+        ((i, f"{rng.choice(FIRST)} {rng.choice(LAST)} {i}", f"student{i}@email.com",
+          rng.randint(17, 30), rng.choice(MAJORS), round(rng.uniform(1.5, 4.0), 2))
+         for i in range(1, students + 1)))
+    conn.executemany(
+        "INSERT INTO grades (student_id, course, grade, semester, credits) VALUES (?, ?, ?, ?, ?)",
+        ((i, rng.choice(COURSES), rng.choice(GRADES), rng.choice(SEMESTERS), rng.randint(1, 6))
+         for i in range(1, students + 1) for _ in range(grades_per_student)))
+    conn.commit()
+    conn.close()
@@ -0,0 +1,120 @@
+"""
+CHANGES - versioned change log for delta sync.
+
+Triggers on ``students`` and ``grades`` append every insert, update and
+delete to ``change_log``, whose INTEGER PRIMARY KEY is a monotonically
+increasing change version. Clients keep a local copy of the data and ask
+for everything after the version they last saw:
+
+    GET /changes?since=0      full snapshot plus the current version
+    GET /changes?since=1234   rows inserted/updated and ids deleted since 1234
+
+Updated rows are returned with the inserted ones (they replace the client's
+copy). Several changes to the same row collapse to its final state. If
+``since`` is older than the retained log, a full snapshot is returned with
+``"reset": true``; so is a ``since`` newer than the log itself, which
+means the database was rebuilt.
+"""
+
+import json
+
+CHANGE_LIMIT = 5000
+
+COLUMNS = {
+    'students': ('id', 'name', 'email', 'age', 'major', 'gpa'),
+    'grades': ('id', 'student_id', 'course', 'grade', 'semester', 'credits'),
+}
+
+
+def _json_row(prefix, columns):
+    return "json_object(" + ", ".join(f"'{c}', {prefix}.{c}" for c in columns) + ")"
+
+
+def ensure_schema(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS change_log (
+        version INTEGER PRIMARY KEY AUTOINCREMENT,
+        table_name TEXT NOT NULL,
+        row_id INTEGER NOT NULL,
+        op TEXT NOT NULL,
+        row TEXT
+    )''')
+    for table, columns in COLUMNS.items():
+        conn.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_log_insert AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO change_log (table_name, row_id, op, row)
+                VALUES ('{table}', NEW.id, 'insert', {_json_row('NEW', columns)});
+            END''')
+        conn.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_log_update AFTER UPDATE ON {table}
+            BEGIN
+                INSERT INTO change_log (table_name, row_id, op, row)
+                VALUES ('{table}', NEW.id, 'update', {_json_row('NEW', columns)});
+            END''')
+        conn.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_log_delete AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO change_log (table_name, row_id, op, row)
+                VALUES ('{table}', OLD.id, 'delete', NULL);
+            END''')
+
+
+def current_version(conn):
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'").fetchone()
+    return row[0] if row else 0
+
+
+def prune(conn, keep=100000):
+    """Drop all but the newest ``keep`` log entries; older clients get a reset."""
+    conn.execute("DELETE FROM change_log WHERE version <= ?", (current_version(conn) - keep,))
+
+
+def snapshot(conn, tables=None):
+    version = current_version(conn)
+    result = {'version': version, 'reset': True, 'more': False}
+    for table in tables or COLUMNS:
+        columns = COLUMNS[table]
+        rows = conn.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id").fetchall()
+        result[table] = {'inserted': [dict(zip(columns, row)) for row in rows], 'deleted': []}
+    return result
+
+
+def changes_since(conn, since, limit=CHANGE_LIMIT, tables=None):
+    """Return the collapsed changes after version ``since`` (at most ``limit`` log entries).
+
+    When ``more`` is true the client should call again with the returned
+    ``version`` to fetch the rest. ``tables`` restricts the result to some
+    of the logged tables.
+    """
+    tables = tuple(tables or COLUMNS)
+    # At least one entry, or a caller with more to fetch could never move on
+    limit = max(limit, 1)
+    # Read before the entries: everything up to here is then in the result
+    current = current_version(conn)
+    oldest = conn.execute("SELECT MIN(version) FROM change_log").fetchone()[0]
+    if since <= 0 or since > current or (oldest is not None and since < oldest - 1):
+        # Never synced, synced against a rebuilt database, or the entries it needs were pruned
+        return snapshot(conn, tables)
+
+    entries = conn.execute(
+        "SELECT version, table_name, row_id, op, row FROM change_log WHERE version > ?"
+        f" AND table_name IN ({','.join('?' * len(tables))}) ORDER BY version LIMIT ?",
+        (since, *tables, limit + 1)).fetchall()
+    more = len(entries) > limit
+    entries = entries[:limit]
+
+    latest = {}
+    for version, table, row_id, op, row in entries:
+        latest[(table, row_id)] = (op, row)
+
+    if more:
+        version = entries[-1][0]
+    else:
+        # Skip past entries of other tables too, so the caller does not re-scan them
+        version = max(current, entries[-1][0] if entries else since)
+    result = {'version': version, 'reset': False, 'more': more}
+    for table in tables:
+        result[table] = {'inserted': [], 'deleted': []}
+    for (table, row_id), (op, row) in latest.items():
+        if op == 'delete':
+            result[table]['deleted'].append(row_id)
+        else:
+            result[table]['inserted'].append(json.loads(row))
+    return result
@@ -0,0 +1,219 @@
+"""
+DB - shared SQLite connection helper.
+
+All page modules open their connections through ``connect()`` so that every
+statement they run is counted and timed for the ``/metrics`` endpoint.
+
+Connections come from a small per-process pool: ``conn.close()`` rolls back
+anything uncommitted and hands the connection back instead of closing it.
+The pool remembers the pid that created it, so a forked worker never reuses
+a connection inherited from its parent. Every connection enforces foreign
+keys, so deleting a student cascades to its grades.
+
+Writers go through ``write()``: it opens the transaction with ``BEGIN
+IMMEDIATE`` so two writers never both hold a read lock and then deadlock
+upgrading it, waits up to ``BUSY_TIMEOUT`` for the lock, and retries the
+whole transaction with jittered exponential backoff if it still finds the
+database locked.
+
+Listing queries run under a time budget through ``fetch_within()``: a
+progress handler interrupts the statement once the budget is spent and the
+rows read so far come back as ``TruncatedRows``, so one slow ``LIKE``
+filter cannot pin a worker.
+"""
+
+import os
+import random
+import sqlite3
+import threading
+import time
+
+import metrics
+
+DB_PATH = "students.db"
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "8"))
+# Prepared statements kept per connection; the page queries use a fixed set
+# of parameterized shapes (see queries.py), so they stay cached
+STATEMENT_CACHE_SIZE = int(os.environ.get("DB_STATEMENT_CACHE", "128"))
+# Seconds a statement waits on another connection's lock before failing
+BUSY_TIMEOUT = float(os.environ.get("DB_BUSY_TIMEOUT", "5"))
+# Extra attempts write() makes after the busy timeout runs out
+WRITE_RETRIES = int(os.environ.get("DB_WRITE_RETRIES", "3"))
+RETRY_BASE_DELAY = 0.05
+RETRY_MAX_DELAY = 1.0
+# SQLite VM instructions between budget checks in fetch_within()
+PROGRESS_STEPS = 10000
+
+_pool = []
+_pool_pid = os.getpid()
+_pool_lock = threading.Lock()
+_inherited = []
+
+
+def _operation(sql):
+    head = sql.lstrip().split(None, 1)
+    return head[0].upper() if head else "UNKNOWN"
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that records statement counts and durations."""
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            op = _operation(sql)
+            metrics.DB_QUERIES.inc((op,))
+            metrics.DB_QUERY_LATENCY.observe(time.perf_counter() - start, (op,))
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            op = _operation(sql)
+            metrics.DB_QUERIES.inc((op,))
+            metrics.DB_QUERY_LATENCY.observe(time.perf_counter() - start, (op,))
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors (including ``conn.execute``) are instrumented."""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+class PooledConnection(InstrumentedConnection):
+    """Connection that returns itself to the pool on ``close()``."""
+
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+        with _pool_lock:
+            if _pool_pid == os.getpid() and len(_pool) < POOL_SIZE:
+                _pool.append(self)
+                return
+        super().close()
+
+    def really_close(self):
+        super().close()
+
+
+def reset_pool():
+    """Forget every pooled connection; call in a freshly forked worker."""
+    global _pool, _pool_pid
+    with _pool_lock:
+        # Inherited handles must not be used or even closed by the child,
+        # so keep them referenced instead of letting the GC close them
+        _inherited.extend(_pool)
+        _pool = []
+        _pool_pid = os.getpid()
+
+
+def connect(path=None):
+    if path is None:
+        with _pool_lock:
+            if _pool_pid == os.getpid() and _pool:
+                return _pool.pop()
+        if _pool_pid != os.getpid():
+            reset_pool()
+        # Pooled connections migrate between request threads, one at a time
+        conn = sqlite3.connect(DB_PATH, factory=PooledConnection, check_same_thread=False,
+                               timeout=BUSY_TIMEOUT, cached_statements=STATEMENT_CACHE_SIZE)
+    else:
+        conn = sqlite3.connect(path, factory=InstrumentedConnection, timeout=BUSY_TIMEOUT,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+    # Off by default in SQLite and per connection, so set it on every one
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+def is_locked(error):
+    """True for the OperationalError SQLite raises when the busy timeout ran out."""
+    return isinstance(error, sqlite3.OperationalError) and "locked" in str(error)
+
+
+def write(work, conn=None):
+    """Run ``work(conn)`` in a write transaction and commit; returns its result.
+
+    The transaction starts with ``BEGIN IMMEDIATE``, so the write lock is
+    taken up front. If the database stays locked past the busy timeout the
+    transaction is rolled back and ``work`` runs again, up to
+    ``WRITE_RETRIES`` more times - so ``work`` must only touch the database
+    and its own locals. The last locked error is re-raised (see
+    ``is_locked()``). Uses a pooled connection unless ``conn`` is given.
+    """
+    own = conn is None
+    if own:
+        conn = connect()
+    try:
+        for attempt in range(WRITE_RETRIES + 1):
+            try:
+                start = time.perf_counter()
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                finally:
+                    metrics.DB_LOCK_WAIT.observe(time.perf_counter() - start)
+                result = work(conn)
+                conn.commit()
+                return result
+            except sqlite3.OperationalError as e:
+                if conn.in_transaction:
+                    conn.rollback()
+                if not is_locked(e):
+                    raise
+                if attempt == WRITE_RETRIES:
+                    metrics.DB_WRITE_FAILURES.inc()
+                    raise
+                metrics.DB_WRITE_RETRIES.inc()
+                delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt)
+                time.sleep(delay * random.uniform(0.5, 1.0))
+            except BaseException:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+    finally:
+        if own:
+            conn.close()
+
+
+class TruncatedRows(list):
+    """The rows a budgeted query returned before it was interrupted."""
+
+    def __init__(self, rows, budget):
+        super().__init__(rows)
+        self.budget = budget
+
+
+def fetch_within(cursor, sql, params, budget, route):
+    """Run a SELECT on ``cursor`` and return its rows, spending at most ``budget`` seconds.
+
+    A query still running when the budget is spent is interrupted and the
+    rows read until then are returned as ``TruncatedRows``; the interruption
+    is counted per ``route``. A budget of 0 or less disables the limit.
+    """
+    if budget <= 0:
+        return cursor.execute(sql, params).fetchall()
+    conn = cursor.connection
+    deadline = time.perf_counter() + budget
+    rows = []
+    conn.set_progress_handler(lambda: time.perf_counter() > deadline, PROGRESS_STEPS)
+    try:
+        # Row by row, so the rows read before an interrupt are kept
+        for row in cursor.execute(sql, params):
+            rows.append(row)
+    except sqlite3.OperationalError as e:
+        if "interrupted" not in str(e):
+            raise
+        metrics.DB_QUERY_BUDGET_EXCEEDED.inc((route,))
+        return TruncatedRows(rows, budget)
+    finally:
+        conn.set_progress_handler(None, 0)
+    return rows
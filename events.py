@@ -0,0 +1,181 @@
+"""
+EVENTS - server-sent events fan-out for live page updates.
+
+The create/delete paths ``publish()`` a small change event (the new row or
+the removed id). Every open page holds one ``/events`` stream and applies
+the delta in place, instead of polling or reloading the whole page.
+
+Each subscriber gets a bounded buffer; a client too slow to drain it is
+sent a single ``resync`` event (reload the page) rather than letting its
+buffer grow. ``SSE_MAX_CLIENTS`` caps streams per process and idle streams
+get a comment heartbeat every ``SSE_HEARTBEAT`` seconds so proxies keep
+them open. Thread-based servers spend a thread per stream, so those are
+further capped by ``SSE_MAX_THREAD_CLIENTS`` (serve.py sizes it to its
+thread pool) and ended by ``close_all()`` when the worker shuts down; the
+asyncio variant used by async_app.py costs only a queue per client.
+"""
+
+import asyncio
+import collections
+import json
+import os
+import threading
+
+import metrics
+
+SSE_MAX_CLIENTS = int(os.environ.get("SSE_MAX_CLIENTS", "1000"))
+SSE_HEARTBEAT = float(os.environ.get("SSE_HEARTBEAT", "15"))
+SSE_BUFFER = int(os.environ.get("SSE_BUFFER", "256"))
+SSE_MAX_THREAD_CLIENTS = int(os.environ.get("SSE_MAX_THREAD_CLIENTS", "16"))
+SSE_RETRY_MS = 3000
+
+EVENTS_PUBLISHED = metrics.Counter("sse_events_published_total", "Change events published.", ("event",))
+SSE_REJECTED = metrics.Counter("sse_connections_rejected_total", "SSE connections refused at the limit.")
+SSE_CLIENTS = metrics.Gauge("sse_clients", "Open server-sent event streams.")
+
+_subscribers = set()
+_thread_subscribers = 0
+_lock = threading.Lock()
+
+RESYNC = "event: resync\ndata: {}\n\n"
+HEARTBEAT = ": ping\n\n"
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class Subscription:
+    """Bounded per-client buffer for thread-based streaming responses."""
+
+    def __init__(self):
+        self._buffer = collections.deque()
+        self._cond = threading.Condition()
+        self.overflowed = False
+        self.closed = False
+
+    def close(self):
+        """End the stream at its next wake-up."""
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+
+    def deliver(self, message):
+        with self._cond:
+            if len(self._buffer) >= SSE_BUFFER:
+                self.overflowed = True
+            else:
+                self._buffer.append(message)
+            self._cond.notify()
+
+    def next_message(self, timeout):
+        """Return the next message, ``RESYNC`` after an overflow, or None on timeout."""
+        with self._cond:
+            if not self._buffer and not self.overflowed and not self.closed:
+                self._cond.wait(timeout)
+            if self.overflowed:
+                self._buffer.clear()
+                self.overflowed = False
+                return RESYNC
+            return self._buffer.popleft() if self._buffer else None
+
+
+class AsyncSubscription:
+    """Per-client buffer for asyncio streams, fed from any thread."""
+
+    def __init__(self, loop):
+        self._loop = loop
+        self._queue = asyncio.Queue(SSE_BUFFER)
+        self.overflowed = False
+
+    def _put(self, message):
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    def deliver(self, message):
+        self._loop.call_soon_threadsafe(self._put, message)
+
+    async def next_message(self, timeout):
+        if self.overflowed:
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self.overflowed = False
+            return RESYNC
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+def subscribe(subscription):
+    global _thread_subscribers
+    threaded = isinstance(subscription, Subscription)
+    with _lock:
+        full = len(_subscribers) >= SSE_MAX_CLIENTS
+        if full or (threaded and _thread_subscribers >= SSE_MAX_THREAD_CLIENTS):
+            SSE_REJECTED.inc()
+            raise TooManySubscribers()
+        _subscribers.add(subscription)
+        if threaded:
+            _thread_subscribers += 1
+    SSE_CLIENTS.inc()
+    return subscription
+
+
+def unsubscribe(subscription):
+    global _thread_subscribers
+    with _lock:
+        if subscription not in _subscribers:
+            return
+        _subscribers.discard(subscription)
+        if isinstance(subscription, Subscription):
+            _thread_subscribers -= 1
+    SSE_CLIENTS.dec()
+
+
+def close_all():
+    """End every thread-based stream in this process, freeing their threads."""
+    with _lock:
+        targets = [s for s in _subscribers if isinstance(s, Subscription)]
+    for subscription in targets:
+        subscription.close()
+
+
+def publish(event, data):
+    """Send ``event`` with JSON ``data`` to every open stream in this process."""
+    message = format_event(event, data)
+    with _lock:
+        targets = list(_subscribers)
+    for subscription in targets:
+        subscription.deliver(message)
+    EVENTS_PUBLISHED.inc((event,))
+
+
+def stream(subscription):
+    """Generator of SSE text for a thread-based streaming response."""
+    try:
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        while True:
+            message = subscription.next_message(SSE_HEARTBEAT)
+            if subscription.closed:
+                return      # the browser reconnects, to a worker that is still up
+            yield message if message is not None else HEARTBEAT
+    finally:
+        unsubscribe(subscription)
+
+
+async def stream_async(subscription):
+    """Async generator of SSE text for the ASGI app."""
+    try:
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        while True:
+            message = await subscription.next_message(SSE_HEARTBEAT)
+            yield message if message is not None else HEARTBEAT
+    finally:
+        unsubscribe(subscription)
@@ -0,0 +1,154 @@
+"""
+FRAGMENTS - cache of rendered table rows.
+
+Listing pages used to format every ``<tr>`` (and the row's entry in the
+page's embedded JS data) on every request, though rows rarely change. A
+``FragmentCache`` keeps the rendered fragments per row id together with
+the row version they were rendered from - the row's column values - so a
+row edited by any process simply misses and is re-rendered. Pages are
+assembled by joining cached fragments.
+
+Fragments are stored UTF-8 encoded: a row containing an emoji would
+otherwise be held as a 4-bytes-per-character str. Callers join the bytes
+and decode once per page.
+
+Writes in this process also ``invalidate()`` deleted rows right away. The
+cache is bounded by ``FRAGMENT_CACHE_BYTES`` per cache; past that the
+oldest entries are dropped first.
+
+Lookups take no lock; only inserts and evictions do.
+
+``PageCache`` holds whole rendered listing pages the same way, keyed by
+their filters and the change-log version they were rendered at, so any
+write (from any process) moves readers on to fresh pages.
+"""
+
+import collections
+import os
+import sys
+import threading
+
+import metrics
+
+FRAGMENT_CACHE_BYTES = int(os.environ.get("FRAGMENT_CACHE_BYTES", str(32 * 1024 * 1024)))
+PAGE_CACHE_BYTES = int(os.environ.get("PAGE_CACHE_BYTES", str(32 * 1024 * 1024)))
+
+# Dict slot, key, and the entry and version tuples, roughly
+ENTRY_OVERHEAD = 250
+BYTES_OVERHEAD = sys.getsizeof(b"")
+
+_caches = []
+_page_caches = []
+
+
+class FragmentCache:
+    """Rendered fragments per row id, each tagged with the row version it came from.
+
+    ``render(row)`` returns a tuple of strings, handed back encoded as
+    UTF-8; rows must provide ``id`` and ``values()``.
+    """
+
+    def __init__(self, name, render, max_bytes=FRAGMENT_CACHE_BYTES):
+        self.name = name
+        self._render = render
+        self.max_bytes = max_bytes
+        self.size = 0
+        # id -> (version, fragments, size), oldest first; OrderedDict because
+        # popping the front of a plain dict leaves holes every later scan skips
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        _caches.append(self)
+
+    def render_all(self, rows):
+        """Return the encoded fragments for each row, rendering only new or changed rows."""
+        entries = self._entries
+        result = []
+        misses = 0
+        for row in rows:
+            version = row.values()
+            entry = entries.get(row.id)
+            if entry is None or entry[0] != version:
+                fragments = tuple(fragment.encode() for fragment in self._render(row))
+                self._store(row.id, version, fragments)
+                misses += 1
+            else:
+                fragments = entry[1]
+            result.append(fragments)
+        # Counted once per page rather than once per row
+        if misses:
+            metrics.CACHE_REQUESTS.inc(("fragments", "miss"), misses)
+        if len(result) > misses:
+            metrics.CACHE_REQUESTS.inc(("fragments", "hit"), len(result) - misses)
+        return result
+
+    def _store(self, row_id, version, fragments):
+        size = ENTRY_OVERHEAD + sum(len(fragment) + BYTES_OVERHEAD for fragment in fragments)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(row_id, None)
+            if old is not None:
+                self.size -= old[2]
+            self._entries[row_id] = (version, fragments, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                self.size -= self._entries.popitem(last=False)[1][2]
+
+    def invalidate(self, *row_ids):
+        """Drop the given rows, or every row when called without arguments."""
+        with self._lock:
+            if not row_ids:
+                self._entries.clear()
+                self.size = 0
+                return
+            for row_id in row_ids:
+                old = self._entries.pop(row_id, None)
+                if old is not None:
+                    self.size -= old[2]
+
+
+class PageCache:
+    """Rendered pages per (key, change version); only the newest version is kept.
+
+    The first page stored for a different version drops all the others,
+    since every reader has moved on to it. Pages are stored as given -
+    callers pass them UTF-8 encoded, like the fragments. Bounded by
+    ``max_bytes``, oldest first.
+    """
+
+    def __init__(self, name, max_bytes=PAGE_CACHE_BYTES):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.version = None
+        self.size = 0
+        self._pages = collections.OrderedDict()
+        self._lock = threading.Lock()
+        _page_caches.append(self)
+
+    def get(self, key, version):
+        page = self._pages.get((key, version))
+        metrics.record_cache(self.name, page is not None)
+        return page
+
+    def put(self, key, version, page):
+        size = sys.getsizeof(page)
+        with self._lock:
+            if version != self.version:
+                self._pages.clear()
+                self.size = 0
+                self.version = version
+            if size > self.max_bytes:
+                return
+            old = self._pages.pop((key, version), None)
+            if old is not None:
+                self.size -= sys.getsizeof(old)
+            self._pages[(key, version)] = page
+            self.size += size
+            while self.size > self.max_bytes:
+                self.size -= sys.getsizeof(self._pages.popitem(last=False)[1])
+
+
+FRAGMENT_BYTES = metrics.Gauge("fragment_cache_bytes", "Approximate size of the rendered row caches.")
+FRAGMENT_BYTES.set_function(lambda: sum(cache.size for cache in _caches))
+PAGE_BYTES = metrics.Gauge("page_cache_bytes", "Approximate size of the rendered page caches.")
+PAGE_BYTES.set_function(lambda: sum(cache.size for cache in _page_caches))
@@ -0,0 +1,166 @@
+"""
+GPA_ENGINE - credit-weighted GPA computed from the grades table.
+
+``gpa_totals`` keeps a running sum of quality points (grade points x credits)
+and credits per student. The grade write paths call ``apply_grade()`` inside
+their own transaction, so a student's GPA is updated in O(1) instead of
+re-reading all of their grades, and ``students.gpa`` always matches the
+grades table. Students who were never graded keep the GPA entered on the
+create form; once the last of a student's graded credits is deleted their
+GPA is NULL.
+
+``recompute_all()`` rebuilds every total from scratch, streaming the grades
+table in batches (vectorised with NumPy when it is installed):
+
+    python3 gpa_engine.py --recompute
+"""
+
+import argparse
+
+import models
+
+try:
+    import numpy as np
+except ImportError:  # optional, only speeds up recompute_all()
+    np = None
+
+GRADE_POINTS = {
+    'A': 4.0, 'A-': 3.7,
+    'B+': 3.3, 'B': 3.0, 'B-': 2.7,
+    'C+': 2.3, 'C': 2.0, 'C-': 1.7,
+    'D': 1.0, 'F': 0.0,
+}
+
+RECOMPUTE_BATCH_SIZE = 50000
+
+
+def ensure_schema(conn):
+    """Create ``gpa_totals`` if missing; returns True when it had to be created."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'gpa_totals'").fetchone()
+    if exists:
+        return False
+    conn.execute('''CREATE TABLE gpa_totals (
+        student_id INTEGER PRIMARY KEY,
+        quality_points REAL NOT NULL DEFAULT 0,
+        credits INTEGER NOT NULL DEFAULT 0
+    )''')
+    return True
+
+
+def _refresh_student_gpa(conn, student_id):
+    conn.execute(
+        "UPDATE students SET gpa = (SELECT CASE WHEN credits > 0 THEN ROUND(quality_points / credits, 2) END"
+        " FROM gpa_totals WHERE student_id = ?) WHERE id = ?",
+        (student_id, student_id))
+
+
+def apply_grade(conn, student_id, grade, credits, sign=1):
+    """Add (sign=1) or remove (sign=-1) one grade from the student's running totals.
+
+    Runs inside the caller's transaction; the caller commits.
+    """
+    points = GRADE_POINTS.get(grade)
+    if points is None or not credits:
+        return
+    conn.execute(
+        "INSERT INTO gpa_totals (student_id, quality_points, credits) VALUES (?, ?, ?)"
+        " ON CONFLICT(student_id) DO UPDATE SET"
+        " quality_points = quality_points + excluded.quality_points,"
+        " credits = credits + excluded.credits",
+        (student_id, sign * points * credits, sign * credits))
+    _refresh_student_gpa(conn, student_id)
+
+
+def remove_grade(conn, grade_id):
+    """Subtract an existing grade before it is deleted; returns False if it does not exist."""
+    row = conn.execute("SELECT student_id, grade, credits FROM grades WHERE id = ?",
+                       (grade_id,)).fetchone()
+    if row is None:
+        return False
+    apply_grade(conn, row[0], row[1], row[2], sign=-1)
+    return True
+
+
+def remove_student(conn, student_id):
+    conn.execute("DELETE FROM gpa_totals WHERE student_id = ?", (student_id,))
+
+
+def _accumulate_python(rows, totals):
+    for student_id, grade, credits in rows:
+        points = GRADE_POINTS.get(grade)
+        if points is None or not credits:
+            continue
+        entry = totals.get(student_id)
+        if entry is None:
+            totals[student_id] = [points * credits, credits]
+        else:
+            entry[0] += points * credits
+            entry[1] += credits
+
+
+_POINTS_LOOKUP = {grade: i for i, grade in enumerate(GRADE_POINTS)}
+
+
+def _accumulate_numpy(rows, totals):
+    student_ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    grade_idx = np.fromiter((_POINTS_LOOKUP.get(r[1], -1) for r in rows), dtype=np.int64, count=len(rows))
+    credits = np.fromiter((r[2] or 0 for r in rows), dtype=np.float64, count=len(rows))
+    valid = (grade_idx >= 0) & (credits > 0)
+    points = np.array(list(GRADE_POINTS.values()))[grade_idx[valid]]
+    ids, inverse = np.unique(student_ids[valid], return_inverse=True)
+    quality = np.bincount(inverse, weights=points * credits[valid], minlength=len(ids))
+    creds = np.bincount(inverse, weights=credits[valid], minlength=len(ids))
+    for student_id, qp, cr in zip(ids.tolist(), quality.tolist(), creds.tolist()):
+        entry = totals.get(student_id)
+        if entry is None:
+            totals[student_id] = [qp, int(cr)]
+        else:
+            entry[0] += qp
+            entry[1] += int(cr)
+
+
+def recompute_all(conn, batch_size=RECOMPUTE_BATCH_SIZE, progress=None):
+    """Rebuild ``gpa_totals`` and ``students.gpa`` from the whole grades table.
+
+    ``progress(done, total)`` is called after each batch. Runs inside the
+    caller's transaction; the caller commits.
+    """
+    ensure_schema(conn)
+    total = conn.execute("SELECT COUNT(*) FROM grades").fetchone()[0]
+    accumulate = _accumulate_numpy if np is not None else _accumulate_python
+    totals = {}
+    done = 0
+    cursor = conn.execute("SELECT student_id, grade, credits FROM grades")
+    for rows in models.iter_batches(cursor, batch_size):
+        accumulate(rows, totals)
+        done += len(rows)
+        if progress:
+            progress(done, total)
+
+    # Zero rather than drop the students left without grades: their row records
+    # that their GPA came from grades, so it goes to NULL rather than staying stale
+    conn.execute("UPDATE gpa_totals SET quality_points = 0, credits = 0")
+    conn.execute("DELETE FROM gpa_totals WHERE student_id NOT IN (SELECT id FROM students)")
+    conn.executemany("INSERT OR REPLACE INTO gpa_totals (student_id, quality_points, credits) VALUES (?, ?, ?)",
+                     ((sid, qp, cr) for sid, (qp, cr) in totals.items()))
+    conn.execute(
+        "UPDATE students SET gpa = (SELECT CASE WHEN t.credits > 0 THEN ROUND(t.quality_points / t.credits, 2) END"
+        " FROM gpa_totals t WHERE t.student_id = students.id)"
+        " WHERE id IN (SELECT student_id FROM gpa_totals)")
+    return len(totals)
+
+
+def main(argv=None):
+    import db
+    parser = argparse.ArgumentParser(description="Maintain the credit-weighted GPA totals.")
+    parser.add_argument("--recompute", action="store_true", help="rebuild every student's totals")
+    parser.add_argument("--batch-size", type=int, default=RECOMPUTE_BATCH_SIZE)
+    options = parser.parse_args(argv)
+    if options.recompute:
+        students = db.write(lambda conn: recompute_all(conn, options.batch_size))
+        print(f"Recomputed GPA for {students} students")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+GRADE_CUBE - grade counts per (course, semester, major, grade), kept on write.
+
+The grades page chart and its credit total were tallied in Python over the
+filtered rows, so every filter combination recounted from scratch.
+``grade_cube`` holds the number of grades and their credits per (course,
+semester, major, grade) cell, plus the roll-ups where any of course,
+semester and major is ``ALL`` ('*'): each grade is counted in eight cells.
+The chart for a semester and/or major filter is then the ten grade cells
+of one roll-up, and a course substring filter sums one cell per matching
+course (``distribution()``).
+
+Triggers keep the cells current for every writer, like the change log:
+grade inserts, updates and deletes adjust the cells of the grade's
+student's major, and a student's delete or change of major moves all of
+their grades at once. (Grades removed by the ``ON DELETE CASCADE`` are
+already counted out by the student's trigger; by then the student's major
+is gone.) NULL text columns are stored as ''. Cells that drop to zero are
+kept; ``rebuild()`` recounts from scratch:
+
+    python3 grade_cube.py --rebuild
+"""
+
+import argparse
+
+import queries
+
+ALL = queries.GRADE_CUBE_ALL
+
+_UPSERT = """
+                ON CONFLICT (course, semester, major, grade) DO UPDATE SET
+                    count = count + excluded.count, credits = credits + excluded.credits;"""
+
+# Joined once per rolled-up dimension: row 0 keeps the value, row 1 is ALL
+_ROLLUP = "(SELECT 0 AS rolled UNION ALL SELECT 1)"
+
+
+def _cell(dimension, value):
+    return f"CASE WHEN {dimension}.rolled THEN '{ALL}' ELSE IFNULL({value}, '') END"
+
+
+def _add_grade(row, sign):
+    # The eight cells of one grade row (NEW or OLD); no-op when its student does not exist
+    return f"""
+                INSERT INTO grade_cube (course, semester, major, grade, count, credits)
+                SELECT {_cell('c', f'{row}.course')}, {_cell('t', f'{row}.semester')}, {_cell('m', 's.major')},
+                       IFNULL({row}.grade, ''), {sign}1, {sign}IFNULL({row}.credits, 0)
+                FROM students s, {_ROLLUP} c, {_ROLLUP} t, {_ROLLUP} m
+                WHERE s.id = {row}.student_id""" + _UPSERT
+
+
+def _add_student(student, major, sign, majors=_ROLLUP):
+    # Every grade of one student, counted under ``major``
+    return f"""
+                INSERT INTO grade_cube (course, semester, major, grade, count, credits)
+                SELECT {_cell('c', 'course')}, {_cell('t', 'semester')}, {_cell('m', major)}, IFNULL(grade, ''),
+                       {sign}COUNT(*), {sign}IFNULL(SUM(credits), 0)
+                FROM grades, {_ROLLUP} c, {_ROLLUP} t, {majors} m
+                WHERE student_id = {student}.id GROUP BY 1, 2, 3, 4""" + _UPSERT
+
+
+# A change of major leaves the major = ALL cells as they are
+_MAJOR_ONLY = "(SELECT 0 AS rolled)"
+
+TRIGGERS = {
+    'grade_cube_insert': f"AFTER INSERT ON grades BEGIN {_add_grade('NEW', '+')} END",
+    'grade_cube_update': f"AFTER UPDATE ON grades BEGIN {_add_grade('OLD', '-')} {_add_grade('NEW', '+')} END",
+    'grade_cube_delete': f"AFTER DELETE ON grades BEGIN {_add_grade('OLD', '-')} END",
+    'grade_cube_student_delete':
+        f"BEFORE DELETE ON students BEGIN {_add_student('OLD', 'OLD.major', '-')} END",
+    'grade_cube_student_major':
+        "AFTER UPDATE OF major ON students WHEN OLD.major IS NOT NEW.major BEGIN"
+        f" {_add_student('OLD', 'OLD.major', '-', _MAJOR_ONLY)}"
+        f" {_add_student('NEW', 'NEW.major', '+', _MAJOR_ONLY)} END",
+}
+
+
+def ensure_schema(conn):
+    """Create the cube and its triggers if missing; returns True when the cube had to be created."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'grade_cube'").fetchone()
+    if not exists:
+        conn.execute('''CREATE TABLE grade_cube (
+            course TEXT NOT NULL,
+            semester TEXT NOT NULL,
+            major TEXT NOT NULL,
+            grade TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            credits INTEGER NOT NULL,
+            PRIMARY KEY (course, semester, major, grade)
+        ) WITHOUT ROWID''')
+        conn.execute("CREATE INDEX grade_cube_semester ON grade_cube (semester, major)")
+    # The grades table may have been rebuilt, which drops its triggers
+    for name, body in TRIGGERS.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+    return not exists
+
+
+def rebuild(conn):
+    """Recount every cell from the grades table; runs in the caller's transaction."""
+    ensure_schema(conn)
+    conn.execute("DELETE FROM grade_cube")
+    # Count the finest cells first, then roll those up
+    conn.execute(f"""
+        WITH cells AS (
+            SELECT g.course, g.semester, s.major, IFNULL(g.grade, '') AS grade,
+                   COUNT(*) AS count, IFNULL(SUM(g.credits), 0) AS credits
+            FROM grades g JOIN students s ON s.id = g.student_id
+            GROUP BY 1, 2, 3, 4)
+        INSERT INTO grade_cube (course, semester, major, grade, count, credits)
+        SELECT {_cell('c', 'course')}, {_cell('t', 'semester')}, {_cell('m', 'major')}, grade,
+               SUM(count), SUM(credits)
+        FROM cells, {_ROLLUP} c, {_ROLLUP} t, {_ROLLUP} m
+        GROUP BY 1, 2, 3, 4""")
+    return conn.execute("SELECT COUNT(*) FROM grade_cube").fetchone()[0]
+
+
+def distribution(conn, course="", semester="", major=""):
+    """Return {grade: (count, credits)} for the grades matching the filters.
+
+    ``course`` is a case-insensitive substring match like the grades page
+    filter; ``semester`` and ``major`` are exact.
+    """
+    sql, params = queries.grade_distribution(course, semester, major)
+    return {grade: (count, credits) for grade, count, credits in conn.execute(sql, params) if count}
+
+
+def tally(grades):
+    """The same {grade: (count, credits)} counted from fetched ``models.Grade`` rows."""
+    totals = {}
+    for grade in grades:
+        count, credits = totals.get(grade.grade, (0, 0))
+        totals[grade.grade] = (count + 1, credits + (grade.credits or 0))
+    return totals
+
+
+def main(argv=None):
+    import db
+    parser = argparse.ArgumentParser(description="Maintain the grade distribution cube.")
+    parser.add_argument("--rebuild", action="store_true", help="recount every cell from the grades table")
+    options = parser.parse_args(argv)
+    if options.rebuild:
+        cells = db.write(rebuild)
+        print(f"Rebuilt grade cube: {cells} cells")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,13 +16,34 @@ This file demonstrates TERRIBLE practices:
 DO NOT USE THIS CODE IN REAL PROJECTS!
 """
 
+import os
 import sqlite3
+
+import actions
+import changes
+import db
+import events
+import fragments
+import gpa_engine
+import grade_cube
+import metadata
+import models
+import profiling
+import queries
+import singleflight
+import typeahead
+import virtual_table
+import warming
 from flask import request
 
+# Seconds the grades listing query may run before the page is served truncated
+QUERY_BUDGET = float(os.environ.get("GRADES_QUERY_BUDGET", "1"))
+
 def render_grades_page():
     # ANTI-PATTERN: Handling both GET and POST in the same massive function!
     message = ""
     message_type = ""
+    result = {}
     
     # ANTI-PATTERN: Business logic mixed directly in view
     if request.method == 'POST':
@@ -38,15 +59,19 @@ def render_grades_page():
                 message_type = "error"
             else:
                 # ANTI-PATTERN: Direct database deletion without service layer
-                conn = sqlite3.connect("students.db")
-                c = conn.cursor()
+                def delete_grade(conn):
+                    # Take the grade out of the student's running GPA totals first
+                    gpa_engine.remove_grade(conn, int(delete_id))
+                    return conn.execute("DELETE FROM grades WHERE id = ?", (int(delete_id),)).rowcount
                 
                 # ANTI-PATTERN: No verification before deletion
                 try:
-                    c.execute("DELETE FROM grades WHERE id = ?", (int(delete_id),))
-                    
-                    if c.rowcount > 0:
-                        conn.commit()
+                    if db.write(delete_grade) > 0:
+                        metadata.invalidate('semesters', 'courses')
+                        warming.schedule()
+                        GRADE_ROWS.invalidate(int(delete_id))
+                        events.publish('grade_deleted', {'id': int(delete_id)})
+                        result = {'id': int(delete_id)}
                         message = "Grade deleted successfully! 🗑️"
                         message_type = "success"
                     else:
@@ -55,12 +80,14 @@ def render_grades_page():
                 except Exception as e:
                     message = f"Error deleting grade: {str(e)}"
                     message_type = "error"
-                finally:
-                    conn.close()
         else:
             # ANTI-PATTERN: Create logic
             # ANTI-PATTERN: No validation layer, just grab form data
             student_id = request.form.get('student_id', '')
+            if not student_id and request.form.get('student_name'):
+                # Typed without picking a suggestion (or without JavaScript)
+                resolved = typeahead.find_student(request.form['student_name'])
+                student_id = str(resolved) if resolved else ''
             course = request.form.get('course', '')
             grade = request.form.get('grade', '')
             semester = request.form.get('semester', '')
@@ -92,63 +119,163 @@ def render_grades_page():
                 message_type = "error"
             else:
                 # ANTI-PATTERN: Direct database manipulation in view function
-                conn = sqlite3.connect("students.db")
-                c = conn.cursor()
+                def insert_grade(conn):
+                    c = conn.cursor()
+                    c.execute("INSERT INTO grades (student_id, course, grade, semester, credits) VALUES (?, ?, ?, ?, ?)",
+                             (int(student_id), course, grade, semester, int(credits) if credits else 3))
+                    gpa_engine.apply_grade(conn, int(student_id), grade, int(credits) if credits else 3)
+                    name = conn.execute("SELECT name FROM students WHERE id = ?", (int(student_id),)).fetchone()
+                    return c.lastrowid, name
                 
-                # ANTI-PATTERN: No try-except for database errors
-                c.execute("INSERT INTO grades (student_id, course, grade, semester, credits) VALUES (?, ?, ?, ?, ?)",
-                         (int(student_id), course, grade, semester, int(credits) if credits else 3))
-                conn.commit()
-                conn.close()
+                try:
+                    grade_id, student_name = db.write(insert_grade)
+                except sqlite3.IntegrityError:
+                    # The foreign key rejects grades for a student that no longer exists
+                    return actions.action_response("Error: Student not found", "error")
+                except sqlite3.OperationalError as e:
+                    if not db.is_locked(e):
+                        raise
+                    return actions.action_response(actions.BUSY_MESSAGE, "error")
+                metadata.invalidate('semesters', 'courses')
+                warming.schedule()
+                new_grade = {
+                    'id': grade_id, 'studentId': int(student_id),
+                    'studentName': student_name[0] if student_name else '',
+                    'course': course, 'grade': grade, 'semester': semester,
+                    'credits': int(credits) if credits else 3}
+                events.publish('grade_created', new_grade)
+                result = {'grade': new_grade}
                 
                 message = "Grade added successfully! ✅"
                 message_type = "success"
+        
+        # Answer with just the change (or a redirect to the GET), not a re-rendered page
+        if message_type == "success":
+            result['stats'] = {'students': metadata.get('student_count')[0][0],
+                               'semesters': len(metadata.get('semesters'))}
+        return actions.action_response(message, message_type, **result)
+    
+    message, message_type = actions.pop_flash()
     
     # ANTI-PATTERN: Getting parameters directly in page rendering function
     student_filter = request.args.get('student', '')
     course_filter = request.args.get('course', '')
     semester_filter = request.args.get('semester', '')
     
+    # A profiled request must run the real query and render, not hit the page cache
+    if not message and not profiling.profiling_requested():
+        return render_grades_listing(student_filter, course_filter, semester_filter)
+    data = fetch_grades_page_data(student_filter, course_filter, semester_filter)
+    return build_grades_page_html(*data, student_filter, course_filter, semester_filter, message, message_type)
+
+
+LISTINGS = singleflight.Group('grades')
+GRADE_PAGES = fragments.PageCache('grade_pages')
+
+
+def render_grades_listing(student_filter, course_filter, semester_filter, record=True):
+    """The grades page for these filters as UTF-8, cached per change version.
+
+    Identical requests arriving while it renders share the render.
+    ``record=False`` (cache warming) leaves it out of the access counts.
+    """
+    filters = (student_filter, course_filter, semester_filter)
+    if record:
+        warming.record('grades', filters)
+    conn = db.connect()
+    try:
+        version = changes.current_version(conn)
+    finally:
+        conn.close()
+    page = GRADE_PAGES.get(filters, version)
+    if page is None:
+        page = LISTINGS.do((filters, version), lambda: _render_grades_listing(filters, version))
+    return page
+
+
+def _render_grades_listing(filters, version):
+    if version != GRADE_PAGES.version:
+        # Another process may have written; do not bake its stale lookups into the page
+        metadata.invalidate()
+    data = fetch_grades_page_data(*filters)
+    page = build_grades_page_html(*data, *filters).encode()
+    # A page cut short by the query budget is not kept
+    if not isinstance(data[0], db.TruncatedRows):
+        GRADE_PAGES.put(filters, version, page)
+    return page
+
+
+def fetch_grades_page_data(student_filter, course_filter, semester_filter):
+    """Run the listing and metadata queries for the grades page."""
     # ANTI-PATTERN: Multiple database connections instead of connection pooling
-    conn = sqlite3.connect("students.db")
+    conn = db.connect()
     c = conn.cursor()
     
-    # ANTI-PATTERN: Building complex queries in the view function
-    query = "SELECT g.id, g.student_id, s.name, g.course, g.grade, g.semester, g.credits FROM grades g JOIN students s ON g.student_id = s.id WHERE 1=1"
+    query, params = queries.grades(student_filter, course_filter, semester_filter)
+    c.row_factory = models.grade_row
+    grades = db.fetch_within(c, query, params, QUERY_BUDGET, 'grades')
     
+    # Chart and credit total: summed from the grade cube, unless the page is
+    # filtered by student name, which the cube does not cover
     if student_filter:
-        query += " AND s.name LIKE '%" + student_filter + "%'"
-    if course_filter:
-        query += " AND g.course LIKE '%" + course_filter + "%'"
-    if semester_filter:
-        query += " AND g.semester = '" + semester_filter + "'"
-    
-    c.execute(query)
-    grades = c.fetchall()
-    
-    # Get all students for dropdown
-    c.execute("SELECT id, name FROM students ORDER BY name")
-    all_students = c.fetchall()
-    
-    # Get all unique semesters
-    c.execute("SELECT DISTINCT semester FROM grades ORDER BY semester")
-    semesters = c.fetchall()
+        distribution = grade_cube.tally(grades)
+    else:
+        distribution = grade_cube.distribution(conn, course_filter, semester_filter)
     
-    # Get unique courses for datalist
-    c.execute("SELECT DISTINCT course FROM grades ORDER BY course")
-    courses = c.fetchall()
+    # Student count for the stats, unique semesters for the datalist; the
+    # student and course pickers are filled as the user types (typeahead.py)
+    student_count = metadata.get('student_count', conn)[0][0]
+    semesters = metadata.get('semesters', conn)
     
     conn.close()
+    return grades, distribution, student_count, semesters
+
+
+def render_grade_row(grade):
+    """Render one grade's table row and its entry in the page's JS data array."""
+    grade_class = f"grade-{grade.grade.replace('+', '-plus').replace('-', '-')}" if grade.grade else "grade-F"
+    row = f"""
+                <tr data-id="{grade.id}">
+                    <td><input type="checkbox" class="grade-checkbox" value="{grade.id}"></td>
+                    <td>{grade.id}</td>
+                    <td><strong>{grade.student_name}</strong></td>
+                    <td>{grade.course}</td>
+                    <td><span class="grade-badge {grade_class}">{grade.grade}</span></td>
+                    <td>{grade.semester}</td>
+                    <td>{grade.credits}</td>
+                    <td>
+                        <button class="btn btn-primary" style="padding: 5px 10px;" onclick="editGrade({grade.id})">✏️</button>
+                        <button class="btn btn-danger" style="padding: 5px 10px;" onclick="deleteGrade({grade.id})">🗑️</button>
+                    </td>
+                </tr>
+"""
+    # ANTI-PATTERN: No proper escaping for special characters
+    student_name = str(grade.student_name).replace('"', '\\"').replace("'", "\\'")
+    course_name = str(grade.course).replace('"', '\\"').replace("'", "\\'")
+    grade_value = str(grade.grade).replace('"', '\\"').replace("'", "\\'")
+    semester_value = str(grade.semester).replace('"', '\\"').replace("'", "\\'")
+    data = f"""            {{id: {grade.id}, studentId: {grade.student_id}, studentName: "{student_name}", course: "{course_name}", grade: "{grade_value}", semester: "{semester_value}", credits: {grade.credits}}}"""
+    return row, data
+
+
+GRADE_ROWS = fragments.FragmentCache('grades', render_grade_row)
+
+
+def build_grades_page_html(grades, distribution, student_count, semesters, student_filter, course_filter,
+                           semester_filter, message="", message_type=""):
+    """Render the grades page from already-fetched rows; does no I/O.
+
+    ``distribution`` is {grade: (count, credits)} for the chart and credit total.
+    """
+    if isinstance(grades, db.TruncatedRows) and not message:
+        message = (f"Showing the first {len(grades)} grades: the search ran past its {grades.budget:g} s"
+                   " time limit. Narrow the filters to see every match.")
+        message_type = "error"
+    total_credits = sum(credits for _, credits in distribution.values())
+    grade_counts = {g: count for g, (count, _) in distribution.items()}
     
-    # ANTI-PATTERN: Calculate statistics in Python instead of SQL
-    total_credits = sum(g[6] for g in grades)
-    grade_counts = {}
-    for grade in grades:
-        g = grade[4]
-        if g in grade_counts:
-            grade_counts[g] += 1
-        else:
-            grade_counts[g] = 1
+    # Table rows and their JS data entries, rendered once per row version
+    rendered = GRADE_ROWS.render_all(grades)
     
     # ANTI-PATTERN: Massive HTML string generation
     html = """
@@ -680,7 +807,7 @@ def render_grades_page():
     # ANTI-PATTERN: Generating conditional HTML in Python
     if message:
         html += f"""
-        <div class="message message-{message_type}">
+        <div class="message message-{message_type}" id="actionMessage">
             {message}
         </div>"""
     
@@ -689,34 +816,19 @@ def render_grades_page():
         <!-- ANTI-PATTERN: Create form mixed with everything else -->
         <div class="create-grade-form">
             <h3>➕ Add New Grade Entry</h3>
-            <form method="POST" action="/grades">
+            <form method="POST" action="/grades" id="createGradeForm">
                 <div class="form-grid">
                     <div class="form-group">
                         <label>Student *</label>
-                        <select name="student_id" required>
-                            <option value="">-- Select Student --</option>"""
-    
-    # ANTI-PATTERN: Building select options in Python
-    for student in all_students:
-        html += f"""
-                            <option value="{student[0]}">{student[1]}</option>"""
-    
-    html += """
-                        </select>
+                        <input type="text" name="student_name" placeholder="Start typing a name..." required list="student-list" autocomplete="off">
+                        <input type="hidden" name="student_id">
+                        <datalist id="student-list"></datalist>
                     </div>
                     
                     <div class="form-group">
                         <label>Course *</label>
-                        <input type="text" name="course" placeholder="e.g. Data Structures" required list="course-list">
-                        <datalist id="course-list">"""
-    
-    # ANTI-PATTERN: More options in Python
-    for course in courses:
-        html += f"""
-                            <option value="{course[0]}">"""
-    
-    html += """
-                        </datalist>
+                        <input type="text" name="course" placeholder="e.g. Data Structures" required list="course-list" autocomplete="off">
+                        <datalist id="course-list"></datalist>
                     </div>
                     
                     <div class="form-group">
@@ -762,19 +874,19 @@ def render_grades_page():
         
         <div class="stats-container">
             <div class="stat-card">
-                <h3>""" + str(len(grades)) + """</h3>
+                <h3 id="totalGrades">""" + str(len(grades)) + """</h3>
                 <p>Total Grades</p>
             </div>
             <div class="stat-card">
-                <h3>""" + str(total_credits) + """</h3>
+                <h3 id="totalCredits">""" + str(total_credits) + """</h3>
                 <p>Total Credits</p>
             </div>
             <div class="stat-card">
-                <h3>""" + str(len(all_students)) + """</h3>
+                <h3 id="totalStudents">""" + str(student_count) + """</h3>
                 <p>Students</p>
             </div>
             <div class="stat-card">
-                <h3>""" + str(len(semesters)) + """</h3>
+                <h3 id="totalSemesters">""" + str(len(semesters)) + """</h3>
                 <p>Semesters</p>
             </div>
         </div>
@@ -875,24 +987,10 @@ def render_grades_page():
                     </td>
                 </tr>
 """
+    elif len(grades) > virtual_table.VIRTUAL_ROWS:
+        html += virtual_table.placeholder(len(grades), 8, "grades")
     else:
-        for grade in grades:
-            grade_class = f"grade-{grade[4].replace('+', '-plus').replace('-', '-')}" if grade[4] else "grade-F"
-            html += f"""
-                <tr>
-                    <td><input type="checkbox" class="grade-checkbox" value="{grade[0]}"></td>
-                    <td>{grade[0]}</td>
-                    <td><strong>{grade[2]}</strong></td>
-                    <td>{grade[3]}</td>
-                    <td><span class="grade-badge {grade_class}">{grade[4]}</span></td>
-                    <td>{grade[5]}</td>
-                    <td>{grade[6]}</td>
-                    <td>
-                        <button class="btn btn-primary" style="padding: 5px 10px;" onclick="editGrade({grade[0]})">✏️</button>
-                        <button class="btn btn-danger" style="padding: 5px 10px;" onclick="deleteGrade({grade[0]})">🗑️</button>
-                    </td>
-                </tr>
-"""
+        html += b"".join(row for row, _ in rendered).decode()
     
     html += """
             </tbody>
@@ -911,56 +1009,40 @@ def render_grades_page():
 """
     
     # ANTI-PATTERN: Embedding database data in JavaScript
-    for i, grade in enumerate(grades):
-        # ANTI-PATTERN: No proper escaping for special characters
-        student_name = str(grade[2]).replace('"', '\\"').replace("'", "\\'")
-        course_name = str(grade[3]).replace('"', '\\"').replace("'", "\\'")
-        grade_value = str(grade[4]).replace('"', '\\"').replace("'", "\\'")
-        semester_value = str(grade[5]).replace('"', '\\"').replace("'", "\\'")
-        html += f"""            {{id: {grade[0]}, studentId: {grade[1]}, studentName: "{student_name}", course: "{course_name}", grade: "{grade_value}", semester: "{semester_value}", credits: {grade[6]}}}"""
-        if i < len(grades) - 1:
-            html += ",\n"
-        else:
-            html += "\n"
+    if grades:
+        html += b",\n".join(data for _, data in rendered).decode() + "\n"
     
     html += """
         ];
+""" + virtual_table.SCRIPT + """
+        var selectedGrades = new Set();
+        
+        function gradeRowHtml(grade) {
+            var gradeClass = grade.grade ? 'grade-' + grade.grade.replace('+', '-plus') : 'grade-F';
+            var checked = selectedGrades.has(grade.id) ? ' checked' : '';
+            return '<tr data-id="' + grade.id + '">' +
+                '<td><input type="checkbox" class="grade-checkbox" value="' + grade.id + '"' + checked + '></td>' +
+                '<td>' + grade.id + '</td>' +
+                '<td><strong>' + escapeHtml(grade.studentName) + '</strong></td>' +
+                '<td>' + escapeHtml(grade.course) + '</td>' +
+                '<td><span class="grade-badge ' + gradeClass + '">' + escapeHtml(grade.grade) + '</span></td>' +
+                '<td>' + escapeHtml(grade.semester) + '</td>' +
+                '<td>' + grade.credits + '</td>' +
+                '<td><button class="btn btn-primary" style="padding: 5px 10px;" onclick="editGrade(' + grade.id + ')">✏️</button> ' +
+                '<button class="btn btn-danger" style="padding: 5px 10px;" onclick="deleteGrade(' + grade.id + ')">🗑️</button></td>' +
+                '</tr>';
+        }
+        
+        var gradesTable = new VirtualTable(
+            document.querySelector('#gradesTable tbody'),
+            [{key: 'id', numeric: true}, {key: 'studentName'}, {key: 'course'}, {key: 'grade'},
+             {key: 'semester'}, {key: 'credits', numeric: true}],
+            gradeRowHtml,
+            '<tr><td colspan="8" class="no-results">📭 No grades found matching your criteria</td></tr>'
+        );
         
-        var sortDirection = 1;
-        var lastSortColumn = -1;
-        
-        // ANTI-PATTERN: Huge function without proper modularization
         function sortTableByColumn(columnIndex) {
-            var table = document.getElementById("gradesTable");
-            var tbody = table.querySelector("tbody");
-            var rows = Array.from(tbody.querySelectorAll("tr"));
-            
-            if (lastSortColumn === columnIndex) {
-                sortDirection *= -1;
-            } else {
-                sortDirection = 1;
-                lastSortColumn = columnIndex;
-            }
-            
-            rows.sort(function(a, b) {
-                var aValue = a.cells[columnIndex + 1].textContent.trim();
-                var bValue = b.cells[columnIndex + 1].textContent.trim();
-                
-                var aNum = parseFloat(aValue);
-                var bNum = parseFloat(bValue);
-                
-                if (!isNaN(aNum) && !isNaN(bNum)) {
-                    return (aNum - bNum) * sortDirection;
-                }
-                
-                return aValue.localeCompare(bValue) * sortDirection;
-            });
-            
-            tbody.innerHTML = "";
-            rows.forEach(function(row) {
-                tbody.appendChild(row);
-            });
-            
+            var sortDirection = gradesTable.sortBy(columnIndex);
             console.log("Sorted by column " + columnIndex + " in direction " + sortDirection);
         }
         
@@ -979,46 +1061,134 @@ def render_grades_page():
         function deleteGrade(gradeId) {
             var grade = allGrades.find(function(g) { return g.id === gradeId; });
             if (grade && confirm("Are you sure you want to delete this grade record?\\n\\n" + grade.studentName + " - " + grade.course + " (" + grade.grade + ")")) {
-                // ANTI-PATTERN: Creating and submitting form dynamically via JavaScript
-                var form = document.createElement('form');
-                form.method = 'POST';
-                form.action = '/grades';
-                
-                var actionInput = document.createElement('input');
-                actionInput.type = 'hidden';
-                actionInput.name = 'action';
-                actionInput.value = 'delete';
-                form.appendChild(actionInput);
-                
-                var idInput = document.createElement('input');
-                idInput.type = 'hidden';
-                idInput.name = 'delete_id';
-                idInput.value = gradeId;
-                form.appendChild(idInput);
-                
-                document.body.appendChild(form);
-                form.submit();
+                postAction(new URLSearchParams({action: 'delete', delete_id: gradeId}));
             }
         }
         
+        // Create/delete POSTs come back as a small JSON result that is patched
+        // into the page; without JavaScript the forms fall back to a redirect
+        function showMessage(text, type) {
+            var box = document.getElementById('actionMessage');
+            if (!box) {
+                box = document.createElement('div');
+                box.id = 'actionMessage';
+                var form = document.querySelector('.create-grade-form');
+                form.parentNode.insertBefore(box, form);
+            }
+            box.className = 'message message-' + type;
+            box.textContent = text;
+        }
+        
+        function applyResult(result) {
+            if (result.grade) {
+                var grade = result.grade;
+                if (matchesFilters(grade) && !allGrades.some(function(g) { return g.id === grade.id; })) {
+                    allGrades.push(grade);
+                    gradesTable.setData(allGrades);
+                }
+                updateTotals();
+            }
+            if (result.id) {
+                removeGradeRows(function(grade) { return grade.id === result.id; });
+            }
+            if (result.stats) {
+                document.getElementById('totalStudents').textContent = result.stats.students;
+                document.getElementById('totalSemesters').textContent = result.stats.semesters;
+            }
+        }
+        
+        function postAction(body) {
+            return fetch('/grades', {
+                method: 'POST',
+                headers: {'Accept': 'application/json'},
+                body: body
+            }).then(function(response) {
+                return response.json();
+            }).then(function(result) {
+                showMessage(result.message, result.message_type);
+                if (result.ok) {
+                    applyResult(result);
+                }
+                return result;
+            }).catch(function(error) {
+                showMessage('Error: ' + error.message, 'error');
+            });
+        }
+        
+        document.getElementById('createGradeForm').addEventListener('submit', function(e) {
+            e.preventDefault();
+            var form = this;
+            postAction(new FormData(form)).then(function(result) {
+                if (result && result.ok) {
+                    form.reset();
+                }
+            });
+        });
+        
+        // The student and course pickers are filled from the typeahead
+        // endpoints as the user types instead of listing every row up front
+        function attachTypeahead(input, listId, url, toOption) {
+            var timer = null;
+            var lastQuery = '';
+            input.addEventListener('input', function() {
+                clearTimeout(timer);
+                timer = setTimeout(function() {
+                    var query = input.value.trim();
+                    if (!query || query === lastQuery) {
+                        return;
+                    }
+                    lastQuery = query;
+                    fetch(url + '?q=' + encodeURIComponent(query)).then(function(response) {
+                        return response.json();
+                    }).then(function(data) {
+                        if (input.value.trim() !== query) {
+                            return;
+                        }
+                        document.getElementById(listId).innerHTML = data.results.map(function(item) {
+                            return '<option value="' + escapeHtml(toOption(item)) + '">';
+                        }).join('');
+                    });
+                }, 100);
+            });
+        }
+        
+        var gradeForm = document.getElementById('createGradeForm');
+        attachTypeahead(gradeForm.elements.student_name, 'student-list', '/typeahead/students', function(student) {
+            return student.name + ' (#' + student.id + ')';
+        });
+        attachTypeahead(gradeForm.elements.course, 'course-list', '/typeahead/courses', function(course) {
+            return course;
+        });
+        gradeForm.elements.student_name.addEventListener('input', function() {
+            // A picked suggestion ends in "(#id)"
+            var at = this.value.lastIndexOf('(#');
+            var id = at === -1 ? NaN : parseInt(this.value.slice(at + 2), 10);
+            gradeForm.elements.student_id.value = isNaN(id) ? '' : id;
+        });
+        
+        // Selection lives in selectedGrades, since most rows are not in the DOM
         function toggleSelectAll() {
             var selectAll = document.getElementById("selectAll");
-            var checkboxes = document.querySelectorAll(".grade-checkbox");
-            checkboxes.forEach(function(checkbox) {
+            selectedGrades.clear();
+            if (selectAll.checked) {
+                allGrades.forEach(function(grade) {
+                    selectedGrades.add(grade.id);
+                });
+            }
+            document.querySelectorAll(".grade-checkbox").forEach(function(checkbox) {
                 checkbox.checked = selectAll.checked;
             });
         }
         
         function deleteSelected() {
-            var checkboxes = document.querySelectorAll(".grade-checkbox:checked");
-            if (checkboxes.length === 0) {
+            if (selectedGrades.size === 0) {
                 alert("Please select grades to delete");
                 return;
             }
             
-            if (confirm("Delete " + checkboxes.length + " selected grade(s)?")) {
+            if (confirm("Delete " + selectedGrades.size + " selected grade(s)?")) {
                 alert("Bulk delete functionality not implemented in this demo!");
-                var ids = Array.from(checkboxes).map(function(cb) { return cb.value; });
+                var ids = Array.from(selectedGrades);
                 console.log("Would delete grades: " + ids.join(", "));
             }
         }
@@ -1054,8 +1224,45 @@ def render_grades_page():
             alert("CSV file downloaded!");
         }
         
+        // Transcripts for every student are built by a background job;
+        // poll its status and download the zip when it is done
         function generateReport() {
-            alert("Generating report...\\n\\nThis feature is not implemented in this demo.\\n\\nIn a real system, this would generate a comprehensive PDF report.");
+            var button = document.querySelector('button[onclick="generateReport()"]');
+            var label = button.textContent;
+            button.disabled = true;
+            fetch('/jobs', {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({kind: 'transcripts', scope: 'all'})
+            }).then(function(response) {
+                return response.json();
+            }).then(function(job) {
+                if (!job.id) {
+                    throw new Error(job.error || 'could not start report');
+                }
+                var timer = setInterval(function() {
+                    fetch('/jobs/' + job.id).then(function(response) {
+                        return response.json();
+                    }).then(function(status) {
+                        button.textContent = '📄 ' + Math.round(status.progress * 100) + '%';
+                        if (status.status === 'succeeded') {
+                            clearInterval(timer);
+                            button.textContent = label;
+                            button.disabled = false;
+                            window.location.href = '/jobs/' + job.id + '/result';
+                        } else if (status.status === 'failed' || status.status === 'cancelled') {
+                            clearInterval(timer);
+                            button.textContent = label;
+                            button.disabled = false;
+                            alert('Report ' + status.status + (status.error ? ': ' + status.error : ''));
+                        }
+                    });
+                }, 1000);
+            }).catch(function(error) {
+                button.textContent = label;
+                button.disabled = false;
+                alert('Report failed: ' + error.message);
+            });
         }
         
         function printGrades() {
@@ -1066,20 +1273,6 @@ def render_grades_page():
         window.onload = function() {
             console.log("Grades page loaded with " + allGrades.length + " records");
             
-            // ANTI-PATTERN: Animate elements individually instead of using CSS classes
-            var rows = document.querySelectorAll("tbody tr");
-            rows.forEach(function(row, index) {
-                setTimeout(function() {
-                    row.style.opacity = "0";
-                    row.style.transform = "translateX(-50px)";
-                    row.style.transition = "all 0.5s";
-                    setTimeout(function() {
-                        row.style.opacity = "1";
-                        row.style.transform = "translateX(0)";
-                    }, 50);
-                }, index * 30);
-            });
-            
             // ANTI-PATTERN: Calculating stats in JavaScript that should be done server-side
             calculateStatistics();
         };
@@ -1101,11 +1294,6 @@ def render_grades_page():
             console.log("Other: " + totalOther);
         }
         
-        // ANTI-PATTERN: Polling for updates instead of WebSockets
-        setInterval(function() {
-            console.log("Checking for updates... (not really)");
-        }, 10000);
-        
         // ANTI-PATTERN: Adding event listeners in multiple places
         document.addEventListener('keydown', function(e) {
             if (e.ctrlKey && e.key === 'e') {
@@ -1124,18 +1312,78 @@ def render_grades_page():
             return false;
         };
         
-        // ANTI-PATTERN: Unnecessary animations that consume resources
-        setInterval(function() {
-            var statCards = document.querySelectorAll('.stat-card');
-            var randomCard = statCards[Math.floor(Math.random() * statCards.length)];
-            if (randomCard) {
-                randomCard.style.transition = 'transform 0.3s';
-                randomCard.style.transform = 'scale(1.05)';
-                setTimeout(function() {
-                    randomCard.style.transform = 'scale(1)';
-                }, 300);
-            }
-        }, 3000);
+        // Live updates: the server pushes create/delete deltas over SSE and
+        // the table and stats are patched in place
+        var pageParams = new URLSearchParams(window.location.search);
+        
+        function escapeHtml(value) {
+            return String(value === null || value === undefined ? '' : value)
+                .replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;').replace(/"/g, '&quot;');
+        }
+        
+        function matchesFilters(grade) {
+            var student = (pageParams.get('student') || '').toLowerCase();
+            var course = (pageParams.get('course') || '').toLowerCase();
+            var semester = pageParams.get('semester') || '';
+            return (!student || grade.studentName.toLowerCase().indexOf(student) !== -1) &&
+                (!course || grade.course.toLowerCase().indexOf(course) !== -1) &&
+                (!semester || grade.semester === semester);
+        }
+        
+        function updateTotals() {
+            var card = document.getElementById('totalGrades');
+            card.textContent = allGrades.length;
+            document.getElementById('totalCredits').textContent =
+                allGrades.reduce(function(total, g) { return total + g.credits; }, 0);
+            card.parentNode.style.transition = 'transform 0.3s';
+            card.parentNode.style.transform = 'scale(1.05)';
+            setTimeout(function() {
+                card.parentNode.style.transform = 'scale(1)';
+            }, 300);
+        }
+        
+        function removeGradeRows(predicate) {
+            allGrades.filter(predicate).forEach(function(grade) {
+                selectedGrades.delete(grade.id);
+            });
+            allGrades = allGrades.filter(function(grade) { return !predicate(grade); });
+            gradesTable.setData(allGrades);
+            updateTotals();
+        }
+        
+        // A server with no stream to spare answers 503; try again later and reload to catch up
+        function listenForUpdates(missed) {
+            var updates = new EventSource('/events');
+            updates.onopen = function() {
+                if (missed) window.location.reload();
+            };
+            updates.onerror = function() {
+                if (updates.readyState === EventSource.CLOSED) {
+                    setTimeout(function() { listenForUpdates(true); }, 30000);
+                }
+            };
+            updates.addEventListener('grade_created', function(e) {
+                var grade = JSON.parse(e.data);
+                if (!matchesFilters(grade) || allGrades.some(function(g) { return g.id === grade.id; })) {
+                    return;
+                }
+                allGrades.push(grade);
+                gradesTable.setData(allGrades);
+                updateTotals();
+            });
+            updates.addEventListener('grade_deleted', function(e) {
+                var id = JSON.parse(e.data).id;
+                removeGradeRows(function(grade) { return grade.id === id; });
+            });
+            updates.addEventListener('student_deleted', function(e) {
+                var id = JSON.parse(e.data).id;
+                removeGradeRows(function(grade) { return grade.studentId === id; });
+            });
+            updates.addEventListener('resync', function() {
+                window.location.reload();
+            });
+        }
+        if (window.EventSource) listenForUpdates(false);
         
         // ANTI-PATTERN: Adding more functionality without proper architecture
         function highlightStudent(studentName) {
@@ -1150,16 +1398,28 @@ def render_grades_page():
             });
         }
         
-        // ANTI-PATTERN: Memory leaks by not cleaning up event listeners
-        document.querySelectorAll('.grade-checkbox').forEach(function(checkbox) {
-            checkbox.addEventListener('change', function() {
-                console.log('Checkbox changed: ' + this.value);
-            });
+        // One listener on the body; rows come and go as the table scrolls
+        document.querySelector('#gradesTable tbody').addEventListener('change', function(e) {
+            if (e.target.classList.contains('grade-checkbox')) {
+                var id = parseInt(e.target.value, 10);
+                if (e.target.checked) {
+                    selectedGrades.add(id);
+                } else {
+                    selectedGrades.delete(id);
+                }
+                console.log('Checkbox changed: ' + e.target.value);
+            }
         });
+        
+        gradesTable.setData(allGrades);
     </script>
     
     <!-- ANTI-PATTERN: More styles after JavaScript -->
     <style>
+        .grades-table tbody {
+            animation: fadeIn 0.5s;
+        }
+        
         @media print {
             .filters, .action-buttons, .navigation, .warning-banner {
                 display: none !important;
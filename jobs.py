@@ -0,0 +1,319 @@
+"""
+JOBS - in-process background job queue.
+
+Long-running work (exports, bulk GPA recomputes, transcript generation) is
+submitted as a job instead of running inside the request. Jobs run on a
+bounded thread pool and their state lives in the ``jobs`` table, so any
+worker process can report status, progress and results:
+
+    POST /jobs                 kind=<kind>&<params...>  -> 202 + job record
+    GET  /jobs/<id>            status, progress, message, result
+    GET  /jobs/<id>/result     the result file (or JSON result)
+    POST /jobs/<id>/cancel     request cancellation
+
+Job functions are registered with ``@job("kind")`` and receive a
+``JobContext`` as their first argument. They report progress with
+``ctx.progress(done, total, message)``, which also raises ``JobCancelled``
+once cancellation has been requested, so cancellation is cooperative.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import db
+import metrics
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+JOB_MAX_PENDING = int(os.environ.get("JOB_MAX_PENDING", "100"))
+EXPORT_DIR = os.environ.get("EXPORT_DIR", "exports")
+
+# Progress is written to the jobs table at most this often per job
+PROGRESS_INTERVAL = 0.5
+EXPORT_BATCH_SIZE = 5000
+
+JOB_KINDS = {}
+
+JOBS_SUBMITTED = metrics.Counter("jobs_submitted_total", "Background jobs submitted.", ("kind",))
+JOBS_FINISHED = metrics.Counter("jobs_finished_total", "Background jobs finished.", ("kind", "status"))
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+_idle = threading.Condition(_executor_lock)
+_pending = 0
+_running = 0
+# Progress of jobs running in this process that is not yet in the jobs table
+_unsaved_progress = {}
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobRejected(Exception):
+    pass
+
+
+def job(kind):
+    """Register the decorated function as the handler for jobs of ``kind``."""
+    def decorator(fn):
+        JOB_KINDS[kind] = fn
+        return fn
+    return decorator
+
+
+def ensure_schema(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY,
+        kind TEXT NOT NULL,
+        params TEXT NOT NULL DEFAULT '{}',
+        status TEXT NOT NULL,
+        progress REAL NOT NULL DEFAULT 0,
+        message TEXT,
+        result TEXT,
+        error TEXT,
+        cancel_requested INTEGER NOT NULL DEFAULT 0,
+        pid INTEGER,
+        created_at REAL NOT NULL,
+        started_at REAL,
+        finished_at REAL
+    )''')
+
+
+def recover_orphans(conn):
+    """Fail queued/running jobs whose owning process no longer exists."""
+    rows = conn.execute("SELECT id, pid FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+    for job_id, pid in rows:
+        try:
+            os.kill(pid, 0)
+            alive = pid != os.getpid()
+        except (OSError, TypeError):
+            alive = False
+        if not alive:
+            conn.execute("UPDATE jobs SET status = 'failed', error = 'worker process exited',"
+                         " finished_at = ? WHERE id = ?", (time.time(), job_id))
+
+
+def _update(job_id, **fields):
+    assignments = ", ".join(f"{name} = ?" for name in fields)
+    db.write(lambda conn: conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?",
+                                       (*fields.values(), job_id)))
+
+
+def _row_to_dict(row):
+    keys = ("id", "kind", "params", "status", "progress", "message", "result", "error",
+            "cancel_requested", "created_at", "started_at", "finished_at")
+    record = dict(zip(keys, row))
+    record["params"] = json.loads(record["params"] or "{}")
+    record["result"] = json.loads(record["result"]) if record["result"] else None
+    record["cancel_requested"] = bool(record["cancel_requested"])
+    return record
+
+
+def get_job(job_id):
+    conn = db.connect()
+    try:
+        row = conn.execute(
+            "SELECT id, kind, params, status, progress, message, result, error, cancel_requested,"
+            " created_at, started_at, finished_at FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    record = _row_to_dict(row)
+    unsaved = _unsaved_progress.get(job_id)
+    if unsaved and record["status"] == "running":
+        record.update(unsaved)
+    return record
+
+
+class JobContext:
+    """Handed to a running job for progress reporting and cancellation checks."""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self._last_write = 0.0
+
+    def cancelled(self):
+        conn = db.connect()
+        try:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (self.job_id,)).fetchone()
+        finally:
+            conn.close()
+        return bool(row and row[0])
+
+    def progress(self, done, total=None, message=None, force=False, save=True):
+        """Report progress and raise ``JobCancelled`` if cancellation was requested.
+
+        Pass ``save=False`` while the job still has a read cursor open: with
+        the rollback journal, writing the jobs table from another connection
+        would wait on that cursor's lock until the busy timeout. The
+        progress is then kept in memory, where ``get_job()`` in this process
+        still sees it, and saved with the next saved report.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_write < PROGRESS_INTERVAL:
+            return
+        self._last_write = now
+        fraction = min(done / total, 1.0) if total else 0.0
+        fields = {"progress": round(fraction, 4)}
+        if message is not None:
+            fields["message"] = message
+        if save:
+            _update(self.job_id, **fields)
+            _unsaved_progress.pop(self.job_id, None)
+        else:
+            _unsaved_progress[self.job_id] = fields
+        if self.cancelled():
+            raise JobCancelled()
+
+    def output_path(self, filename):
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        return os.path.join(EXPORT_DIR, f"job-{self.job_id}-{filename}")
+
+
+def _run(job_id, kind, params):
+    global _pending, _running
+    with _executor_lock:
+        _pending -= 1
+        _running += 1
+    try:
+        _run_claimed(job_id, kind, params)
+    finally:
+        with _executor_lock:
+            _running -= 1
+            _idle.notify_all()
+
+
+def _run_claimed(job_id, kind, params):
+    ctx = JobContext(job_id)
+    # Claim the job unless it was cancelled while still queued
+    claimed = db.write(lambda conn: conn.execute("UPDATE jobs SET status = 'running', started_at = ?"
+                                                 " WHERE id = ? AND status = 'queued'",
+                                                 (time.time(), job_id)).rowcount)
+    if not claimed:
+        return
+    try:
+        result = JOB_KINDS[kind](ctx, **params)
+    except JobCancelled:
+        status, fields = "cancelled", {"message": "Cancelled"}
+    except Exception as e:
+        status, fields = "failed", {"error": f"{type(e).__name__}: {e}"}
+    else:
+        status, fields = "succeeded", {"progress": 1.0, "result": json.dumps(result)}
+    _update(job_id, status=status, finished_at=time.time(), **fields)
+    _unsaved_progress.pop(job_id, None)
+    JOBS_FINISHED.inc((kind, status))
+
+
+def _get_executor():
+    global _executor, _executor_pid, _pending
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+            _executor_pid = os.getpid()
+            _pending = 0
+        return _executor
+
+
+def active():
+    """Number of jobs queued or running in this process."""
+    with _executor_lock:
+        return _pending + _running if _executor_pid == os.getpid() else 0
+
+
+def wait_idle(timeout):
+    """Wait up to ``timeout`` seconds for this process's jobs to finish; True if they did."""
+    deadline = time.monotonic() + timeout
+    with _idle:
+        while _executor_pid == os.getpid() and (_pending or _running):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            _idle.wait(remaining)
+    return True
+
+
+def submit(kind, params=None):
+    """Queue a job and return its record; raises ``JobRejected`` when full or unknown."""
+    global _pending
+    if kind not in JOB_KINDS:
+        raise JobRejected(f"unknown job kind: {kind}")
+    params = params or {}
+    executor = _get_executor()
+    with _executor_lock:
+        if _pending >= JOB_MAX_PENDING:
+            raise JobRejected("job queue is full")
+        _pending += 1
+    try:
+        job_id = db.write(lambda conn: conn.execute(
+            "INSERT INTO jobs (kind, params, status, pid, created_at) VALUES (?, ?, 'queued', ?, ?)",
+            (kind, json.dumps(params), os.getpid(), time.time())).lastrowid)
+        executor.submit(_run, job_id, kind, params)
+    except BaseException:
+        # The slot reserved above was never handed to _run()
+        with _executor_lock:
+            _pending -= 1
+            _idle.notify_all()
+        raise
+    JOBS_SUBMITTED.inc((kind,))
+    return get_job(job_id)
+
+
+def cancel(job_id):
+    """Cancel a queued job immediately, or flag a running one; returns the record."""
+    def work(conn):
+        conn.execute("UPDATE jobs SET status = 'cancelled', finished_at = ?, message = 'Cancelled'"
+                     " WHERE id = ? AND status = 'queued'", (time.time(), job_id))
+        conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,))
+
+    db.write(work)
+    return get_job(job_id)
+
+
+@job("gpa_recompute")
+def gpa_recompute_job(ctx, batch_size=None):
+    import gpa_engine
+    # Scan and rewrite in one write transaction, so no grade lands in between;
+    # it holds the write lock, so progress is only saved once it has committed
+    students = db.write(lambda conn: gpa_engine.recompute_all(
+        conn, int(batch_size or gpa_engine.RECOMPUTE_BATCH_SIZE),
+        progress=lambda done, total: ctx.progress(done, total, f"{done}/{total} grades", save=False)))
+    return {"students": students}
+
+
+@job("grades_export")
+def grades_export_job(ctx, semester=None):
+    import csv
+    conn = db.connect()
+    path = ctx.output_path("grades.csv")
+    try:
+        where, params = ("AND g.semester = ?", (semester,)) if semester else ("", ())
+        total = conn.execute(f"SELECT COUNT(*) FROM grades g WHERE 1 {where}", params).fetchone()[0]
+        done = 0
+        last_id = 0
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["ID", "Student ID", "Student Name", "Course", "Grade", "Semester", "Credits"])
+            # One complete query per batch (keyset paging on the id), so no read
+            # lock is held while progress is written from another connection
+            while True:
+                rows = conn.execute(
+                    "SELECT g.id, g.student_id, s.name, g.course, g.grade, g.semester, g.credits"
+                    f" FROM grades g JOIN students s ON g.student_id = s.id WHERE g.id > ? {where}"
+                    " ORDER BY g.id LIMIT ?", (last_id, *params, EXPORT_BATCH_SIZE)).fetchall()
+                if not rows:
+                    break
+                writer.writerows(rows)
+                done += len(rows)
+                last_id = rows[-1][0]
+                ctx.progress(done, total, f"{done}/{total} rows")
+    except JobCancelled:
+        os.remove(path)
+        raise
+    finally:
+        conn.close()
+    return {"path": path, "rows": done, "content_type": "text/csv"}
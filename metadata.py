@@ -0,0 +1,67 @@
+"""
+METADATA - cached dropdown/datalist lookups shared by both pages.
+
+The majors, semesters and courses lists and the student count change only
+when a row is written, yet every page view used to re-query all of them. They are
+kept here in memory, refilled lazily, and dropped by ``invalidate()`` from
+the write paths. Entries also expire after ``METADATA_TTL`` seconds so that
+writes made by other worker processes show up without coordination.
+"""
+
+import os
+import threading
+import time
+
+import db
+import metrics
+
+METADATA_TTL = float(os.environ.get("METADATA_TTL", "5"))
+
+QUERIES = {
+    'majors': "SELECT DISTINCT major FROM students",
+    'student_count': "SELECT COUNT(*) FROM students",
+    'semesters': "SELECT DISTINCT semester FROM grades ORDER BY semester",
+    'courses': "SELECT DISTINCT course FROM grades ORDER BY course",
+}
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def get(name, conn=None):
+    """Return the cached rows for lookup ``name``, querying on a miss."""
+    entry = _cache.get(name)
+    if entry is not None and time.monotonic() - entry[0] < METADATA_TTL:
+        metrics.record_cache('metadata', True)
+        return entry[1]
+    metrics.record_cache('metadata', False)
+    own_conn = conn is None
+    if own_conn:
+        conn = db.connect()
+    try:
+        rows = conn.execute(QUERIES[name]).fetchall()
+    finally:
+        if own_conn:
+            conn.close()
+    with _lock:
+        _cache[name] = (time.monotonic(), rows)
+    return rows
+
+
+def fill():
+    """Load every lookup in one connection (used by the startup warm-up)."""
+    conn = db.connect()
+    try:
+        for name in QUERIES:
+            with _lock:
+                _cache.pop(name, None)
+            get(name, conn)
+    finally:
+        conn.close()
+
+
+def invalidate(*names):
+    """Drop the named lookups, or all of them when called without arguments."""
+    with _lock:
+        for name in names or list(_cache):
+            _cache.pop(name, None)
@@ -0,0 +1,226 @@
+"""
+METRICS - Prometheus text-format instrumentation for the server.
+
+Every metric keeps one shard per thread, so the request hot path only ever
+touches a plain dict owned by the current thread and never takes a lock.
+A scrape walks the shards and sums them; shards of threads that have exited
+are folded into a "retired" shard so the thread-per-request dev server does
+not grow the shard list forever.
+
+Usage:
+    REQUESTS.inc(("GET", "/students", "200"))
+    REQUEST_LATENCY.observe(0.012, ("GET", "/students"))
+    print(render_metrics())
+"""
+
+import threading
+import time
+
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                           0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576,
+                        4194304, 16777216)
+
+_registry = []
+_registry_lock = threading.Lock()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames, labels, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labels)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Base class holding the per-thread shards of one metric family."""
+
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards = []          # list of (thread, shard dict)
+        self._retired = {}
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = {}
+            self._local.shard = shard
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+            return shard
+
+    def _merge(self, into, shard):
+        raise NotImplementedError
+
+    def _snapshot(self):
+        """Return {labels: value} summed over every thread's shard."""
+        with self._lock:
+            alive = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    alive.append((thread, shard))
+                else:
+                    # A dead thread can no longer write, so folding is safe
+                    self._merge(self._retired, shard)
+            self._shards = alive
+            total = {}
+            self._merge(total, self._retired)
+            for _, shard in alive:
+                # dict() copies atomically under the GIL
+                self._merge(total, dict(shard))
+        return total
+
+    def collect(self):
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, labels=(), amount=1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def _merge(self, into, shard):
+        for labels, value in shard.items():
+            into[labels] = into.get(labels, 0) + value
+
+    def value(self, labels=()):
+        return self._snapshot().get(labels, 0)
+
+    def collect(self):
+        for labels, value in sorted(self._snapshot().items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels=(), amount=1):
+        self.inc(labels, -amount)
+
+    def set_function(self, fn):
+        """Report ``fn()`` at scrape time instead of the accumulated value."""
+        self._fn = fn
+
+    def collect(self):
+        fn = getattr(self, '_fn', None)
+        if fn is not None:
+            yield f"{self.name} {_format_value(fn())}"
+            return
+        yield from Counter.collect(self)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, labels=()):
+        shard = self._shard()
+        cells = shard.get(labels)
+        if cells is None:
+            # per-bucket counts, then +Inf count, then sum
+            cells = [0] * (len(self.buckets) + 2)
+            shard[labels] = cells
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                cells[i] += 1
+                break
+        else:
+            cells[-2] += 1
+        cells[-1] += value
+
+    def _merge(self, into, shard):
+        for labels, cells in shard.items():
+            merged = into.get(labels)
+            if merged is None:
+                into[labels] = list(cells)
+            else:
+                for i, v in enumerate(cells):
+                    merged[i] += v
+
+    def collect(self):
+        for labels, cells in sorted(self._snapshot().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), cells):
+                cumulative += count
+                le = ("le", _format_value(float(bound)) if bound != float('inf') else "+Inf")
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(cells[-1])}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}"
+
+
+def render_metrics():
+    """Render every registered metric in the Prometheus text exposition format."""
+    with _registry_lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# HTTP metrics
+REQUESTS = Counter("http_requests_total", "HTTP requests served.",
+                   ("method", "route", "status"))
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency.",
+                            ("method", "route"))
+RESPONSE_SIZE = Histogram("http_response_size_bytes", "HTTP response body size.",
+                          ("method", "route"), buckets=DEFAULT_SIZE_BUCKETS)
+IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+
+# Database metrics
+DB_QUERIES = Counter("db_queries_total", "SQLite statements executed.", ("operation",))
+DB_QUERY_LATENCY = Histogram("db_query_duration_seconds", "SQLite statement execution time.",
+                             ("operation",))
+DB_QUERY_BUDGET_EXCEEDED = Counter("db_query_budget_exceeded_total",
+                                   "Queries interrupted for running past their route's time budget.",
+                                   ("route",))
+DB_LOCK_WAIT = Histogram("db_lock_wait_seconds", "Time write transactions waited for the write lock.")
+DB_WRITE_RETRIES = Counter("db_write_retries_total",
+                           "Write transactions retried after finding the database locked.")
+DB_WRITE_FAILURES = Counter("db_write_failures_total",
+                            "Write transactions that gave up with the database still locked.")
+
+# Cache metrics
+CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups by cache and result.",
+                         ("cache", "result"))
+
+WARMUP_SECONDS = Gauge("app_warmup_duration_seconds", "Time the startup warm-up took in this process.")
+
+PROCESS_START = time.time()
+UPTIME = Gauge("process_uptime_seconds", "Seconds since the process started.")
+UPTIME.set_function(lambda: round(time.time() - PROCESS_START, 3))
+
+
+def record_cache(cache, hit):
+    """Count one lookup against ``cache``; the hit ratio is derived at query time."""
+    CACHE_REQUESTS.inc((cache, "hit" if hit else "miss"))
@@ -0,0 +1,86 @@
+"""
+MODELS - compact row types for students and grades.
+
+The page modules used to index raw tuples (``student[5]``, ``grade[4]``).
+``Student`` and ``Grade`` name the columns instead and use ``__slots__``, so
+each row is a fixed-size object with no per-instance ``__dict__``. Set the
+matching row factory on a cursor to get them straight from SQLite:
+
+    cursor.row_factory = models.student_row
+    cursor.execute(*queries.students(search, major))
+
+Bulk paths should not ``fetchall()`` at all: ``iter_batches()`` and
+``iter_rows()`` walk a cursor with ``fetchmany()`` so only one chunk of a
+large result is in memory at a time.
+"""
+
+FETCH_SIZE = 1000
+
+
+class Student:
+    __slots__ = ('id', 'name', 'email', 'age', 'major', 'gpa')
+
+    def __init__(self, id, name, email, age, major, gpa):
+        self.id = id
+        self.name = name
+        self.email = email
+        self.age = age
+        self.major = major
+        self.gpa = gpa
+
+    def values(self):
+        return (self.id, self.name, self.email, self.age, self.major, self.gpa)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"Student(id={self.id!r}, name={self.name!r})"
+
+
+class Grade:
+    __slots__ = ('id', 'student_id', 'student_name', 'course', 'grade', 'semester', 'credits')
+
+    def __init__(self, id, student_id, student_name, course, grade, semester, credits):
+        self.id = id
+        self.student_id = student_id
+        self.student_name = student_name
+        self.course = course
+        self.grade = grade
+        self.semester = semester
+        self.credits = credits
+
+    def values(self):
+        return (self.id, self.student_id, self.student_name, self.course, self.grade, self.semester,
+                self.credits)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"Grade(id={self.id!r}, student_id={self.student_id!r}, course={self.course!r})"
+
+
+def student_row(cursor, row):
+    """Row factory for ``queries.STUDENT_COLUMNS``."""
+    return Student(*row)
+
+
+def grade_row(cursor, row):
+    """Row factory for ``queries.GRADE_COLUMNS``."""
+    return Grade(*row)
+
+
+def iter_batches(cursor, size=FETCH_SIZE):
+    """Yield lists of up to ``size`` rows until the cursor is exhausted."""
+    while True:
+        batch = cursor.fetchmany(size)
+        if not batch:
+            return
+        yield batch
+
+
+def iter_rows(cursor, size=FETCH_SIZE):
+    """Yield rows one at a time, fetching ``size`` at once from SQLite."""
+    for batch in iter_batches(cursor, size):
+        yield from batch
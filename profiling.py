@@ -0,0 +1,89 @@
+"""
+PROFILING - opt-in per-request profiling hook.
+
+A request carrying ``?_profile=1`` runs under cProfile with tracemalloc
+tracing enabled, and the results are written to ``PROFILE_DIR``:
+
+    <id>.pstats      cProfile stats (snakeviz, gprof2dot, flameprof)
+    <id>.txt         top functions by cumulative time
+    <id>.tracemalloc tracemalloc snapshot (``tracemalloc.Snapshot.load``)
+    <id>.alloc.txt   top allocation sites by size
+
+Profiling is off unless ``PROFILING_ENABLED=1`` is set, or ``PROFILE_TOKEN``
+is set and the request sends the same value in the ``X-Profile-Token``
+header. The profile id is returned in the ``X-Profile-Id`` response header.
+"""
+
+import cProfile
+import functools
+import hmac
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+from flask import request, make_response
+
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "") == "1"
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN", "")
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+PROFILE_PARAM = "_profile"
+
+# cProfile and tracemalloc are process-global, so profile one request at a time
+_profile_lock = threading.Lock()
+
+
+def profiling_requested():
+    if request.args.get(PROFILE_PARAM, "") not in ("1", "true"):
+        return False
+    if PROFILING_ENABLED:
+        return True
+    token = request.headers.get("X-Profile-Token", "")
+    return bool(PROFILE_TOKEN) and hmac.compare_digest(token, PROFILE_TOKEN)
+
+
+def _write_reports(profile_id, profiler, snapshot):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    base = os.path.join(PROFILE_DIR, profile_id)
+
+    profiler.dump_stats(base + ".pstats")
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(40)
+    with open(base + ".txt", "w") as f:
+        f.write(out.getvalue())
+
+    snapshot.dump(base + ".tracemalloc")
+    with open(base + ".alloc.txt", "w") as f:
+        for stat in snapshot.statistics("lineno")[:40]:
+            f.write(f"{stat}\n")
+
+
+def profile_request(view):
+    """Decorator that profiles the wrapped view when the request asks for it."""
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not profiling_requested() or not _profile_lock.acquire(blocking=False):
+            return view(*args, **kwargs)
+        try:
+            already_tracing = tracemalloc.is_tracing()
+            if not already_tracing:
+                tracemalloc.start(25)
+            profiler = cProfile.Profile()
+            try:
+                result = profiler.runcall(view, *args, **kwargs)
+                snapshot = tracemalloc.take_snapshot()
+            finally:
+                if not already_tracing:
+                    tracemalloc.stop()
+            profile_id = f"{request.endpoint}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{threading.get_ident()}"
+            _write_reports(profile_id, profiler, snapshot)
+        finally:
+            _profile_lock.release()
+        response = make_response(result)
+        response.headers["X-Profile-Id"] = profile_id
+        return response
+
+    return wrapper
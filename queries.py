@@ -0,0 +1,76 @@
+"""
+QUERIES - parameterized listing queries for the page modules.
+
+The filters used to be concatenated into the SQL text, so every distinct
+search term was a new statement that SQLite had to parse and plan again
+(and an injection hole). Here each combination of active filters maps to
+one fixed SQL string with ``?`` placeholders: four shapes for students,
+eight for grades and two for the grade distribution cube. The texts repeat across requests, so they hit the
+per-connection prepared statement cache (``db.STATEMENT_CACHE_SIZE``).
+
+    sql, params = queries.students(search="ali", major="Physics")
+    rows = conn.execute(sql, params).fetchall()
+
+Name and course filters are case-insensitive substring matches; ``%`` and
+``_`` in the term match literally, like the page scripts' live filters.
+"""
+
+STUDENT_COLUMNS = "SELECT id, name, email, age, major, gpa FROM students"
+GRADE_COLUMNS = ("SELECT g.id, g.student_id, s.name, g.course, g.grade, g.semester, g.credits"
+                 " FROM grades g JOIN students s ON g.student_id = s.id")
+# grade_cube marks rolled-up dimensions with this value
+GRADE_CUBE_ALL = "*"
+GRADE_CUBE_TOTALS = "SELECT grade, SUM(count), SUM(credits) FROM grade_cube WHERE semester = ? AND major = ?"
+
+
+def _contains(value):
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+# (clause, how to turn the filter value into its parameter). The escape is
+# written as char(92), not '\': for "LIKE ? ESCAPE '\'" SQLite considers
+# the LIKE index optimization and then re-prepares the statement whenever
+# the bound pattern changes, which would defeat the statement cache.
+STUDENT_FILTERS = (
+    ("name LIKE ? ESCAPE char(92)", _contains),
+    ("major = ?", str),
+)
+GRADE_FILTERS = (
+    ("s.name LIKE ? ESCAPE char(92)", _contains),
+    ("g.course LIKE ? ESCAPE char(92)", _contains),
+    ("g.semester = ?", str),
+)
+
+
+def _build(base, filters, values):
+    clauses = []
+    params = []
+    for (clause, to_param), value in zip(filters, values):
+        if value:
+            clauses.append(clause)
+            params.append(to_param(value))
+    sql = base + (" WHERE " + " AND ".join(clauses) if clauses else "")
+    return sql, tuple(params)
+
+
+def students(search="", major=""):
+    """Students whose name contains ``search`` and whose major is ``major`` (both optional)."""
+    return _build(STUDENT_COLUMNS, STUDENT_FILTERS, (search, major))
+
+
+def grades(student="", course="", semester=""):
+    """Grades joined with the student name, filtered by student name, course and semester."""
+    return _build(GRADE_COLUMNS, GRADE_FILTERS, (student, course, semester))
+
+
+def grade_distribution(course="", semester="", major=""):
+    """Grade counts and credits from the ``grade_cube`` roll-up for course, semester and major."""
+    params = (semester or GRADE_CUBE_ALL, major or GRADE_CUBE_ALL)
+    if course:
+        sql = GRADE_CUBE_TOTALS + " AND course LIKE ? ESCAPE char(92) AND course <> ?"
+        params += (_contains(course), GRADE_CUBE_ALL)
+    else:
+        sql = GRADE_CUBE_TOTALS + " AND course = ?"
+        params += (GRADE_CUBE_ALL,)
+    return sql + " GROUP BY grade", params
@@ -0,0 +1,201 @@
+"""
+RANKINGS - top students by GPA and a student's percentile within a major.
+
+Advisors asked for "top 50 by GPA in Computer Science" and "where does this
+student stand in their major", which meant pulling every student and
+sorting in the browser. Now:
+
+    GET /rankings/top?major=Computer%20Science&limit=50
+    GET /rankings/students/42       rank and percentile in the major and overall
+
+Top-N walks the ``(major, gpa)`` index from the top, so it reads only the
+rows it returns; without a major it takes the top N of each major known to
+the rank trees and merges them. Students without a major are ranked
+together under the major '' (as in grade_cube.py). Percentiles come from an in-memory Fenwick tree per major
+(and one over everyone) counting students per GPA step of 0.01, so a rank
+is a prefix sum in O(log buckets). The trees are loaded on first use and
+kept current from the change log like the typeahead index, so GPA changes
+written by any worker are reflected on the next request.
+"""
+
+import array
+import heapq
+import threading
+
+import changes
+import db
+
+TOP_LIMIT = 50
+TOP_MAX_LIMIT = 500
+
+GPA_STEPS = 100     # buckets per grade point
+MAX_GPA = 4.0
+
+STUDENTS_INDEX = "CREATE INDEX IF NOT EXISTS idx_students_major_gpa ON students (major, gpa)"
+
+TOP_QUERY = ("SELECT id, name, major, gpa FROM students WHERE major = ? AND gpa IS NOT NULL"
+             " ORDER BY gpa DESC LIMIT ?")
+NO_MAJOR_TOP_QUERY = ("SELECT id, name, major, gpa FROM students WHERE (major IS NULL OR major = '')"
+                      " AND gpa IS NOT NULL ORDER BY gpa DESC LIMIT ?")
+
+
+def ensure_schema(conn):
+    conn.execute(STUDENTS_INDEX)
+
+
+class FenwickTree:
+    """Counts per bucket with O(log n) updates and prefix sums."""
+
+    def __init__(self, size):
+        self.size = size
+        self.total = 0
+        self._tree = array.array('q', bytes(8 * (size + 1)))
+
+    def add(self, bucket, delta):
+        self.total += delta
+        i = bucket + 1
+        while i <= self.size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix(self, bucket):
+        """Number of entries in buckets below ``bucket``."""
+        count = 0
+        i = bucket
+        while i > 0:
+            count += self._tree[i]
+            i -= i & -i
+        return count
+
+
+def _bucket(gpa):
+    return min(max(round(gpa * GPA_STEPS), 0), round(MAX_GPA * GPA_STEPS))
+
+
+def _position(tree, bucket):
+    below = tree.prefix(bucket)
+    tied = tree.prefix(bucket + 1) - below
+    return {
+        'rank': tree.total - below - tied + 1,
+        'of': tree.total,
+        # Percentile rank: share below, counting ties as half
+        'percentile': round(100 * (below + tied / 2) / tree.total, 1),
+    }
+
+
+class GpaRanks:
+    """Per-major Fenwick trees over GPA buckets, synced from the change log."""
+
+    BUCKETS = round(MAX_GPA * GPA_STEPS) + 1
+
+    def __init__(self):
+        self.version = None
+        self._clear()
+
+    def _clear(self):
+        self.overall = FenwickTree(self.BUCKETS)
+        self.majors = {}
+        self.students = {}      # id -> (major, bucket) of every student with a GPA
+
+    def load(self, conn):
+        self._clear()
+        self.version = changes.current_version(conn)
+        for student_id, major, gpa in conn.execute("SELECT id, major, gpa FROM students"):
+            self._set(student_id, major, gpa)
+
+    def sync(self, conn):
+        if self.version is None:
+            self.load(conn)
+            return
+        if changes.current_version(conn) == self.version:
+            return
+        while True:
+            delta = changes.changes_since(conn, self.version, tables=('students',))
+            if delta['reset']:
+                self.load(conn)
+                return
+            for student_id in delta['students']['deleted']:
+                self._remove(student_id)
+            for student in delta['students']['inserted']:
+                self._set(student['id'], student['major'], student['gpa'])
+            self.version = delta['version']
+            if not delta['more']:
+                return
+
+    def _remove(self, student_id):
+        entry = self.students.pop(student_id, None)
+        if entry is not None:
+            major, bucket = entry
+            self.majors[major].add(bucket, -1)
+            self.overall.add(bucket, -1)
+
+    def _set(self, student_id, major, gpa):
+        entry = (major or '', _bucket(gpa)) if gpa is not None else None
+        if self.students.get(student_id) == entry:
+            return
+        self._remove(student_id)
+        if entry is None:
+            return
+        tree = self.majors.get(entry[0])
+        if tree is None:
+            tree = self.majors[entry[0]] = FenwickTree(self.BUCKETS)
+        tree.add(entry[1], 1)
+        self.overall.add(entry[1], 1)
+        self.students[student_id] = entry
+
+    def position(self, student_id):
+        """Rank and percentile of a student in their major and overall, or None."""
+        entry = self.students.get(student_id)
+        if entry is None:
+            return None
+        major, bucket = entry
+        return {'major': _position(self.majors[major], bucket), 'overall': _position(self.overall, bucket)}
+
+
+_ranks = GpaRanks()
+_lock = threading.Lock()
+
+
+def _student_dict(row):
+    return {'id': row[0], 'name': row[1], 'major': row[2], 'gpa': row[3]}
+
+
+def _top_rows(conn, major, limit):
+    if major == '':
+        return conn.execute(NO_MAJOR_TOP_QUERY, (limit,)).fetchall()
+    return conn.execute(TOP_QUERY, (major, limit)).fetchall()
+
+
+def top(major=None, limit=TOP_LIMIT):
+    """The ``limit`` students with the highest GPA, in ``major`` or across all majors."""
+    conn = db.connect()
+    try:
+        if major:
+            return [_student_dict(row) for row in _top_rows(conn, major, limit)]
+        # The majors of every student with a GPA, as of the latest change
+        with _lock:
+            _ranks.sync(conn)
+            majors = [name for name, tree in _ranks.majors.items() if tree.total]
+        # One index walk per major, merged
+        per_major = [_top_rows(conn, name, limit) for name in majors]
+        merged = heapq.merge(*per_major, key=lambda row: -row[3])
+        return [_student_dict(row) for _, row in zip(range(limit), merged)]
+    finally:
+        conn.close()
+
+
+def student_position(student_id):
+    """The student with their rank and percentile, or None if there is no such student."""
+    conn = db.connect()
+    try:
+        row = conn.execute("SELECT id, name, major, gpa FROM students WHERE id = ?", (student_id,)).fetchone()
+        if row is None:
+            return None
+        with _lock:
+            _ranks.sync(conn)
+            position = _ranks.position(student_id)
+    finally:
+        conn.close()
+    result = _student_dict(row)
+    result['ranking'] = position
+    return result
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+SERVE - production launch mode for the Flask app.
+
+The master process binds the listening socket once and pre-forks
+``--workers`` processes that all accept on it. Each worker serves requests
+from a fixed pool of ``--threads`` threads and owns its own SQLite
+connection pool (see ``db.reset_pool``). A worker that has served
+``--max-requests`` requests and has no background jobs left stops
+accepting, drains its in-flight requests and exits; the master replaces
+it. SIGTERM/SIGINT on the master shuts every worker down the same way,
+also letting running jobs finish. Either drain gives up after
+``--graceful-timeout`` seconds.
+
+    python3 serve.py --workers 4 --threads 8 --port 5000
+
+Pre-forking needs ``os.fork`` (Linux/macOS). On Windows, use
+``python terrible_server.py`` instead.
+"""
+
+import argparse
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    # One request per connection, so an idle keep-alive client cannot pin a pool thread
+    protocol_version = "HTTP/1.0"
+
+    def log_request(self, code="-", size="-"):
+        if self.server.access_log:
+            super().log_request(code, size)
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """WSGI server that hands accepted connections to a fixed thread pool."""
+
+    multithread = True
+
+    def __init__(self, app, host, fd, threads, max_requests, access_log=False, can_recycle=None):
+        super().__init__(host, 0, app, handler=QuietRequestHandler, fd=fd)
+        self.access_log = access_log
+        self.max_requests = max_requests
+        # Checked before recycling; a worker that says no is retried after its next request
+        self.can_recycle = can_recycle or (lambda: True)
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="worker")
+        self.served = 0
+        self.served_lock = threading.Lock()
+        self.stopping = False
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._process_request_thread, request, client_address)
+
+    def _process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+        with self.served_lock:
+            self.served += 1
+            recycle = self.max_requests and self.served >= self.max_requests
+        if recycle and self.can_recycle():
+            self.stop()
+
+    def stop(self):
+        if not self.stopping:
+            self.stopping = True
+            # shutdown() blocks until serve_forever returns, so never call it
+            # from the thread running serve_forever itself
+            threading.Thread(target=self.shutdown, daemon=True).start()
+
+    def server_close(self):
+        # The listening socket is shared with the other workers; only drop our copy
+        self.socket.close()
+
+
+def run_worker(app, fd, options):
+    import db
+    import events
+    import jobs
+    import terrible_server
+    db.reset_pool()
+    # Every open /events stream holds a pool thread; leave the rest for requests
+    events.SSE_MAX_THREAD_CLIENTS = options.max_streams
+    terrible_server.start_warmup()
+
+    # Recycling would kill the jobs this worker runs, so it waits until they are done
+    server = PooledWSGIServer(app, options.host, fd, options.threads, options.max_requests, options.access_log,
+                              can_recycle=lambda: not jobs.active())
+    signal.signal(signal.SIGTERM, lambda *_: server.stop())
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    server.serve_forever()
+    # Event streams never finish on their own; end them so the drain can
+    events.close_all()
+    # Graceful drain: finish the requests already accepted and the jobs
+    # still queued or running, within the same deadline the master allows
+    deadline = time.monotonic() + options.graceful_timeout
+    drain = threading.Thread(target=server.executor.shutdown, daemon=True)
+    drain.start()
+    drain.join(options.graceful_timeout)
+    jobs.wait_idle(max(deadline - time.monotonic(), 0))
+    os._exit(0)
+
+
+def spawn_worker(app, fd, options):
+    pid = os.fork()
+    if pid == 0:
+        try:
+            run_worker(app, fd, options)
+        finally:
+            os._exit(1)
+    return pid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the app with pre-forked workers.")
+    parser.add_argument("--host", default=os.environ.get("HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "5000")))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_WORKERS", os.cpu_count() or 1)))
+    parser.add_argument("--threads", type=int, default=int(os.environ.get("WEB_THREADS", "8")))
+    parser.add_argument("--max-requests", type=int, default=int(os.environ.get("WEB_MAX_REQUESTS", "1000")),
+                        help="recycle a worker after this many requests (0 = never)")
+    parser.add_argument("--graceful-timeout", type=float, default=30.0)
+    parser.add_argument("--max-streams", type=int, default=None,
+                        help="open /events streams per worker (default: a quarter of --threads)")
+    parser.add_argument("--access-log", action="store_true")
+    options = parser.parse_args(argv)
+    if options.max_streams is None:
+        options.max_streams = options.threads // 4
+
+    if not hasattr(os, "fork"):
+        sys.exit("serve.py needs os.fork; run terrible_server.py on this platform")
+
+    from terrible_server import app, check_schema
+    # Create the database once here so workers never race to build it
+    check_schema()
+
+    listener = socket.create_server((options.host, options.port), backlog=1024, reuse_port=False)
+    listener.set_inheritable(True)
+    fd = listener.fileno()
+
+    workers = {spawn_worker(app, fd, options) for _ in range(options.workers)}
+    print(f"Serving on http://{options.host}:{options.port} with {options.workers} workers "
+          f"x {options.threads} threads (pid {os.getpid()})", flush=True)
+
+    stopping = False
+
+    def handle_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+
+    deadline = None
+    while workers:
+        if stopping and deadline is None:
+            deadline = time.monotonic() + options.graceful_timeout
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            if deadline is not None and time.monotonic() > deadline:
+                for pid in workers:
+                    os.kill(pid, signal.SIGKILL)
+            time.sleep(0.1)
+            continue
+        workers.discard(pid)
+        if not stopping:
+            workers.add(spawn_worker(app, fd, options))
+
+    listener.close()
+
+
+if __name__ == "__main__":
+    main()
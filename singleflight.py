@@ -0,0 +1,68 @@
+"""
+SINGLEFLIGHT - one computation shared by identical concurrent requests.
+
+When a popular view (say ``/grades?semester=Fall 2024``) is requested by
+many users at once, every request used to run the same queries and the
+same render. A ``Group`` lets the first request for a key (the leader) do
+the work while requests for the same key that arrive in the meantime (the
+followers) wait for it and return its result, or its exception. The key
+is forgotten as soon as the leader finishes, so this only coalesces
+requests that overlap; it is not a cache.
+
+    LISTINGS = singleflight.Group('grades')
+    html = LISTINGS.do(key, lambda: render(...))
+
+Callers put the change-log version in the key, so a request never shares
+a result that was started before a write it should see.
+"""
+
+import threading
+
+import metrics
+
+SINGLEFLIGHT_REQUESTS = metrics.Counter(
+    "singleflight_requests_total",
+    "Coalescible requests, by whether they did the work (leader) or shared it (follower).",
+    ("group", "role"))
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class Group:
+    """Runs ``fn`` once per key among callers that overlap."""
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            SINGLEFLIGHT_REQUESTS.inc((self.name, "follower"))
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        SINGLEFLIGHT_REQUESTS.inc((self.name, "leader"))
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
@@ -18,13 +18,32 @@ This file demonstrates TERRIBLE practices:
 DO NOT USE THIS CODE IN REAL PROJECTS!
 """
 
+import os
 import sqlite3
+
+import actions
+import changes
+import db
+import events
+import fragments
+import gpa_engine
+import metadata
+import models
+import profiling
+import queries
+import singleflight
+import virtual_table
+import warming
 from flask import request
 
+# Seconds the student listing query may run before the page is served truncated
+QUERY_BUDGET = float(os.environ.get("STUDENTS_QUERY_BUDGET", "1"))
+
 def render_student_page():
     # ANTI-PATTERN: Handling both GET and POST in the same function!
     message = ""
     message_type = ""
+    result = {}
     
     # ANTI-PATTERN: Business logic mixed with view logic
     if request.method == 'POST':
@@ -40,19 +59,19 @@ def render_student_page():
                 message_type = "error"
             else:
                 # ANTI-PATTERN: Direct database deletion in view function
-                conn = sqlite3.connect("students.db")
-                c = conn.cursor()
+                def delete_student(conn):
+                    # The student's grades go with it (ON DELETE CASCADE)
+                    gpa_engine.remove_student(conn, int(delete_id))
+                    return conn.execute("DELETE FROM students WHERE id = ?", (int(delete_id),)).rowcount
                 
                 # ANTI-PATTERN: No check if student exists before deleting
-                # ANTI-PATTERN: Deleting without checking for foreign key constraints
                 try:
-                    # First delete associated grades
-                    c.execute("DELETE FROM grades WHERE student_id = ?", (int(delete_id),))
-                    # Then delete the student
-                    c.execute("DELETE FROM students WHERE id = ?", (int(delete_id),))
-                    
-                    if c.rowcount > 0:
-                        conn.commit()
+                    if db.write(delete_student) > 0:
+                        metadata.invalidate()
+                        warming.schedule()
+                        STUDENT_ROWS.invalidate(int(delete_id))
+                        events.publish('student_deleted', {'id': int(delete_id)})
+                        result = {'id': int(delete_id)}
                         message = "Student deleted successfully! 🗑️"
                         message_type = "success"
                     else:
@@ -61,8 +80,6 @@ def render_student_page():
                 except Exception as e:
                     message = f"Error deleting student: {str(e)}"
                     message_type = "error"
-                finally:
-                    conn.close()
         else:
             # ANTI-PATTERN: Create logic
             # ANTI-PATTERN: Getting form data without validation
@@ -98,42 +115,171 @@ def render_student_page():
                 message_type = "error"
             else:
                 # ANTI-PATTERN: Database operations in view function
-                conn = sqlite3.connect("students.db")
-                c = conn.cursor()
+                row = (name, email, int(age) if age else None, major, float(gpa) if gpa else None)
+                
+                def insert_student(conn):
+                    return conn.execute("INSERT INTO students (name, email, age, major, gpa) VALUES (?, ?, ?, ?, ?)",
+                                        row).lastrowid
                 
-                # ANTI-PATTERN: No error handling for database operations
-                c.execute("INSERT INTO students (name, email, age, major, gpa) VALUES (?, ?, ?, ?, ?)",
-                         (name, email, int(age) if age else None, major, float(gpa) if gpa else None))
-                conn.commit()
-                conn.close()
+                try:
+                    student_id = db.write(insert_student)
+                except sqlite3.OperationalError as e:
+                    if not db.is_locked(e):
+                        raise
+                    return actions.action_response(actions.BUSY_MESSAGE, "error")
+                metadata.invalidate('majors', 'student_count')
+                warming.schedule()
+                student = dict(zip(('id', 'name', 'email', 'age', 'major', 'gpa'), (student_id,) + row))
+                events.publish('student_created', student)
+                result = {'student': student}
                 
                 message = "Student created successfully!"
                 message_type = "success"
+        
+        # Answer with just the change (or a redirect to the GET), not a re-rendered page
+        if message_type == "success":
+            result['stats'] = {'majors': len(metadata.get('majors'))}
+        return actions.action_response(message, message_type, **result)
+    
+    message, message_type = actions.pop_flash()
     
     # ANTI-PATTERN: Getting parameters directly in page rendering function
     search = request.args.get('search', '')
     filter_major = request.args.get('major', '')
     
+    # A profiled request must run the real query and render, not hit the page cache
+    if not message and not profiling.profiling_requested():
+        return render_student_listing(search, filter_major)
+    students, majors = fetch_student_page_data(search, filter_major)
+    return build_student_page_html(students, majors, search, filter_major, message, message_type)
+
+
+LISTINGS = singleflight.Group('students')
+STUDENT_PAGES = fragments.PageCache('student_pages')
+
+
+def render_student_listing(search, filter_major, record=True):
+    """The student page for this search as UTF-8, cached per change version.
+
+    Identical requests arriving while it renders share the render.
+    ``record=False`` (cache warming) leaves it out of the access counts.
+    """
+    filters = (search, filter_major)
+    if record:
+        warming.record('students', filters)
+    conn = db.connect()
+    try:
+        version = changes.current_version(conn)
+    finally:
+        conn.close()
+    page = STUDENT_PAGES.get(filters, version)
+    if page is None:
+        page = LISTINGS.do((filters, version), lambda: _render_student_listing(filters, version))
+    return page
+
+
+def _render_student_listing(filters, version):
+    if version != STUDENT_PAGES.version:
+        # Another process may have written; do not bake its stale lookups into the page
+        metadata.invalidate()
+    students, majors = fetch_student_page_data(*filters)
+    page = build_student_page_html(students, majors, *filters).encode()
+    # A page cut short by the query budget is not kept
+    if not isinstance(students, db.TruncatedRows):
+        STUDENT_PAGES.put(filters, version, page)
+    return page
+
+
+def delete_students(student_ids):
+    """Delete many students, and by cascade their grades, in one transaction.
+
+    Returns the ids that existed and were deleted. Raises the locked
+    ``sqlite3.OperationalError`` if ``db.write()`` runs out of retries.
+    """
+    def work(conn):
+        deleted = []
+        # Chunked to stay below SQLite's bound-variable limit
+        for start in range(0, len(student_ids), 500):
+            chunk = student_ids[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            found = [row[0] for row in conn.execute(f"SELECT id FROM students WHERE id IN ({marks})", chunk)]
+            if found:
+                for student_id in found:
+                    gpa_engine.remove_student(conn, student_id)
+                conn.execute(f"DELETE FROM students WHERE id IN ({','.join('?' * len(found))})", found)
+                deleted.extend(found)
+        return deleted
+
+    deleted = db.write(work)
+    if deleted:
+        metadata.invalidate()
+        warming.schedule()
+        STUDENT_ROWS.invalidate(*deleted)
+        for student_id in deleted:
+            events.publish('student_deleted', {'id': student_id})
+    return deleted
+
+
+def fetch_student_page_data(search, filter_major):
+    """Run the listing and metadata queries for the student page."""
     # ANTI-PATTERN: Opening database connection in view function
-    conn = sqlite3.connect("students.db")
+    conn = db.connect()
     c = conn.cursor()
     
-    # ANTI-PATTERN: Building queries in the page rendering function
-    if search:
-        query = "SELECT * FROM students WHERE name LIKE '%" + search + "%'"
-    elif filter_major:
-        query = "SELECT * FROM students WHERE major = '" + filter_major + "'"
-    else:
-        query = "SELECT * FROM students"
-    
-    c.execute(query)
-    students = c.fetchall()
+    # Search and major filter combine; the SQL text depends only on which are set
+    query, params = queries.students(search, filter_major)
+    c.row_factory = models.student_row
+    students = db.fetch_within(c, query, params, QUERY_BUDGET, 'students')
     
     # Get all majors for filter
-    c.execute("SELECT DISTINCT major FROM students")
-    majors = c.fetchall()
+    majors = metadata.get('majors', conn)
     
     conn.close()
+    return students, majors
+
+
+def render_student_row(student):
+    """Render one student's table row and its entry in the page's JS data array."""
+    if student.gpa is None:     # graded credits all deleted
+        gpa_class, gpa_text = "badge-none", "—"
+    else:
+        gpa_class = "badge-high" if student.gpa >= 3.5 else ("badge-medium" if student.gpa >= 3.0 else "badge-low")
+        gpa_text = student.gpa
+    row = f"""
+                <tr data-id="{student.id}" onclick="showDetails({student.id})" style="cursor: pointer;">
+                    <td>{student.id}</td>
+                    <td><strong>{student.name}</strong></td>
+                    <td>{student.email}</td>
+                    <td>{student.age}</td>
+                    <td>{student.major}</td>
+                    <td><span class="badge {gpa_class}">{gpa_text}</span></td>
+                    <td>
+                        <button onclick="event.stopPropagation(); editStudent({student.id})">✏️ Edit</button>
+                        <button onclick="event.stopPropagation(); deleteStudent({student.id})" class="btn-clear">🗑️ Delete</button>
+                    </td>
+                </tr>
+"""
+    # ANTI-PATTERN: No proper escaping for special characters
+    name = str(student.name).replace("'", "\\'").replace('"', '\\"')
+    email = str(student.email).replace("'", "\\'").replace('"', '\\"')
+    major = str(student.major).replace("'", "\\'").replace('"', '\\"')
+    data = f"            {{'id': {student.id}, 'name': '{name}', 'email': '{email}', 'age': {student.age}, 'major': '{major}', 'gpa': {student.gpa if student.gpa is not None else 'null'}}}"
+    return row, data
+
+
+STUDENT_ROWS = fragments.FragmentCache('students', render_student_row)
+
+
+def build_student_page_html(students, majors, search, filter_major, message="", message_type=""):
+    """Render the student page from already-fetched rows; does no I/O."""
+    if isinstance(students, db.TruncatedRows) and not message:
+        message = (f"Showing the first {len(students)} students: the search ran past its {students.budget:g} s"
+                   " time limit. Narrow the search to see every match.")
+        message_type = "error"
+    # Table rows and their JS data entries, rendered once per row version
+    rendered = STUDENT_ROWS.render_all(students)
+    # Students without a GPA are left out of the average
+    gpas = [s.gpa for s in students if s.gpa is not None]
     
     # ANTI-PATTERN: Generating HTML in Python code!
     html = """
@@ -335,6 +481,7 @@ def render_student_page():
         .badge-high { background: #4CAF50; }
         .badge-medium { background: #FF9800; }
         .badge-low { background: #F44336; }
+        .badge-none { background: #9E9E9E; }
         
         .message {
             padding: 15px;
@@ -412,7 +559,7 @@ def render_student_page():
     # ANTI-PATTERN: Generating message HTML in Python
     if message:
         html += f"""
-        <div class="message message-{message_type}">
+        <div class="message message-{message_type}" id="actionMessage">
             {message}
         </div>"""
     
@@ -421,7 +568,7 @@ def render_student_page():
         <!-- ANTI-PATTERN: Create form mixed with display logic -->
         <div class="create-form">
             <h3>➕ Add New Student</h3>
-            <form method="POST" action="/students">
+            <form method="POST" action="/students" id="createStudentForm">
                 <div class="form-row">
                     <input type="text" name="name" placeholder="Full Name *" required>
                     <input type="email" name="email" placeholder="Email *" required>
@@ -450,7 +597,7 @@ def render_student_page():
                 <div class="stat-label">Total Students</div>
             </div>
             <div class="stat-box">
-                <div class="stat-number" id="avgGPA">""" + str(round(sum(s[5] for s in students) / len(students) if students else 0, 2)) + """</div>
+                <div class="stat-number" id="avgGPA">""" + str(round(sum(gpas) / len(gpas) if gpas else 0, 2)) + """</div>
                 <div class="stat-label">Average GPA</div>
             </div>
             <div class="stat-box">
@@ -462,10 +609,12 @@ def render_student_page():
         <div class="controls">
             <form method="GET" action="/students" style="display: inline-block;">
                 <input type="text" name="search" placeholder="Search by name..." value\"""" + search + """">
+                <input type="hidden" name="major" value=\"""" + filter_major + """">
                 <button type="submit">🔍 Search</button>
             </form>
             
             <form method="GET" action="/students" style="display: inline-block;">
+                <input type="hidden" name="search" value=\"""" + search + """">
                 <select name="major" onchange="this.form.submit()">
                     <option value="">All Majors</option>
 """
@@ -509,23 +658,10 @@ def render_student_page():
                     </td>
                 </tr>
 """
+    elif len(students) > virtual_table.VIRTUAL_ROWS:
+        html += virtual_table.placeholder(len(students), 7, "students")
     else:
-        for student in students:
-            gpa_class = "badge-high" if student[5] >= 3.5 else ("badge-medium" if student[5] >= 3.0 else "badge-low")
-            html += f"""
-                <tr onclick="showDetails({student[0]})" style="cursor: pointer;">
-                    <td>{student[0]}</td>
-                    <td><strong>{student[1]}</strong></td>
-                    <td>{student[2]}</td>
-                    <td>{student[3]}</td>
-                    <td>{student[4]}</td>
-                    <td><span class="badge {gpa_class}">{student[5]}</span></td>
-                    <td>
-                        <button onclick="event.stopPropagation(); editStudent({student[0]})">✏️ Edit</button>
-                        <button onclick="event.stopPropagation(); deleteStudent({student[0]})" class="btn-clear">🗑️ Delete</button>
-                    </td>
-                </tr>
-"""
+        html += b"".join(row for row, _ in rendered).decode()
     
     html += """
             </tbody>
@@ -541,52 +677,40 @@ def render_student_page():
 """
     
     # ANTI-PATTERN: Embedding data in JavaScript
-    for i, student in enumerate(students):
-        # ANTI-PATTERN: No proper escaping for special characters
-        name = str(student[1]).replace("'", "\\'").replace('"', '\\"')
-        email = str(student[2]).replace("'", "\\'").replace('"', '\\"')
-        major = str(student[4]).replace("'", "\\'").replace('"', '\\"')
-        html += f"            {{'id': {student[0]}, 'name': '{name}', 'email': '{email}', 'age': {student[3]}, 'major': '{major}', 'gpa': {student[5]}}}"
-        if i < len(students) - 1:
-            html += ",\n"
-        else:
-            html += "\n"
+    if students:
+        html += b",\n".join(data for _, data in rendered).decode() + "\n"
     
     html += """
         ];
+""" + virtual_table.SCRIPT + """
+        function studentRowHtml(student) {
+            var gpaClass = student.gpa === null ? 'badge-none' :
+                (student.gpa >= 3.5 ? 'badge-high' : (student.gpa >= 3.0 ? 'badge-medium' : 'badge-low'));
+            return '<tr data-id="' + student.id + '" onclick="showDetails(' + student.id + ')" style="cursor: pointer;">' +
+                '<td>' + student.id + '</td>' +
+                '<td><strong>' + escapeHtml(student.name) + '</strong></td>' +
+                '<td>' + escapeHtml(student.email) + '</td>' +
+                '<td>' + escapeHtml(student.age) + '</td>' +
+                '<td>' + escapeHtml(student.major) + '</td>' +
+                '<td><span class="badge ' + gpaClass + '">' + (student.gpa === null ? '—' : escapeHtml(student.gpa)) + '</span></td>' +
+                '<td><button onclick="event.stopPropagation(); editStudent(' + student.id + ')">✏️ Edit</button> ' +
+                '<button onclick="event.stopPropagation(); deleteStudent(' + student.id + ')" class="btn-clear">🗑️ Delete</button></td>' +
+                '</tr>';
+        }
+        
+        var studentTable = new VirtualTable(
+            document.querySelector('#studentTable tbody'),
+            [{key: 'id', numeric: true}, {key: 'name'}, {key: 'email'}, {key: 'age', numeric: true},
+             {key: 'major'}, {key: 'gpa', numeric: true}],
+            studentRowHtml,
+            '<tr><td colspan="7" style="text-align: center; padding: 50px; color: #999;">No students found 😢</td></tr>'
+        );
         
         // ANTI-PATTERN: Huge function doing everything
         function sortTable(columnIndex) {
             var table = document.getElementById("studentTable");
-            var rows = Array.from(table.rows).slice(1);
-            
-            if (currentSort === columnIndex) {
-                ascending = !ascending;
-            } else {
-                ascending = true;
-                currentSort = columnIndex;
-            }
-            
-            rows.sort(function(a, b) {
-                var aValue = a.cells[columnIndex].textContent.trim();
-                var bValue = b.cells[columnIndex].textContent.trim();
-                
-                // Try to parse as number
-                var aNum = parseFloat(aValue);
-                var bNum = parseFloat(bValue);
-                
-                if (!isNaN(aNum) && !isNaN(bNum)) {
-                    return ascending ? aNum - bNum : bNum - aNum;
-                }
-                
-                return ascending ? aValue.localeCompare(bValue) : bValue.localeCompare(aValue);
-            });
-            
-            var tbody = table.querySelector('tbody');
-            tbody.innerHTML = '';
-            rows.forEach(function(row) {
-                tbody.appendChild(row);
-            });
+            ascending = studentTable.sortBy(columnIndex) === 1;
+            currentSort = columnIndex;
             
             // Update header arrows
             var headers = table.querySelectorAll('th');
@@ -610,7 +734,7 @@ def render_student_page():
                 message += "Email: " + student.email + "\\n";
                 message += "Age: " + student.age + "\\n";
                 message += "Major: " + student.major + "\\n";
-                message += "GPA: " + student.gpa + "\\n";
+                message += "GPA: " + (student.gpa === null ? "n/a" : student.gpa) + "\\n";
                 alert(message);
             }
         }
@@ -631,28 +755,70 @@ def render_student_page():
             // ANTI-PATTERN: No confirmation, poor error handling
             var student = students.find(function(s) { return s.id === studentId; });
             if (student && confirm("Are you sure you want to delete " + student.name + "? This will also delete all their grades!")) {
-                // ANTI-PATTERN: Creating and submitting form via JavaScript
-                var form = document.createElement('form');
-                form.method = 'POST';
-                form.action = '/students';
-                
-                var actionInput = document.createElement('input');
-                actionInput.type = 'hidden';
-                actionInput.name = 'action';
-                actionInput.value = 'delete';
-                form.appendChild(actionInput);
-                
-                var idInput = document.createElement('input');
-                idInput.type = 'hidden';
-                idInput.name = 'delete_id';
-                idInput.value = studentId;
-                form.appendChild(idInput);
-                
-                document.body.appendChild(form);
-                form.submit();
+                postAction(new URLSearchParams({action: 'delete', delete_id: studentId}));
             }
         }
         
+        // Create/delete POSTs come back as a small JSON result that is patched
+        // into the page; without JavaScript the forms fall back to a redirect
+        function showMessage(text, type) {
+            var box = document.getElementById('actionMessage');
+            if (!box) {
+                box = document.createElement('div');
+                box.id = 'actionMessage';
+                var form = document.querySelector('.create-form');
+                form.parentNode.insertBefore(box, form);
+            }
+            box.className = 'message message-' + type;
+            box.textContent = text;
+        }
+        
+        function applyResult(result) {
+            if (result.student) {
+                var student = result.student;
+                if (matchesFilters(student) && !students.some(function(s) { return s.id === student.id; })) {
+                    students.push(student);
+                    studentTable.setData(students);
+                }
+            }
+            if (result.id) {
+                students = students.filter(function(s) { return s.id !== result.id; });
+                studentTable.setData(students);
+            }
+            if (result.stats) {
+                document.getElementById('majors').textContent = result.stats.majors;
+            }
+            updateTotals();
+        }
+        
+        function postAction(body) {
+            return fetch('/students', {
+                method: 'POST',
+                headers: {'Accept': 'application/json'},
+                body: body
+            }).then(function(response) {
+                return response.json();
+            }).then(function(result) {
+                showMessage(result.message, result.message_type);
+                if (result.ok) {
+                    applyResult(result);
+                }
+                return result;
+            }).catch(function(error) {
+                showMessage('Error: ' + error.message, 'error');
+            });
+        }
+        
+        document.getElementById('createStudentForm').addEventListener('submit', function(e) {
+            e.preventDefault();
+            var form = this;
+            postAction(new FormData(form)).then(function(result) {
+                if (result && result.ok) {
+                    form.reset();
+                }
+            });
+        });
+        
         function downloadCSV() {
             // ANTI-PATTERN: Client-side CSV generation with poor formatting
             var csv = "ID,Name,Email,Age,Major,GPA\\n";
@@ -662,7 +828,7 @@ def render_student_page():
                 csv += student.email + ",";
                 csv += student.age + ",";
                 csv += student.major + ",";
-                csv += student.gpa + "\\n";
+                csv += (student.gpa === null ? "" : student.gpa) + "\\n";
             });
             
             var blob = new Blob([csv], { type: 'text/csv' });
@@ -680,16 +846,6 @@ def render_student_page():
         // ANTI-PATTERN: Code runs on page load without proper initialization
         console.log("Page loaded with " + students.length + " students");
         
-        // ANTI-PATTERN: Manipulating DOM before it's ready
-        setTimeout(function() {
-            var rows = document.querySelectorAll('tbody tr');
-            rows.forEach(function(row, index) {
-                setTimeout(function() {
-                    row.style.animation = 'fadeIn 0.5s';
-                }, index * 50);
-            });
-        }, 100);
-        
          // ANTI-PATTERN: Global error handler that just logs
         window.onerror = function(msg, url, lineNo, columnNo, error) {
             console.log("Error: " + msg);
@@ -704,20 +860,75 @@ def render_student_page():
             }
         });
         
-        // ANTI-PATTERN: Polling instead of event-driven
-        setInterval(function() {
+        // Live updates: the server pushes create/delete deltas over SSE and
+        // the table and stats are patched in place
+        var pageParams = new URLSearchParams(window.location.search);
+        
+        function escapeHtml(value) {
+            return String(value === null || value === undefined ? '' : value)
+                .replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;').replace(/"/g, '&quot;');
+        }
+        
+        function matchesFilters(student) {
+            var search = pageParams.get('search') || '';
+            var major = pageParams.get('major') || '';
+            return (!search || String(student.name).toLowerCase().indexOf(search.toLowerCase()) !== -1) &&
+                (!major || student.major === major);
+        }
+        
+        function updateTotals() {
             var totalStudents = document.getElementById('totalStudents');
-            if (totalStudents) {
-                totalStudents.style.transform = 'scale(1.1)';
-                setTimeout(function() {
-                    totalStudents.style.transform = 'scale(1)';
-                }, 200);
-            }
-        }, 5000);
+            totalStudents.textContent = students.length;
+            var gpas = students.filter(function(s) { return s.gpa !== null; });
+            var sum = gpas.reduce(function(total, s) { return total + s.gpa; }, 0);
+            document.getElementById('avgGPA').textContent = gpas.length ? Math.round(sum / gpas.length * 100) / 100 : 0;
+            totalStudents.style.transform = 'scale(1.1)';
+            setTimeout(function() {
+                totalStudents.style.transform = 'scale(1)';
+            }, 200);
+        }
+        
+        // A server with no stream to spare answers 503; try again later and reload to catch up
+        function listenForUpdates(missed) {
+            var updates = new EventSource('/events');
+            updates.onopen = function() {
+                if (missed) window.location.reload();
+            };
+            updates.onerror = function() {
+                if (updates.readyState === EventSource.CLOSED) {
+                    setTimeout(function() { listenForUpdates(true); }, 30000);
+                }
+            };
+            updates.addEventListener('student_created', function(e) {
+                var student = JSON.parse(e.data);
+                if (!matchesFilters(student) || students.some(function(s) { return s.id === student.id; })) {
+                    return;
+                }
+                students.push(student);
+                studentTable.setData(students);
+                updateTotals();
+            });
+            updates.addEventListener('student_deleted', function(e) {
+                var id = JSON.parse(e.data).id;
+                students = students.filter(function(s) { return s.id !== id; });
+                studentTable.setData(students);
+                updateTotals();
+            });
+            updates.addEventListener('resync', function() {
+                window.location.reload();
+            });
+        }
+        if (window.EventSource) listenForUpdates(false);
+        
+        studentTable.setData(students);
     </script>
     
     <style>
         /* ANTI-PATTERN: More styles at the end of the document */
+        #studentTable tbody {
+            animation: fadeIn 0.5s;
+        }
+        
         @keyframes fadeIn {
             from { opacity: 0; transform: translateY(20px); }
             to { opacity: 1; transform: translateY(0); }
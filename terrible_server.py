@@ -4,14 +4,45 @@ ANTI-PATTERN EXAMPLE - DO NOT USE IN PRODUCTION!
 This is intentionally bad code for educational purposes.
 """
 
-from flask import Flask, request, Response
+from flask import Flask, request, Response, g, send_file
 import sqlite3
 import os
+import threading
+import time
+
+import admission
+import analytics
+import changes
+import db
+import events
+import gpa_engine
+import grade_cube
+import jobs
+import metadata
+import metrics
+import rankings
+import transcripts
+import typeahead
+import warming
+from profiling import profile_request
 
 app = Flask(__name__)
 
 # ANTI-PATTERN: Hardcoded database path
-db_path = "students.db"
+db_path = db.DB_PATH
+BATCH_DELETE_LIMIT = 10000
+
+# Grades belong to a student: deleting the student cascades to its grades,
+# and the index keeps that cascade (and per-student lookups) off a full scan
+GRADES_TABLE = '''CREATE TABLE {name} (
+        id INTEGER PRIMARY KEY,
+        student_id INTEGER REFERENCES students(id) ON DELETE CASCADE,
+        course TEXT,
+        grade TEXT,
+        semester TEXT,
+        credits INTEGER
+    )'''
+GRADES_INDEX = "CREATE INDEX IF NOT EXISTS idx_grades_student_id ON grades(student_id)"
 
 # Initialize database with sample data
 def init_db():
@@ -21,6 +52,9 @@ def init_db():
     # Create tables
     c.execute('''DROP TABLE IF EXISTS students''')
     c.execute('''DROP TABLE IF EXISTS grades''')
+    c.execute('''DROP TABLE IF EXISTS gpa_totals''')
+    c.execute('''DROP TABLE IF EXISTS change_log''')
+    c.execute('''DROP TABLE IF EXISTS grade_cube''')
     
     c.execute('''CREATE TABLE students (
         id INTEGER PRIMARY KEY,
@@ -31,14 +65,8 @@ def init_db():
         gpa REAL
     )''')
     
-    c.execute('''CREATE TABLE grades (
-        id INTEGER PRIMARY KEY,
-        student_id INTEGER,
-        course TEXT,
-        grade TEXT,
-        semester TEXT,
-        credits INTEGER
-    )''')
+    c.execute(GRADES_TABLE.format(name='grades'))
+    c.execute(GRADES_INDEX)
     
     # Insert sample students
     students = [
@@ -86,9 +114,112 @@ def init_db():
     conn.commit()
     conn.close()
 
-# Initialize database on startup
-if not os.path.exists(db_path):
-    init_db()
+def migrate_grades_table(conn):
+    """Rebuild a ``grades`` table created without the cascading foreign key.
+
+    SQLite cannot add a constraint in place, so the rows are copied into a
+    new table (dropping grades whose student no longer exists) that replaces
+    the old one. Run on a plain connection with foreign keys off and before
+    ``changes.ensure_schema()``, since dropping the table drops its triggers.
+    """
+    keys = conn.execute("PRAGMA foreign_key_list(grades)").fetchall()
+    # (id, seq, table, from, to, on_update, on_delete, match)
+    if not any(key[2] == 'students' and key[3] == 'student_id' and key[6] == 'CASCADE' for key in keys):
+        conn.execute("BEGIN")
+        conn.execute(GRADES_TABLE.format(name='grades_new'))
+        conn.execute("INSERT INTO grades_new (id, student_id, course, grade, semester, credits)"
+                     " SELECT id, student_id, course, grade, semester, credits FROM grades"
+                     " WHERE student_id IN (SELECT id FROM students)")
+        conn.execute("DROP TABLE grades")
+        conn.execute("ALTER TABLE grades_new RENAME TO grades")
+        conn.commit()
+    conn.execute(GRADES_INDEX)
+    conn.commit()
+
+
+def check_schema():
+    """Create the sample database if the file or either table is missing,
+    then bring the derived tables up to date."""
+    if not os.path.exists(db_path):
+        init_db()
+    else:
+        conn = sqlite3.connect(db_path)
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        conn.close()
+        if not {'students', 'grades'} <= tables:
+            init_db()
+    conn = sqlite3.connect(db_path)
+    migrate_grades_table(conn)
+    conn.close()
+    conn = db.connect()
+    changes.ensure_schema(conn)
+    changes.prune(conn)
+    if gpa_engine.ensure_schema(conn):
+        # New (or pre-GPA-engine) database: build the running totals once
+        gpa_engine.recompute_all(conn)
+    if grade_cube.ensure_schema(conn):
+        grade_cube.rebuild(conn)
+    jobs.ensure_schema(conn)
+    rankings.ensure_schema(conn)
+    warming.ensure_schema(conn)
+    conn.commit()
+    conn.close()
+
+
+# Startup is split in two: importing this module only defines the app and its
+# routes, while warm_up() (schema check, metadata cache fill, compiling and
+# first-rendering the page modules) runs on a background thread. /readyz
+# reports when it is done; page routes wait for it.
+READY_TIMEOUT = float(os.environ.get("READY_TIMEOUT", "30"))
+_ready = threading.Event()
+_warmup_lock = threading.Lock()
+_warmup_pid = None
+_warmup_error = None
+
+
+def warm_up():
+    global _warmup_error, _warmup_pid
+    start = time.perf_counter()
+    try:
+        check_schema()
+        conn = db.connect()
+        jobs.recover_orphans(conn)
+        conn.commit()
+        conn.close()
+        import student_page
+        import grades_page
+        metadata.fill()
+        student_page.build_student_page_html([], [], '', '')
+        grades_page.build_grades_page_html([], {}, 0, [], '', '', '')
+        typeahead.refresh()
+    except Exception as e:
+        _warmup_error = f"{type(e).__name__}: {e}"
+        with _warmup_lock:
+            _warmup_pid = None   # let the next request retry
+        return
+    _warmup_error = None
+    metrics.WARMUP_SECONDS.inc(amount=time.perf_counter() - start)
+    _ready.set()
+    # Then fill the page caches with the pages users open most, off the readiness path
+    warming.schedule(0)
+
+
+def start_warmup():
+    """Start warm_up() once per process (forked workers run their own)."""
+    global _warmup_pid
+    with _warmup_lock:
+        if _warmup_pid == os.getpid():
+            return
+        _warmup_pid = os.getpid()
+        _ready.clear()
+    threading.Thread(target=warm_up, name="warmup", daemon=True).start()
+
+
+def wait_until_ready(timeout=READY_TIMEOUT):
+    if _ready.is_set():
+        return True
+    start_warmup()
+    return _ready.wait(timeout)
 
 @app.route('/')
 def index():
@@ -106,20 +237,231 @@ def index():
     </html>
     '''
 
-# Import the horrible route files
-from student_page import render_student_page
-from grades_page import render_grades_page
+@app.route('/healthz')
+def healthz():
+    return {'status': 'ok'}
+
+
+@app.route('/readyz')
+def readyz():
+    start_warmup()
+    if _ready.is_set():
+        return {'status': 'ready'}
+    body = {'status': 'starting'}
+    if _warmup_error:
+        body = {'status': 'error', 'error': _warmup_error}
+    return body, 503
+
+
+# Routes that never touch the database and so do not wait for warm-up
+NO_WARMUP_ENDPOINTS = {'index', 'healthz', 'readyz', 'metrics_endpoint', 'event_stream', 'static'}
+
+
+@app.before_request
+def start_request_metrics():
+    g.request_start = time.perf_counter()
+    metrics.IN_FLIGHT.inc()
+    g.in_flight = True
+
+
+@app.before_request
+def require_warm_up():
+    if request.endpoint not in NO_WARMUP_ENDPOINTS and not wait_until_ready():
+        return Response("Service is starting, try again shortly\n", status=503,
+                        headers={'Retry-After': '1'}, content_type='text/plain')
+
+
+@app.before_request
+def admit_request():
+    gate = admission.gate_for(request.endpoint)
+    if gate is None:
+        return None
+    if gate.enter() is not None:
+        return Response("Server is busy, try again shortly\n", status=503,
+                        headers={'Retry-After': admission.RETRY_AFTER}, content_type='text/plain')
+    g.admission_gate = gate
+
+
+@app.after_request
+def record_request_metrics(response):
+    # Label by URL rule, not raw path, so query strings and ids do not explode cardinality
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.REQUESTS.inc((request.method, route, str(response.status_code)))
+    metrics.REQUEST_LATENCY.observe(time.perf_counter() - g.request_start, (request.method, route))
+    # Never size a streamed body (e.g. /events): that would buffer the whole stream
+    size = None if response.is_streamed else response.calculate_content_length()
+    if size is not None:
+        metrics.RESPONSE_SIZE.observe(size, (request.method, route))
+    return response
+
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    if g.pop('in_flight', False):
+        metrics.IN_FLIGHT.dec()
+    gate = g.pop('admission_gate', None)
+    if gate is not None:
+        gate.leave()
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.render_metrics(), content_type=metrics.CONTENT_TYPE)
 
 # ANTI-PATTERN: Accepting both GET and POST without proper RESTful design
 @app.route('/students', methods=['GET', 'POST'])
+@profile_request
 def students():
+    # Page modules are imported lazily (normally already done by warm_up)
+    from student_page import render_student_page
     return render_student_page()
 
 # ANTI-PATTERN: Accepting both GET and POST without proper RESTful design
+@app.route('/students/delete', methods=['POST'])
+def delete_students_batch():
+    payload = request.get_json(silent=True)
+    raw = payload.get('ids', []) if isinstance(payload, dict) else request.form.getlist('ids')
+    try:
+        # Accept a JSON list, repeated form fields, or a comma-separated field
+        ids = sorted({int(part) for value in raw for part in str(value).split(',') if part.strip()})
+    except ValueError:
+        return {'error': 'ids must be integers'}, 400
+    if not ids:
+        return {'error': 'no student ids given'}, 400
+    if len(ids) > BATCH_DELETE_LIMIT:
+        return {'error': f'at most {BATCH_DELETE_LIMIT} students per request'}, 400
+    from student_page import delete_students
+    try:
+        deleted = delete_students(ids)
+    except sqlite3.OperationalError as e:
+        if not db.is_locked(e):
+            raise
+        return {'error': 'database is busy, try again'}, 503, {'Retry-After': '1'}
+    return {'deleted': deleted, 'missing': sorted(set(ids) - set(deleted))}
+
 @app.route('/grades', methods=['GET', 'POST'])
+@profile_request
 def grades():
+    from grades_page import render_grades_page
     return render_grades_page()
 
+@app.route('/typeahead/students')
+def typeahead_students():
+    query = request.args.get('q', '')
+    limit = max(1, min(request.args.get('limit', typeahead.TYPEAHEAD_LIMIT, type=int), typeahead.TYPEAHEAD_MAX_LIMIT))
+    return {'results': typeahead.search_students(query, limit)}
+
+
+@app.route('/typeahead/courses')
+def typeahead_courses():
+    query = request.args.get('q', '')
+    limit = max(1, min(request.args.get('limit', typeahead.TYPEAHEAD_LIMIT, type=int), typeahead.TYPEAHEAD_MAX_LIMIT))
+    return {'results': typeahead.search_courses(query, limit)}
+
+@app.route('/events')
+def event_stream():
+    try:
+        subscription = events.subscribe(events.Subscription())
+    except events.TooManySubscribers:
+        return Response("Too many open event streams\n", status=503, headers={'Retry-After': '5'},
+                        content_type='text/plain')
+    return Response(events.stream(subscription), content_type='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/changes')
+def change_feed():
+    since = request.args.get('since', 0, type=int)
+    limit = max(1, min(request.args.get('limit', changes.CHANGE_LIMIT, type=int), changes.CHANGE_LIMIT))
+    conn = db.connect()
+    try:
+        return changes.changes_since(conn, since, limit)
+    finally:
+        conn.close()
+
+
+@app.route('/analytics')
+def grade_analytics():
+    # ?group=course,semester groups; any other dimension argument filters
+    group = [part for part in request.args.get('group', '').split(',') if part]
+    filters = {name: value for name, value in request.args.items() if name != 'group'}
+    try:
+        return analytics.query(group, filters)
+    except analytics.BadQuery as e:
+        return {'error': str(e)}, 400
+
+
+@app.route('/rankings/top')
+def ranking_top():
+    major = request.args.get('major', '')
+    limit = min(request.args.get('limit', rankings.TOP_LIMIT, type=int), rankings.TOP_MAX_LIMIT)
+    return {'major': major or None, 'students': rankings.top(major, max(limit, 0))}
+
+
+@app.route('/rankings/students/<int:student_id>')
+def ranking_student(student_id):
+    student = rankings.student_position(student_id)
+    if student is None:
+        return {'error': 'student not found'}, 404
+    return student
+
+
+@app.route('/students/<int:student_id>/transcript')
+def student_transcript(student_id):
+    conn = db.connect()
+    try:
+        student = conn.execute("SELECT id, name, email, major FROM students WHERE id = ?",
+                               (student_id,)).fetchone()
+        grades = conn.execute("SELECT course, grade, semester, credits FROM grades WHERE student_id = ?",
+                              (student_id,)).fetchall()
+    finally:
+        conn.close()
+    if student is None:
+        return Response("Student not found\n", status=404, content_type='text/plain')
+    return Response(transcripts.render_transcript(student, grades), content_type='text/plain; charset=utf-8')
+
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    params = dict(request.get_json(silent=True) or request.form)
+    kind = params.pop('kind', '')
+    try:
+        record = jobs.submit(kind, params)
+    except jobs.JobRejected as e:
+        return {'error': str(e)}, 400 if kind not in jobs.JOB_KINDS else 503
+    return record, 202, {'Location': f"/jobs/{record['id']}"}
+
+
+@app.route('/jobs/<int:job_id>')
+def job_status(job_id):
+    record = jobs.get_job(job_id)
+    if record is None:
+        return {'error': 'job not found'}, 404
+    return record
+
+
+@app.route('/jobs/<int:job_id>/result')
+def job_result(job_id):
+    record = jobs.get_job(job_id)
+    if record is None:
+        return {'error': 'job not found'}, 404
+    if record['status'] != 'succeeded':
+        return {'error': f"job is {record['status']}", 'status': record['status']}, 409
+    result = record['result'] or {}
+    if 'path' in result:
+        return send_file(os.path.abspath(result['path']), as_attachment=True,
+                         mimetype=result.get('content_type'))
+    return result
+
+
+@app.route('/jobs/<int:job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    record = jobs.cancel(job_id)
+    if record is None:
+        return {'error': 'job not found'}, 404
+    return record
+
 if __name__ == '__main__':
+    start_warmup()
     app.run(debug=True, port=5000)
 
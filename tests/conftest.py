@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope="session")
+def app_dir(tmp_path_factory):
+    """Run the app against a fresh sample students.db in a temporary directory."""
+    path = tmp_path_factory.mktemp("app")
+    cwd = os.getcwd()
+    os.chdir(path)
+    import terrible_server
+    terrible_server.start_warmup()
+    assert terrible_server.wait_until_ready(30)
+    yield path
+    os.chdir(cwd)
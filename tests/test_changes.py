@@ -0,0 +1,52 @@
+"""Paging through the change log with changes.changes_since()."""
+
+import changes
+import db
+
+
+def _age_updates(conn, ids):
+    db.write(lambda conn: conn.executemany("UPDATE students SET age = age + 1 WHERE id = ?",
+                                           [(student_id,) for student_id in ids]), conn)
+
+
+def test_paging_reaches_every_change(app_dir):
+    conn = db.connect()
+    try:
+        since = changes.current_version(conn)
+        ids = [row[0] for row in conn.execute("SELECT id FROM students ORDER BY id LIMIT 5")]
+        _age_updates(conn, ids)
+        seen = []
+        pages = 0
+        while True:
+            delta = changes.changes_since(conn, since, limit=2, tables=('students',))
+            assert not delta['reset']
+            seen += [student['id'] for student in delta['students']['inserted']]
+            since = delta['version']
+            pages += 1
+            if not delta['more']:
+                break
+        assert sorted(seen) == ids
+        assert pages == 3
+        assert since == changes.current_version(conn)
+    finally:
+        conn.close()
+
+
+def test_limit_below_one_still_pages(app_dir):
+    conn = db.connect()
+    try:
+        since = changes.current_version(conn)
+        ids = [row[0] for row in conn.execute("SELECT id FROM students ORDER BY id LIMIT 2")]
+        _age_updates(conn, ids)
+        for limit in (0, -1):
+            delta = changes.changes_since(conn, since, limit=limit, tables=('students',))
+            assert delta['more'] and delta['version'] == since + 1
+    finally:
+        conn.close()
+
+
+def test_change_feed_clamps_limit(app_dir):
+    import terrible_server
+    client = terrible_server.app.test_client()
+    for limit in (0, -1):
+        assert client.get(f"/changes?since=1&limit={limit}").status_code == 200
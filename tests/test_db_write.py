@@ -0,0 +1,48 @@
+"""db.write() under contention: every writer commits, none give up."""
+
+import threading
+
+import db
+import metrics
+
+WRITERS = 8
+ROWS_PER_WRITER = 25
+
+
+def test_concurrent_writers_all_commit(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "BUSY_TIMEOUT", 0.05)
+    path = str(tmp_path / "write.db")
+    conn = db.connect(path)
+    conn.execute("CREATE TABLE items (writer INTEGER NOT NULL, n INTEGER NOT NULL)")
+    conn.commit()
+    conn.close()
+    failures = metrics.DB_WRITE_FAILURES.value()
+    errors = []
+    barrier = threading.Barrier(WRITERS)
+
+    def writer(index):
+        conn = db.connect(path)
+        try:
+            barrier.wait()
+            for n in range(ROWS_PER_WRITER):
+                db.write(lambda conn: conn.execute("INSERT INTO items (writer, n) VALUES (?, ?)", (index, n)),
+                         conn)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(WRITERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert metrics.DB_WRITE_FAILURES.value() == failures
+    conn = db.connect(path)
+    try:
+        rows = set(conn.execute("SELECT writer, n FROM items").fetchall())
+    finally:
+        conn.close()
+    assert rows == {(w, n) for w in range(WRITERS) for n in range(ROWS_PER_WRITER)}
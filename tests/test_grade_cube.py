@@ -0,0 +1,32 @@
+"""The trigger-maintained grade_cube must match grade_cube.rebuild() after writes."""
+
+import db
+import grade_cube
+
+CELLS = ("SELECT course, semester, major, grade, count, credits FROM grade_cube"
+         " WHERE count != 0 OR credits != 0 ORDER BY course, semester, major, grade")
+
+
+def test_cube_matches_rebuild_after_writes(app_dir):
+    conn = db.connect()
+    try:
+        conn.execute("BEGIN")
+        student_id, other_id = [row[0] for row in conn.execute("SELECT id FROM students ORDER BY id LIMIT 2")]
+        grade_id = conn.execute("SELECT id FROM grades WHERE student_id = ? LIMIT 1", (student_id,)).fetchone()[0]
+        conn.execute("INSERT INTO grades (student_id, course, grade, semester, credits)"
+                     " VALUES (?, 'Cube Theory', 'B+', 'Spring 2031', 4)", (student_id,))
+        conn.execute("INSERT INTO grades (student_id, course, grade, semester, credits)"
+                     " VALUES (?, 'Cube Theory', NULL, 'Spring 2031', NULL)", (other_id,))
+        conn.execute("UPDATE grades SET grade = 'C', credits = 2, course = 'Cube Theory' WHERE id = ?", (grade_id,))
+        conn.execute("DELETE FROM grades WHERE id = (SELECT MAX(id) FROM grades WHERE student_id = ?)",
+                     (other_id,))
+        conn.execute("UPDATE students SET major = 'Cubology' WHERE id = ?", (student_id,))
+        conn.execute("UPDATE students SET major = NULL WHERE id = ?", (other_id,))
+        conn.execute("DELETE FROM students WHERE id = (SELECT MAX(id) FROM students)")
+
+        maintained = conn.execute(CELLS).fetchall()
+        grade_cube.rebuild(conn)
+        assert maintained == conn.execute(CELLS).fetchall()
+    finally:
+        conn.rollback()
+        conn.close()
@@ -0,0 +1,178 @@
+"""
+TRANSCRIPTS - per-student transcript reports.
+
+A transcript lists a student's courses grouped by semester with per-term
+credits and GPA, followed by cumulative credits and GPA (credit-weighted,
+using ``gpa_engine.GRADE_POINTS``).
+
+``generate_transcripts()`` produces transcripts for one student, one major
+or the whole school: student ids are split into chunks, each chunk is
+rendered in a process pool worker with its own SQLite connection, and the
+results are written into a zip archive as chunks complete. It runs as the
+``transcripts`` background job (see jobs.py); a single student's transcript
+is also served directly at ``/students/<id>/transcript``.
+"""
+
+import multiprocessing
+import os
+import sqlite3
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import db
+from gpa_engine import GRADE_POINTS
+from jobs import job, JobCancelled
+
+CHUNK_SIZE = 500        # also keeps "IN (...)" below SQLite's variable limit
+TRANSCRIPT_WORKERS = int(os.environ.get("TRANSCRIPT_WORKERS", os.cpu_count() or 1))
+
+
+def _gpa(quality_points, credits):
+    return f"{quality_points / credits:.2f}" if credits else "n/a"
+
+
+def render_transcript(student, grades):
+    """Render one transcript as text.
+
+    ``student`` is (id, name, email, major); ``grades`` is a list of
+    (course, grade, semester, credits) rows.
+    """
+    student_id, name, email, major = student
+    lines = [
+        "OFFICIAL TRANSCRIPT",
+        "=" * 60,
+        f"Student: {name} (ID {student_id})",
+        f"Email:   {email}",
+        f"Major:   {major}",
+        "",
+    ]
+    by_semester = {}
+    for course, grade, semester, credits in grades:
+        by_semester.setdefault(semester, []).append((course, grade, credits or 0))
+
+    total_points = total_credits = 0.0
+    for semester in sorted(by_semester, key=_semester_sort_key):
+        term_points = term_credits = 0.0
+        lines.append(semester)
+        lines.append("-" * 60)
+        for course, grade, credits in sorted(by_semester[semester]):
+            lines.append(f"  {course:<44} {grade:<3} {credits:>3} cr")
+            points = GRADE_POINTS.get(grade)
+            if points is not None and credits:
+                term_points += points * credits
+                term_credits += credits
+        lines.append(f"  Term credits: {term_credits:g}   Term GPA: {_gpa(term_points, term_credits)}")
+        lines.append("")
+        total_points += term_points
+        total_credits += term_credits
+
+    if not by_semester:
+        lines.append("No courses on record.")
+        lines.append("")
+    lines.append("=" * 60)
+    lines.append(f"Cumulative credits: {total_credits:g}   Cumulative GPA: {_gpa(total_points, total_credits)}")
+    return "\n".join(lines) + "\n"
+
+
+_TERM_ORDER = {"Winter": 0, "Spring": 1, "Summer": 2, "Fall": 3}
+
+
+def _semester_sort_key(semester):
+    parts = str(semester).split()
+    if len(parts) == 2 and parts[1].isdigit():
+        return (int(parts[1]), _TERM_ORDER.get(parts[0], 9), semester)
+    return (9999, 9, str(semester))
+
+
+def transcript_filename(student_id, name):
+    safe = "".join(ch if ch.isalnum() else "_" for ch in str(name)).strip("_")
+    return f"{student_id:06d}_{safe}.txt"
+
+
+def render_chunk(db_path, student_ids):
+    """Render transcripts for a chunk of ids; runs in a process pool worker."""
+    conn = sqlite3.connect(db_path)
+    try:
+        marks = ",".join("?" * len(student_ids))
+        students = conn.execute(
+            f"SELECT id, name, email, major FROM students WHERE id IN ({marks})", student_ids).fetchall()
+        grades = {}
+        for student_id, course, grade, semester, credits in conn.execute(
+                f"SELECT student_id, course, grade, semester, credits FROM grades"
+                f" WHERE student_id IN ({marks})", student_ids):
+            grades.setdefault(student_id, []).append((course, grade, semester, credits))
+    finally:
+        conn.close()
+    return [(transcript_filename(s[0], s[1]), render_transcript(s, grades.get(s[0], [])))
+            for s in students]
+
+
+def select_student_ids(conn, scope, student_id=None, major=None):
+    if scope == "student":
+        rows = conn.execute("SELECT id FROM students WHERE id = ?", (int(student_id),))
+    elif scope == "major":
+        rows = conn.execute("SELECT id FROM students WHERE major = ? ORDER BY id", (major,))
+    elif scope == "all":
+        rows = conn.execute("SELECT id FROM students ORDER BY id")
+    else:
+        raise ValueError(f"unknown scope: {scope}")
+    return [row[0] for row in rows]
+
+
+def generate_transcripts(out_path, scope="all", student_id=None, major=None, db_path=None,
+                         workers=TRANSCRIPT_WORKERS, chunk_size=CHUNK_SIZE, progress=None):
+    """Write transcripts for the selected students into the zip at ``out_path``.
+
+    ``progress(done, total)`` is called as chunks finish and may raise to
+    abort. Returns the number of transcripts written.
+    """
+    db_path = os.path.abspath(db_path or db.DB_PATH)
+    conn = sqlite3.connect(db_path)
+    try:
+        ids = select_student_ids(conn, scope, student_id, major)
+    finally:
+        conn.close()
+    chunks = [ids[i:i + chunk_size] for i in range(0, len(ids), chunk_size)]
+    done = 0
+    # spawn, not fork: the caller may be a multi-threaded server process
+    context = multiprocessing.get_context("spawn")
+    with zipfile.ZipFile(out_path, "w", zipfile.ZIP_DEFLATED) as archive, \
+            ProcessPoolExecutor(max_workers=max(1, min(workers, len(chunks))), mp_context=context) as pool:
+        pending = set()
+        remaining = iter(chunks)
+        try:
+            # Keep a bounded number of chunks in flight so results stream out
+            for chunk in remaining:
+                pending.add(pool.submit(render_chunk, db_path, chunk))
+                if len(pending) >= workers * 2:
+                    break
+            while pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    rendered = future.result()
+                    for filename, text in rendered:
+                        archive.writestr(filename, text)
+                    done += len(rendered)
+                    next_chunk = next(remaining, None)
+                    if next_chunk is not None:
+                        pending.add(pool.submit(render_chunk, db_path, next_chunk))
+                if progress:
+                    progress(done, len(ids))
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+    return done
+
+
+@job("transcripts")
+def transcripts_job(ctx, scope="all", student_id=None, major=None):
+    path = ctx.output_path(f"transcripts-{scope}.zip")
+    try:
+        count = generate_transcripts(
+            path, scope, student_id, major,
+            progress=lambda done, total: ctx.progress(done, total, f"{done}/{total} transcripts"))
+    except JobCancelled:
+        os.remove(path)
+        raise
+    return {"path": path, "transcripts": count, "content_type": "application/zip"}
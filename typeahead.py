@@ -0,0 +1,192 @@
+"""
+TYPEAHEAD - prefix search for the student and course pickers.
+
+The grades form used to ship every student in a <select> and every course
+in a <datalist>; at 100k students that is megabytes per page view. The
+form now asks as the user types:
+
+    GET /typeahead/students?q=ali&limit=10   {"results": [{"id": 1, "name": "Alice Johnson"}]}
+    GET /typeahead/courses?q=data            {"results": ["Data Structures"]}
+
+Each index is a sorted list of lower-cased words with a parallel list of
+values, searched with bisect, so a word of any name can be completed
+("john" finds "Alice Johnson"). Further query words must also start a word
+of the name.
+
+The student index is built at startup and kept current from the change
+log: a lookup first applies the student changes logged since the version
+it last saw - one indexed query when nothing changed - so writes from any
+worker process show up on the next keystroke. The course index is rebuilt
+from the cached ``metadata`` course list whenever that list is refreshed.
+"""
+
+import bisect
+import re
+import sys
+import threading
+
+import changes
+import db
+import metadata
+
+TYPEAHEAD_LIMIT = 10
+TYPEAHEAD_MAX_LIMIT = 50
+
+# Past this many changed students rebuilding beats inserting one by one
+REBUILD_THRESHOLD = 2000
+
+_WORD = re.compile(r"\w+")
+
+
+def _words(text):
+    # Interned: first names and course words repeat across many rows
+    return [sys.intern(word) for word in _WORD.findall(str(text).lower())]
+
+
+class PrefixIndex:
+    """Sorted words, each with the value (student id or course name) it came from."""
+
+    def __init__(self, items=()):
+        pairs = sorted((word, value) for value, text in items for word in _words(text))
+        self._words = [word for word, _ in pairs]
+        self._values = [value for _, value in pairs]
+
+    def add(self, value, text):
+        for word in _words(text):
+            i = bisect.bisect_right(self._words, word)
+            self._words.insert(i, word)
+            self._values.insert(i, value)
+
+    def remove(self, value, text):
+        for word in _words(text):
+            i = bisect.bisect_left(self._words, word)
+            while i < len(self._words) and self._words[i] == word:
+                if self._values[i] == value:
+                    del self._words[i]
+                    del self._values[i]
+                    break
+                i += 1
+
+    def search(self, prefix):
+        """Yield values with a word starting with ``prefix``, in word order (may repeat)."""
+        words = self._words
+        i = bisect.bisect_left(words, prefix)
+        while i < len(words) and words[i].startswith(prefix):
+            yield self._values[i]
+            i += 1
+
+
+_lock = threading.Lock()
+_student_index = None
+_student_names = {}
+_student_version = None
+_course_index = None
+_course_rows = None
+
+
+def _matches(text, rest):
+    words = _words(text)
+    return all(any(word.startswith(part) for word in words) for part in rest)
+
+
+def _top(index, query, label, limit):
+    parts = _words(query)
+    if not parts or limit < 1:
+        return []
+    seen = set()
+    found = []
+    for value in index.search(parts[0]):
+        if value in seen:
+            continue
+        seen.add(value)
+        if len(parts) == 1 or _matches(label(value), parts[1:]):
+            found.append(value)
+            if len(found) >= limit:
+                break
+    return found
+
+
+def _rebuild_students(conn):
+    global _student_index, _student_names, _student_version
+    version = changes.current_version(conn)
+    rows = conn.execute("SELECT id, name FROM students").fetchall()
+    _student_names = dict(rows)
+    _student_index = PrefixIndex(rows)
+    _student_version = version
+
+
+def _sync_students(conn):
+    """Apply student changes logged since the index was built or last synced."""
+    global _student_version
+    if _student_index is None:
+        _rebuild_students(conn)
+        return
+    if changes.current_version(conn) == _student_version:
+        return
+    while True:
+        delta = changes.changes_since(conn, _student_version, tables=('students',))
+        students = delta['students']
+        if delta['reset'] or len(students['inserted']) + len(students['deleted']) > REBUILD_THRESHOLD:
+            _rebuild_students(conn)
+            return
+        for student_id in students['deleted']:
+            name = _student_names.pop(student_id, None)
+            if name is not None:
+                _student_index.remove(student_id, name)
+        for row in students['inserted']:
+            old = _student_names.get(row['id'])
+            if old == row['name']:
+                continue    # e.g. a GPA update
+            if old is not None:
+                _student_index.remove(row['id'], old)
+            _student_names[row['id']] = row['name']
+            _student_index.add(row['id'], row['name'])
+        _student_version = delta['version']
+        if not delta['more']:
+            return
+
+
+def refresh():
+    """Build (or bring up to date) both indexes; used by the startup warm-up."""
+    conn = db.connect()
+    try:
+        with _lock:
+            _sync_students(conn)
+            _course_index_for(metadata.get('courses', conn))
+    finally:
+        conn.close()
+
+
+def _course_index_for(rows):
+    global _course_index, _course_rows
+    if rows is not _course_rows:
+        _course_index = PrefixIndex((row[0], row[0]) for row in rows)
+        _course_rows = rows
+    return _course_index
+
+
+def search_students(query, limit=TYPEAHEAD_LIMIT):
+    conn = db.connect()
+    try:
+        with _lock:
+            _sync_students(conn)
+            ids = _top(_student_index, query, _student_names.get, limit)
+            return [{'id': student_id, 'name': _student_names[student_id]} for student_id in ids]
+    finally:
+        conn.close()
+
+
+def search_courses(query, limit=TYPEAHEAD_LIMIT):
+    rows = metadata.get('courses')
+    with _lock:
+        return _top(_course_index_for(rows), query, str, limit)
+
+
+def find_student(name):
+    """Resolve a typed student name to an id: "Name (#id)" or a unique exact name."""
+    match = re.search(r"\(#(\d+)\)\s*$", name)
+    if match:
+        return int(match.group(1))
+    results = [s for s in search_students(name, TYPEAHEAD_MAX_LIMIT)
+               if s['name'].lower() == name.strip().lower()]
+    return results[0]['id'] if len(results) == 1 else None
@@ -0,0 +1,192 @@
+"""
+VIRTUAL_TABLE - windowed rendering for the listing tables.
+
+Both listing pages used to ship one ``<tr>`` per row, start a timer per row
+to animate it in, and sort by moving every DOM node, so a 20k-row page took
+minutes to settle. ``SCRIPT`` defines a small ``VirtualTable`` that each
+page embeds in its ``<script>``: it renders, from the page's JS data array,
+only the rows in or near the viewport between two spacer rows sized to the
+hidden ones, and re-renders that window on scroll (at most once per frame).
+Sorting extracts one column of keys into a flat array - a ``Float64Array``
+for numeric columns - and sorts an index array against it, never DOM nodes.
+
+Pages with more than ``VIRTUAL_ROWS`` rows leave the table body to the
+script altogether (``placeholder()``); smaller ones still render their rows
+server-side so they read fine without JavaScript, and the script takes the
+body over on load.
+"""
+
+import os
+
+VIRTUAL_ROWS = int(os.environ.get("VIRTUAL_ROWS", "500"))
+
+
+def placeholder(count, colspan, noun):
+    """Table body stand-in for a page whose rows are left to the script."""
+    return f"""
+                <tr>
+                    <td colspan="{colspan}" style="text-align: center; padding: 50px; color: #999;">
+                        Loading {count} {noun}...
+                    </td>
+                </tr>
+"""
+
+
+SCRIPT = """
+        // Only the rows in (or near) the viewport are in the DOM; the rest
+        // of the table is two spacer rows. Sorting works on one extracted
+        // column of keys and an index array instead of moving DOM nodes.
+        function VirtualTable(tbody, columns, renderRow, emptyHtml) {
+            this.tbody = tbody;
+            this.columns = columns;   // [{key: 'id', numeric: true}, ...] in header order
+            this.renderRow = renderRow;
+            this.emptyHtml = emptyHtml;
+            this.colspan = tbody.parentNode.querySelectorAll('thead th').length;
+            this.rowHeight = 48;
+            this.measured = false;
+            this.overscan = 20;
+            this.sortColumn = -1;
+            this.sortDirection = 1;
+            this.printing = false;
+            this.records = [];
+            this.order = new Uint32Array(0);
+            this.keys = {};
+            this.first = -1;
+            this.last = -1;
+            var table = this;
+            var pending = false;
+            function schedule() {
+                if (!pending) {
+                    pending = true;
+                    window.requestAnimationFrame(function() {
+                        pending = false;
+                        table.render(false);
+                    });
+                }
+            }
+            window.addEventListener('scroll', schedule, {passive: true});
+            window.addEventListener('resize', schedule);
+            // Printing shows the whole table, not just the window
+            window.addEventListener('beforeprint', function() {
+                table.printing = true;
+                table.render(true);
+            });
+            window.addEventListener('afterprint', function() {
+                table.printing = false;
+                table.render(true);
+            });
+        }
+
+        VirtualTable.prototype.setData = function(records) {
+            this.records = records;
+            this.keys = {};
+            this.order = new Uint32Array(records.length);
+            for (var i = 0; i < records.length; i++) {
+                this.order[i] = i;
+            }
+            if (this.sortColumn !== -1) {
+                this.sortOrder();
+            }
+            this.render(true);
+        };
+
+        // Sort keys of one column, extracted once per data change
+        VirtualTable.prototype.columnKeys = function(columnIndex) {
+            var keys = this.keys[columnIndex];
+            if (keys) {
+                return keys;
+            }
+            var column = this.columns[columnIndex];
+            var records = this.records;
+            var i;
+            if (column.numeric) {
+                keys = new Float64Array(records.length);
+                for (i = 0; i < records.length; i++) {
+                    var value = records[i][column.key];
+                    keys[i] = value === null || value === undefined ? -Infinity : Number(value);
+                }
+            } else {
+                keys = new Array(records.length);
+                for (i = 0; i < records.length; i++) {
+                    keys[i] = String(records[i][column.key]);
+                }
+            }
+            this.keys[columnIndex] = keys;
+            return keys;
+        };
+
+        VirtualTable.prototype.sortOrder = function() {
+            var keys = this.columnKeys(this.sortColumn);
+            var direction = this.sortDirection;
+            if (this.columns[this.sortColumn].numeric) {
+                this.order.sort(function(a, b) {
+                    return (keys[a] - keys[b]) * direction || a - b;
+                });
+            } else {
+                var compare = new Intl.Collator().compare;
+                this.order.sort(function(a, b) {
+                    return compare(keys[a], keys[b]) * direction || a - b;
+                });
+            }
+        };
+
+        // Sort by a column; a second call on the same column reverses it
+        VirtualTable.prototype.sortBy = function(columnIndex) {
+            if (this.sortColumn === columnIndex) {
+                this.sortDirection *= -1;
+            } else {
+                this.sortColumn = columnIndex;
+                this.sortDirection = 1;
+            }
+            this.sortOrder();
+            this.render(true);
+            return this.sortDirection;
+        };
+
+        VirtualTable.prototype.spacer = function(height) {
+            return '<tr class="virtual-spacer" style="height: ' + height + 'px;">' +
+                '<td colspan="' + this.colspan + '" style="padding: 0; border: 0;"></td></tr>';
+        };
+
+        VirtualTable.prototype.render = function(force) {
+            var count = this.order.length;
+            if (!count) {
+                this.first = this.last = -1;
+                this.tbody.innerHTML = this.emptyHtml;
+                return;
+            }
+            var first = 0;
+            var last = count;
+            if (!this.printing) {
+                var top = this.tbody.getBoundingClientRect().top;
+                first = Math.floor(-top / this.rowHeight) - this.overscan;
+                first = Math.max(0, Math.min(first, count - this.overscan));
+                // Even, so the nth-child striping does not flip while scrolling
+                first -= first % 2;
+                last = Math.ceil((window.innerHeight - top) / this.rowHeight) + this.overscan;
+                last = Math.min(count, Math.max(last, first + this.overscan));
+            }
+            if (!force && first === this.first && last === this.last) {
+                return;
+            }
+            this.first = first;
+            this.last = last;
+            var html = [this.spacer(first * this.rowHeight)];
+            for (var i = first; i < last; i++) {
+                html.push(this.renderRow(this.records[this.order[i]]));
+            }
+            html.push(this.spacer((count - last) * this.rowHeight));
+            this.tbody.innerHTML = html.join('');
+            if (!this.measured) {
+                // Spacer heights assume every row is as tall as the first one
+                var row = this.tbody.rows[1];
+                if (row && row.offsetHeight) {
+                    this.measured = true;
+                    if (row.offsetHeight !== this.rowHeight) {
+                        this.rowHeight = row.offsetHeight;
+                        this.render(true);
+                    }
+                }
+            }
+        };
+"""
@@ -0,0 +1,202 @@
+"""
+WARMING - refill the listing page caches before users ask for them.
+
+After a deploy or a burst of writes the first requests to ``/students``
+and ``/grades`` used to pay the full query and render cost. ``warm()``
+renders the unfiltered pages and the most requested filter combinations
+into the page caches (``fragments.PageCache``), refills the dropdown
+metadata and brings the typeahead index up to date. It runs on a
+background thread once the startup warm-up has finished, and
+``WARM_DELAY`` seconds after a write (``schedule()``); writes landing in
+the meantime share one run. So that warming never takes more than about
+half of a worker's time under a steady stream of writes, a run starts no
+sooner than the previous run's duration after it finished, and it waits
+while the process is serving requests, for up to ``WARM_MAX_POSTPONE``
+seconds.
+
+Which filters are popular is learned from traffic: the listing pages
+``record()`` every filtered view, and the counts are added to the
+``page_access`` table every ``ACCESS_FLUSH_INTERVAL`` seconds and before
+each run, so every worker - and the next deploy - warms what users
+actually open. Counts decay with a half-life of ``WARM_HALF_LIFE``
+seconds, so the ranking follows recent traffic. ``WARM_TOP`` combinations
+per page are warmed; a negative ``WARM_DELAY`` turns warming after writes
+off.
+"""
+
+import json
+import os
+import threading
+import time
+
+import db
+import metadata
+import metrics
+
+WARM_TOP = int(os.environ.get("WARM_TOP", "5"))
+WARM_DELAY = float(os.environ.get("WARM_DELAY", "1"))
+WARM_HALF_LIFE = float(os.environ.get("WARM_HALF_LIFE", "3600"))
+WARM_MAX_POSTPONE = float(os.environ.get("WARM_MAX_POSTPONE", "30"))
+# Seconds between checks for a moment with no requests in flight
+IDLE_POLL_INTERVAL = 0.25
+ACCESS_FLUSH_INTERVAL = 60
+# Filter combinations counted in memory between flushes
+ACCESS_MAX_KEYS = 1000
+
+WARM_RUNS = metrics.Counter("cache_warm_runs_total", "Page cache warming runs.", ("status",))
+WARM_DURATION = metrics.Histogram("cache_warm_duration_seconds", "Time a page cache warming run took.")
+WARM_PAGES = metrics.Counter("cache_warm_pages_total", "Pages rendered by cache warming.", ("page",))
+
+_hits = {}
+_hits_lock = threading.Lock()
+_last_flush = time.monotonic()
+_timer = None
+_timer_pid = None
+_timer_lock = threading.Lock()
+_running = False
+# Set by writes landing during a run: that run may have missed them
+_rerun = False
+# time.monotonic() before which the next run may not start
+_not_before = 0.0
+
+
+def ensure_schema(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS page_access (
+        page TEXT NOT NULL,
+        params TEXT NOT NULL,
+        hits REAL NOT NULL,
+        updated_at REAL NOT NULL,
+        PRIMARY KEY (page, params)
+    )''')
+
+
+def record(page, params):
+    """Count one view of ``page`` with the filter values ``params`` (a tuple)."""
+    global _last_flush
+    if not any(params):
+        return      # the unfiltered pages are always warmed
+    with _hits_lock:
+        key = (page, json.dumps(params))
+        if key in _hits or len(_hits) < ACCESS_MAX_KEYS:
+            _hits[key] = _hits.get(key, 0) + 1
+        due = time.monotonic() - _last_flush > ACCESS_FLUSH_INTERVAL
+        if due:
+            _last_flush = time.monotonic()
+    if due:
+        threading.Thread(target=flush, name="access-flush", daemon=True).start()
+
+
+def _decayed(hits, updated_at, now):
+    return hits * 0.5 ** ((now - updated_at) / WARM_HALF_LIFE)
+
+
+def flush():
+    """Add the counts recorded since the last flush to ``page_access``."""
+    global _hits
+    with _hits_lock:
+        pending, _hits = _hits, {}
+    if not pending:
+        return
+    now = time.time()
+
+    def work(conn):
+        for (page, params), count in pending.items():
+            row = conn.execute("SELECT hits, updated_at FROM page_access WHERE page = ? AND params = ?",
+                               (page, params)).fetchone()
+            hits = count + (_decayed(*row, now) if row else 0)
+            conn.execute("INSERT OR REPLACE INTO page_access (page, params, hits, updated_at)"
+                         " VALUES (?, ?, ?, ?)", (page, params, hits, now))
+        # Down to a thousandth of what they were
+        conn.execute("DELETE FROM page_access WHERE updated_at < ?", (now - 10 * WARM_HALF_LIFE,))
+
+    db.write(work)
+
+
+def popular(conn, page, limit=WARM_TOP):
+    """The ``limit`` filter combinations of ``page`` with the most recent views."""
+    now = time.time()
+    rows = conn.execute("SELECT params, hits, updated_at FROM page_access WHERE page = ?", (page,)).fetchall()
+    rows.sort(key=lambda row: _decayed(row[1], row[2], now), reverse=True)
+    return [tuple(json.loads(row[0])) for row in rows[:limit]]
+
+
+def warm():
+    """Render the unfiltered and most requested listing pages into the page caches."""
+    global _not_before
+    import grades_page
+    import student_page
+    import typeahead
+    start = time.perf_counter()
+    try:
+        flush()
+        conn = db.connect()
+        try:
+            student_views = popular(conn, 'students')
+            grade_views = popular(conn, 'grades')
+        finally:
+            conn.close()
+        metadata.fill()
+        typeahead.refresh()
+        for params in [('', '')] + student_views:
+            student_page.render_student_listing(*params, record=False)
+            WARM_PAGES.inc(('students',))
+        for params in [('', '', '')] + grade_views:
+            grades_page.render_grades_listing(*params, record=False)
+            WARM_PAGES.inc(('grades',))
+    except Exception:
+        WARM_RUNS.inc(("failed",))
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        _not_before = time.monotonic() + duration
+    WARM_RUNS.inc(("ok",))
+    WARM_DURATION.observe(duration)
+
+
+def _start_timer(delay, deadline):
+    global _timer, _timer_pid
+    _timer = threading.Timer(delay, _run, (deadline,))
+    _timer.daemon = True
+    _timer_pid = os.getpid()
+    _timer.start()
+
+
+def _run(deadline):
+    global _timer, _running, _rerun
+    with _timer_lock:
+        if metrics.IN_FLIGHT.value() > 0 and time.monotonic() < deadline:
+            _start_timer(IDLE_POLL_INTERVAL, deadline)
+            return
+        _timer = None
+        _running = True
+    try:
+        warm()
+    finally:
+        with _timer_lock:
+            _running = False
+            rerun, _rerun = _rerun, False
+        if rerun:
+            schedule()
+
+
+def schedule(delay=None):
+    """Run ``warm()`` on a background thread in ``delay`` seconds (default ``WARM_DELAY``).
+
+    Calls made while a run is already waiting to start are folded into it;
+    calls made while one is running start one more run after it. A run is
+    held back until the previous one's duration has passed since it
+    finished, and while requests are in flight (see the module docstring).
+    """
+    global _rerun
+    delay = WARM_DELAY if delay is None else delay
+    if delay < 0:
+        return
+    with _timer_lock:
+        if _timer_pid == os.getpid():
+            if _running:
+                _rerun = True
+                return
+            if _timer is not None:
+                return
+        delay = max(delay, _not_before - time.monotonic())
+        _start_timer(delay, time.monotonic() + delay + WARM_MAX_POSTPONE)